@@ -0,0 +1,156 @@
+import numpy as np
+from keypoints import KEYPOINTS
+
+try:
+    import hailo
+except ImportError:
+    # Only fill() needs the bindings; batches can still be built from arrays off-device
+    hailo = None
+
+NUM_KEYPOINTS = len(KEYPOINTS)
+EYES = [KEYPOINTS["left_eye"], KEYPOINTS["right_eye"]]
+
+
+class DetectionBatch:
+    """
+    Struct-of-arrays view of every person detected in a frame.
+
+    Filled once per frame from the Hailo ROI, after which centers, aim points
+    and distances for all persons come from single vectorized calls instead of
+    a Python object (and dozens of binding calls) per detection.
+
+    All arrays are preallocated and only grow; use the properties to get views
+    trimmed to the current frame.
+    """
+    count: int
+    dimensions: tuple[int, int]
+
+    def __init__(self, capacity: int = 16):
+        self.count = 0
+        self.dimensions = (0, 0)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        # boxes are normalized (xmin, ymin, xmax, ymax)
+        self._boxes = np.zeros((capacity, 4), dtype=np.float32)
+        # landmarks are normalized relative to their bbox: (x, y, confidence)
+        self._landmarks = np.zeros((capacity, NUM_KEYPOINTS, 3), dtype=np.float32)
+        self._has_landmarks = np.zeros(capacity, dtype=bool)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._confidences = np.zeros(capacity, dtype=np.float32)
+
+    def _grow(self):
+        old = (self._boxes, self._landmarks, self._has_landmarks, self._ids, self._confidences)
+        self._allocate(len(self._boxes) * 2)
+        for src, dst in zip(old, (self._boxes, self._landmarks, self._has_landmarks, self._ids, self._confidences)):
+            dst[:len(src)] = src
+
+    def fill(self, detections, dimensions: tuple[int, int], label: str = "person") -> "DetectionBatch":
+        """
+        Read every detection with the given label out of the Hailo objects.
+        Landmarks are only read for the eyes, persons missing them count as
+        having none
+        """
+        self.count = 0
+        self.dimensions = dimensions
+
+        for detection in detections:
+            if detection.get_label() != label:
+                continue
+
+            if self.count == len(self._boxes):
+                self._grow()
+            i = self.count
+
+            bbox = detection.get_bbox()
+            self._boxes[i] = (bbox.xmin(), bbox.ymin(), bbox.xmax(), bbox.ymax())
+            self._confidences[i] = detection.get_confidence()
+
+            track = detection.get_objects_typed(hailo.HAILO_UNIQUE_ID)
+            self._ids[i] = track[0].get_id() if len(track) == 1 else 0
+
+            # Only the eyes are aimed at, so only they are read (3 binding calls
+            # each instead of 51 per person); the rest of the row stays zero
+            landmarks = detection.get_objects_typed(hailo.HAILO_LANDMARKS)
+            points = landmarks[0].get_points() if len(landmarks) > 0 else []
+            self._landmarks[i] = 0
+            self._has_landmarks[i] = len(points) > max(EYES)
+            if self._has_landmarks[i]:
+                for k in EYES:
+                    p = points[k]
+                    self._landmarks[i, k] = (p.x(), p.y(), p.confidence())
+
+            self.count += 1
+
+        return self
+
+    def load(self, boxes, dimensions: tuple[int, int], ids=None, confidences=None, landmarks=None) -> "DetectionBatch":
+        """
+        Fill the batch from plain arrays (normalized boxes, bbox-relative landmarks)
+        """
+        count = len(boxes)
+        while count > len(self._boxes):
+            self._grow()
+
+        self.count = count
+        self.dimensions = dimensions
+        self._boxes[:count] = boxes
+        self._ids[:count] = ids if ids is not None else 0
+        self._confidences[:count] = confidences if confidences is not None else 1
+        self._has_landmarks[:count] = landmarks is not None
+        if landmarks is not None:
+            self._landmarks[:count] = landmarks
+        return self
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def boxes(self) -> np.ndarray:
+        return self._boxes[:self.count]
+
+    @property
+    def landmarks(self) -> np.ndarray:
+        return self._landmarks[:self.count]
+
+    @property
+    def has_landmarks(self) -> np.ndarray:
+        return self._has_landmarks[:self.count]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self.count]
+
+    @property
+    def confidences(self) -> np.ndarray:
+        return self._confidences[:self.count]
+
+    def centers(self) -> np.ndarray:
+        """
+        (N, 2) bbox centers in absolute pixel coordinates
+        """
+        boxes = self.boxes
+        return (boxes[:, 0:2] + boxes[:, 2:4]) / 2 * self.dimensions
+
+    def keypoints(self) -> np.ndarray:
+        """
+        (N, 17, 2) landmarks in absolute pixel coordinates, only the eyes after fill()
+        First scale relative to bounding box, then offset by bbox position, then scale to image dimensions
+        """
+        boxes = self.boxes
+        size = boxes[:, None, 2:4] - boxes[:, None, 0:2]
+        return (self.landmarks[:, :, 0:2] * size + boxes[:, None, 0:2]) * self.dimensions
+
+    def aim_points(self) -> np.ndarray:
+        """
+        (N, 2) point between the eyes in absolute pixel coordinates, or the bbox
+        center for persons without landmarks
+        """
+        eyes = self.keypoints()[:, EYES].mean(axis=1)
+        return np.where(self.has_landmarks[:, None], eyes, self.centers())
+
+    def distances(self, point: tuple[float, float]) -> np.ndarray:
+        """
+        (N,) distance between each person's aim point and the given point
+        """
+        return np.hypot(*(self.aim_points() - point).T)
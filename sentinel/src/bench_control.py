@@ -0,0 +1,77 @@
+"""
+Control output of the fixed-rate loop when a detection replaces the extrapolated error.
+
+    python bench_control.py --rate 500 --fps 30 --seconds 3
+
+Runs the real Control.fixedRateLoop (in 'sim', nothing is written) on a
+Mailbox fed at --fps with a target swinging sinusoidally across the frame,
+plus detection noise. Between detections the loop ticks on the extrapolated
+error; when a detection arrives the error steps to the measured value. Checks
+that the pan output never exceeds what the gains allow for the target's
+motion, kp * largest error + kd * 2 * largest speed, on detection ticks as
+well as on extrapolated ones. Exits non-zero if it does.
+"""
+import math
+import time
+import random
+import threading
+from argparse import ArgumentParser
+from control import Control
+from handoff import Mailbox
+from flight import FLAG_EXTRAPOLATED
+
+
+class ProbedControl(Control):
+    """
+    Control that keeps every decision instead of sending it anywhere
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.decisions = []
+
+    def record(self, pan_error, tilt_error, pan_output, tilt_output, flags: int = 0):
+        self.decisions.append((pan_error, pan_output, flags))
+
+
+def check(ok, message):
+    print(f"[{'i' if ok else '!'}] {message}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('-r', '--rate', type=float, default=500, help='control loop Hz')
+    parser.add_argument('-f', '--fps', type=float, default=30, help='detections per second')
+    parser.add_argument('-s', '--seconds', type=float, default=3)
+    parser.add_argument('-a', '--amplitude', type=float, default=100, help='pixels the target swings either side')
+    parser.add_argument('--period', type=float, default=2, help='seconds per swing')
+    parser.add_argument('--noise', type=float, default=3, help='detection noise in pixels (std)')
+    args = parser.parse_args()
+
+    mailbox = Mailbox()
+    control = ProbedControl('sim', rate=args.rate)
+    # the loop itself, updateLoop would also install signal handlers, main thread only
+    threading.Thread(target=control.fixedRateLoop, args=(mailbox,), daemon=True).start()
+
+    rng = random.Random(0)
+    omega = 2 * math.pi / args.period
+    start = time.monotonic()
+    frame = 0
+    while (now := time.monotonic()) - start < args.seconds:
+        error = args.amplitude * math.sin(omega * (now - start)) + rng.gauss(0, args.noise)
+        frame += 1
+        mailbox.write(frame, error, 0.0, capture=now, probe=now)
+        time.sleep(max(0.0, start + frame / args.fps - time.monotonic()))
+
+    decisions = list(control.decisions)
+    kp, kd = control.pid_pan.kp, control.kd
+    bound = kp * (args.amplitude + 4 * args.noise) + kd * 2 * args.amplitude * omega
+    detected = [abs(output) for _, output, flags in decisions if not flags & FLAG_EXTRAPOLATED]
+    extrapolated = [abs(output) for _, output, flags in decisions if flags & FLAG_EXTRAPOLATED]
+
+    print(f"[i] {len(decisions)} ticks at {args.rate:.0f}Hz, {frame} detections at {args.fps:.0f}Hz, target speed up to {args.amplitude * omega:.0f}px/s")
+    passed = check(bool(detected) and max(detected) < bound, f"detection ticks: |pan output| max {max(detected, default=0):.0f} (bound {bound:.0f})")
+    passed &= check(bool(extrapolated) and max(extrapolated) < bound, f"extrapolated ticks: |pan output| max {max(extrapolated, default=0):.0f} (bound {bound:.0f})")
+
+    if not passed:
+        raise SystemExit(1)
@@ -0,0 +1,85 @@
+"""
+Microbenchmark: multiprocessing.Pipe vs the shared-memory Mailbox for handing
+(pan_error, tilt_error) from the GStreamer callback to the Control process.
+
+    python bench_mailbox.py --count 20000 --rate 120
+
+--rate 0 writes as fast as possible. Latency is measured from the write to the
+moment the consumer has the sample in hand.
+"""
+import time
+from argparse import ArgumentParser
+from multiprocessing import Pipe, Process, Queue
+from handoff import Mailbox
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def produce(write, count, rate):
+    interval = 1 / rate if rate > 0 else 0
+    next_tick = time.monotonic()
+    for frame in range(1, count + 1):
+        write(frame)
+        if interval:
+            next_tick += interval
+            while time.monotonic() < next_tick:
+                pass
+
+
+def consume_pipe(conn, count, results: Queue):
+    latencies = []
+    while True:
+        timestamp, frame, pan_error, tilt_error, target_id = conn.recv()
+        latencies.append(time.monotonic() - timestamp)
+        if frame == count:
+            break
+    results.put((latencies, 0))
+
+
+def consume_mailbox(mailbox: Mailbox, count, results: Queue):
+    latencies = []
+    while True:
+        sample = mailbox.wait(1)
+        if sample is None:
+            continue
+        latencies.append(time.monotonic() - sample.timestamp)
+        if sample.frame == count:
+            break
+    results.put((latencies, mailbox.skipped))
+
+
+def run(name, consumer, args, write, count, rate):
+    results = Queue()
+    p = Process(target=consumer, args=(*args, count, results))
+    p.start()
+    time.sleep(0.2)
+
+    start = time.monotonic()
+    produce(write, count, rate)
+    latencies, skipped = results.get()
+    elapsed = time.monotonic() - start
+    p.join()
+
+    print(f"{name:8} handed off {len(latencies):6d}/{count} ({skipped} skipped) "
+          f"| {len(latencies) / elapsed:9.0f} samples/s "
+          f"| p50 {percentile(latencies, 50) * 1e6:7.1f}us "
+          f"p99 {percentile(latencies, 99) * 1e6:7.1f}us "
+          f"max {max(latencies) * 1e6:7.1f}us")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('-n', '--count', type=int, default=20000)
+    parser.add_argument('-r', '--rate', type=float, default=120, help='writes per second, 0 for unthrottled')
+    args = parser.parse_args()
+
+    parent_conn, child_conn = Pipe(duplex=True)
+    run("pipe", consume_pipe, (child_conn,),
+        lambda frame: parent_conn.send((time.monotonic(), frame, 1.0, -1.0, 1)), args.count, args.rate)
+
+    mailbox = Mailbox()
+    run("mailbox", consume_mailbox, (mailbox,),
+        lambda frame: mailbox.write(frame, 1.0, -1.0, 1), args.count, args.rate)
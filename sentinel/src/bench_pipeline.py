@@ -0,0 +1,58 @@
+"""
+Measure queueing latency of the pipeline profiles without a camera or Hailo hat.
+
+    python bench_pipeline.py --seconds 10 --inference-ms 20
+
+Runs profiles.cpu_pipeline_string for each profile and probes the buffers
+reaching the callback element: their age (now - capture time from the PTS),
+how many arrive per second and how many the source produced.
+"""
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst, GLib
+import numpy as np
+from argparse import ArgumentParser
+from profiles import PROFILES, cpu_pipeline_string
+
+
+def measure(profile: str, seconds: float, inference_us: int, framerate: str):
+    pipeline = Gst.parse_launch(cpu_pipeline_string(profile, framerate=framerate, inference_us=inference_us))
+    ages, produced = [], [0]
+
+    def on_callback(pad, info):
+        buffer = info.get_buffer()
+        element = pad.get_parent_element()
+        ages.append(element.get_clock().get_time() - element.get_base_time() - buffer.pts)
+        return Gst.PadProbeReturn.OK
+
+    def on_source(pad, info):
+        produced[0] += 1
+        return Gst.PadProbeReturn.OK
+
+    pipeline.get_by_name("identity_callback").get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_callback)
+    pipeline.get_by_name("source_q").get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, on_source)
+
+    loop = GLib.MainLoop()
+    GLib.timeout_add(int(seconds * 1000), loop.quit)
+    pipeline.set_state(Gst.State.PLAYING)
+    loop.run()
+    pipeline.set_state(Gst.State.NULL)
+
+    ages = np.array(ages) / Gst.MSECOND
+    print(
+        f"{profile:8} {len(ages) / seconds:6.1f} fps, {produced[0] - len(ages):5d}/{produced[0]} frames dropped, "
+        f"age p50 {np.percentile(ages, 50):7.2f}ms p99 {np.percentile(ages, 99):7.2f}ms max {ages.max():7.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('-s', '--seconds', type=float, default=10)
+    parser.add_argument('-i', '--inference-ms', type=float, default=20, help='artificial per-frame inference time')
+    parser.add_argument('-f', '--framerate', default='120/1')
+    args = parser.parse_args()
+
+    Gst.init(None)
+    for profile in PROFILES:
+        measure(profile, args.seconds, int(args.inference_ms * 1000), args.framerate)
@@ -0,0 +1,114 @@
+"""
+Round trip of the binary protocol over a pty standing in for the Warden board.
+
+    python bench_protocol.py --count 5000
+
+Control's side writes Encoder frames to the pty through pyserial, the "board"
+reads the other end in arbitrary chunks and decodes them with FrameDecoder.
+Checks that every command survives the trip, that corrupted frames (including
+ones whose payload looks like a text command) are dropped without losing the
+frames around them, and compares bytes and writes per update with the ASCII
+commands. Exits non-zero if any check fails.
+"""
+import os
+import pty
+import time
+import random
+import select
+import serial
+import threading
+from argparse import ArgumentParser
+from protocol import Encoder, FrameDecoder, Command, FRAME_SIZE, clamp_velocity
+
+
+class Board(threading.Thread):
+    """
+    Reads the master end of the pty in small random chunks and decodes it
+    """
+    def __init__(self, fd):
+        super().__init__(daemon=True)
+        self.fd = fd
+        self.decoder = FrameDecoder()
+        self.commands = []
+        self.received = 0
+        self.stop = threading.Event()
+        self.rng = random.Random(1)
+
+    def run(self):
+        while not self.stop.is_set():
+            ready, _, _ = select.select([self.fd], [], [], 0.05)
+            if not ready:
+                continue
+            data = os.read(self.fd, self.rng.randint(1, 2 * FRAME_SIZE))
+            self.received += len(data)
+            self.commands += self.decoder.feed(data)
+
+    def wait(self, count, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while len(self.commands) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.commands
+
+
+def ascii_commands(pan, tilt, trigger):
+    # what Control.encode sends without --binary
+    return [('v0' + str(pan)).encode(), ('v1' + str(tilt)).encode(), ('t' + str(trigger).lower()).encode()]
+
+
+def check(ok, message):
+    print(f"[{'i' if ok else '!'}] {message}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('-n', '--count', type=int, default=5000)
+    args = parser.parse_args()
+
+    master, slave = pty.openpty()
+    port = serial.Serial(os.ttyname(slave), 115200)  # pyserial puts the pty in raw mode
+    board = Board(master)
+    board.start()
+
+    rng = random.Random(0)
+    encoder = Encoder()
+    sent = []
+    start = time.perf_counter()
+    for _ in range(args.count):
+        pan, tilt = rng.uniform(-50000, 50000), rng.uniform(-50000, 50000)
+        trigger = rng.choice((True, False, None))
+        frame = encoder.encode(pan, tilt, trigger)
+        port.write(frame)
+        sent.append(Command(encoder.seq - 1 & 0xFFFF, clamp_velocity(pan), clamp_velocity(tilt), trigger))
+    encode_time = time.perf_counter() - start
+
+    received = board.wait(len(sent))
+    passed = check(received == sent, f"round trip: {len(received)}/{len(sent)} commands identical")
+
+    # corruption: a flipped CRC, a payload holding ASCII "v0 5\n", stray bytes between frames
+    before = len(board.commands)
+    errors = board.decoder.errors
+    good = [encoder.encode(i, -i, None) for i in range(1, 4)]
+    bad_crc = bytearray(encoder.encode(7, 7, True))
+    bad_crc[-1] ^= 0xFF
+    text_payload = bytearray(encoder.encode(0, 0, None))
+    text_payload[4:9] = b'v0 5\n'
+    port.write(good[0] + bytes(bad_crc) + good[1] + bytes(text_payload) + b'\x00\xff' + good[2])
+    received = board.wait(before + 3)[before:]
+    passed &= check(
+        [command.pan for command in received] == [1, 2, 3],
+        f"corruption: kept {len(received)}/3 good frames, {board.decoder.errors - errors} errors counted",
+    )
+    passed &= check(board.decoder.errors > errors, "corruption: decoder reported the bad frames")
+
+    board.stop.set()
+    board.join()
+    port.close()
+    os.close(master)
+
+    ascii_bytes = sum(len(data) for data in ascii_commands(-12345.678901234, 23456.789012345, True))
+    print(f"[i] binary: {FRAME_SIZE} bytes in 1 write per update, {encode_time / args.count * 1e6:.1f}us per encode+write")
+    print(f"[i] ascii:  {ascii_bytes} bytes in 3 writes per update (float velocities)")
+
+    if not passed:
+        raise SystemExit(1)
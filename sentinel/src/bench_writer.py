@@ -0,0 +1,145 @@
+"""
+SerialWriter against a board that stalls the port more than it keeps up.
+
+    python bench_writer.py --seconds 3 --rate 120 --stall 40 --every 4 --deadline 60
+
+A pty stands in for the Warden and the "board" decodes everything written to
+it. Every --every-th write blocks for --stall ms first, like a stalled USB
+endpoint; by default that is 10ms of port time per write on average against
+a submit every 8.3ms, so a writer that sent every command in order would fall
+further behind for as long as it ran. The control loop submits at --rate and
+must never block. Checks that
+- submit() stays well under a millisecond,
+- at most one value per axis is ever pending (newer ones overwrite it),
+- submit -> written latency stays under --deadline ms, i.e. commands never
+  queue up behind a stall,
+- the last command the board decodes is the last one submitted,
+- a failing port is counted and raised from submit() without killing the
+  writer thread, which carries on once the port works again.
+Exits non-zero if any check fails.
+"""
+import os
+import pty
+import time
+import select
+import serial
+import threading
+from argparse import ArgumentParser
+from protocol import Encoder, FrameDecoder
+from writer import SerialWriter
+
+
+class StallingPort:
+    """
+    The serial port, blocking every `every`-th write for `stall` seconds
+    and failing writes while `failing` is set
+    """
+    def __init__(self, port, stall, every):
+        self.port = port
+        self.stall = stall
+        self.every = every
+        self.writes = 0
+        self.failing = False
+
+    @property
+    def is_open(self):
+        return self.port.is_open
+
+    def write(self, data):
+        if self.failing:
+            raise serial.SerialException("write failed: device disconnected")
+        self.writes += 1
+        if self.writes % self.every == 0:
+            time.sleep(self.stall)
+        self.port.write(data)
+
+
+def board(fd, stop, chunks):
+    while not stop.is_set():
+        if select.select([fd], [], [], 0.05)[0]:
+            chunks.append(os.read(fd, 1 << 16))
+
+
+def check(ok, message):
+    print(f"[{'i' if ok else '!'}] {message}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('-s', '--seconds', type=float, default=3)
+    parser.add_argument('-r', '--rate', type=float, default=120, help='submits per second')
+    parser.add_argument('--stall', type=float, default=40, help='ms a stalled write blocks')
+    parser.add_argument('--every', type=int, default=4, help='stall every n-th write')
+    parser.add_argument('-d', '--deadline', type=float, default=60, help='ms from submit to written')
+    args = parser.parse_args()
+
+    master, slave = pty.openpty()
+    port = serial.Serial(os.ttyname(slave), 115200)
+
+    encoder = Encoder()
+    stalling = StallingPort(port, args.stall / 1000, args.every)
+    writer = SerialWriter(stalling, lambda pan, tilt, trigger: [encoder.encode(pan, tilt, trigger)], deadline=args.deadline / 1000)
+
+    stop = threading.Event()
+    chunks = []
+    reader = threading.Thread(target=board, args=(master, stop, chunks), daemon=True)
+    reader.start()
+
+    submit_times, depth = [], 0
+    interval = 1 / args.rate
+    next_tick = time.monotonic()
+    ticks = int(args.seconds * args.rate)
+    for tick in range(1, ticks + 1):
+        start = time.perf_counter()
+        writer.submit(tick, -tick, tick % 2 == 0)
+        submit_times.append((time.perf_counter() - start) * 1e3)
+        depth = max(depth, len(writer.pending))
+
+        next_tick += interval
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    # let the last write (possibly a stalled one) reach the board
+    deadline = time.monotonic() + 2
+    while writer.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(args.stall / 1000 + 0.1)
+    commands = FrameDecoder().feed(b''.join(chunks))
+
+    latency = writer.latency.summary()
+    submit_times.sort()
+    print(f"[i] {ticks} submits at {args.rate:.0f}Hz, every {args.every}th write stalls {args.stall:.0f}ms")
+    print(f"[i] writer: {writer.summary()}")
+    passed = check(submit_times[-1] < 1, f"submit max {submit_times[-1]:.3f}ms, p99 {submit_times[int(len(submit_times) * 0.99)]:.3f}ms")
+    passed &= check(depth <= 3, f"pending depth at most {depth} (one slot per axis)")
+    passed &= check(latency["max"] < args.deadline, f"write latency p99 {latency['p99']:.1f}ms max {latency['max']:.1f}ms (deadline {args.deadline:.0f}ms)")
+    passed &= check(bool(commands) and commands[-1].pan == ticks, f"board's last command pan={commands[-1].pan if commands else None}, last submitted {ticks}")
+
+    # unplug the board: writes fail, submit raises, the writer keeps running
+    stalling.failing = True
+    writer.submit(ticks + 1, 0, None)
+    time.sleep(0.1)
+    try:
+        writer.submit(ticks + 2, 0, None)
+        raised = None
+    except serial.SerialException as error:
+        raised = error
+    errors = writer.errors
+    stalling.failing = False
+    try:
+        writer.submit(ticks + 3, 0, None)
+    except serial.SerialException:
+        pass  # ticks + 2 may have failed before the port came back, ticks + 3 is queued regardless
+    time.sleep(0.1)
+    commands = FrameDecoder().feed(b''.join(chunks))
+    passed &= check(raised is not None and errors >= 1, f"failing port: {errors} write error(s) counted, submit raised {raised!r}")
+    passed &= check(writer.thread.is_alive() and commands[-1].pan == ticks + 3, f"writer alive after the failure, board's last command pan={commands[-1].pan}")
+
+    stop.set()
+    reader.join()
+    port.close()
+    os.close(master)
+    if not passed:
+        raise SystemExit(1)
@@ -1,4 +1,5 @@
 from argparse import ArgumentParser
+from profiles import PROFILES
 
 parser = ArgumentParser()
 parser.add_argument('-d', '--dry-run', action='store_true')
@@ -6,6 +7,15 @@ parser.add_argument('-v', '--video', default='/dev/video32')
 parser.add_argument('-V', '--verbose', action='store_true')
 parser.add_argument('-m', '--hef', default='model/yolov8s_pose.hef')
 parser.add_argument('-b', '--board', default='/dev/ttyUSB0')
+parser.add_argument('-p', '--profile', choices=PROFILES, default='display', help='latency = headless, leaky single-buffer queues, fakesink')
+parser.add_argument('-r', '--control-rate', type=float, default=0, help='fixed control loop rate in Hz (0 = update on each detection)')
+parser.add_argument('--hfov', type=float, default=70, help='camera horizontal field of view in degrees')
+parser.add_argument('--hysteresis', type=float, default=3, help='degrees a new target must be closer to the crosshair by to steal the lock')
+parser.add_argument('--stats-port', type=int, default=0, help='serve latency histograms as JSON on this local port')
+parser.add_argument('--record', help='write every frame\'s detections to this log for replay.py')
+parser.add_argument('-a', '--async-write', action='store_true', help='write to the board from a coalescing background thread')
+parser.add_argument('--flight', help='record every control decision into this memory-mapped ring file')
+parser.add_argument('-B', '--binary', action='store_true', help='use the compact binary serial protocol')
 options = parser.parse_args()
 
 # Let user know of certain flags
@@ -1,33 +1,190 @@
-from multiprocessing.connection import Connection
+import time
 import serial
 from PID_Py.PID import PID
+from protocol import Encoder, clamp_velocity
+from handoff import Mailbox
+from extrapolation import Extrapolator
+from timing import TickStats
+from latency import LatencyTracer
+from writer import SerialWriter
+from flight import FlightRecorder, FLAG_EXTRAPOLATED, FLAG_ASYNC_WRITE, FLAG_STOP
 
 class Control:
     pid_tilt: PID
     pid_pan: PID
+    encoder: Encoder | None
+    rate: float
 
-    def __init__(self, port: str | None):
+    def __init__(
+        self,
+        port: str | None,
+        binary: bool = False,
+        rate: float = 0,
+        stats_port: int = 0,
+        async_write: bool = False,
+        flight_path: str | None = None,
+        verbose: bool = False,
+        log_interval: float = 0.5,
+    ):
         if port == 'sim' or port is None:
             self.serial = serial.Serial()
         else:
             self.serial = serial.Serial(port, 115200)
 
-        self.pid_tilt = PID(kp=4, ki=0, kd=8)
-        self.pid_pan = PID(kp=4, ki=0, kd=8)
+        # At a fixed rate the D term comes from the extrapolator's error velocity
+        # (see update): PID_Py differentiates over the tick, so the step from an
+        # extrapolated error to a fresh detection would be divided by ~2ms
+        self.kd = 8
+        self.pid_tilt = PID(kp=4, ki=0, kd=0 if rate > 0 else self.kd)
+        self.pid_pan = PID(kp=4, ki=0, kd=0 if rate > 0 else self.kd)
+
+        # Opt-in binary framing (see protocol.py), otherwise the ASCII commands
+        self.encoder = Encoder() if binary else None
+
+        # 0 = run the PID only when a detection arrives, otherwise tick at this rate (Hz)
+        self.rate = rate
+        self.extrapolator = Extrapolator()
+
+        # Latency of each frame from capture to the first serial write it caused
+        self.tracer = LatencyTracer()
+        self.stats_port = stats_port
+        self.pending_trace = None
+
+        # Serial writes from a coalescing background thread, started in updateLoop
+        self.async_write = async_write
+        self.writer = None
+
+        # Every decision goes to the flight recorder (opened in updateLoop), the console is opt-in
+        self.flight_path = flight_path
+        self.flight = None
+        self.trigger_state = -1  # last trigger command sent, -1 before the first one
+        self.sample = None
+        self.verbose = verbose
+        self.log_interval = log_interval
+        self.last_log = 0.0
+
+    def updateLoop(self, mailbox: Mailbox):
+        # Runs in the control process, so the signal handler and server live here
+        self.tracer.install_signal()
+        if self.stats_port:
+            self.tracer.serve(self.stats_port)
+        if self.async_write:
+            self.writer = SerialWriter(self.serial, self.encode, on_write=self.traced)
+        if self.flight_path:
+            self.flight = FlightRecorder(self.flight_path)
+            print(f"[i] Flight recorder: {self.flight_path} ({self.flight.capacity} records)")
+
+        if self.rate > 0:
+            return self.fixedRateLoop(mailbox)
 
-    def updateLoop(self, pipe: Connection):
         while True:
-            pan_error, tilt_error = pipe.recv()
-            self.update(pan_error, tilt_error)
-            print(pan_error, tilt_error)
+            # Always the newest sample; anything older was overwritten, not queued
+            sample = mailbox.wait()
+            if sample is None:
+                continue
+            self.pending_trace = (sample, time.monotonic())
+            self.sample = sample
+
+            self.update(sample.pan_error, sample.tilt_error)
+            self.log(f"[d] error {sample.pan_error:.1f}, {sample.tilt_error:.1f} (skipped {mailbox.skipped})")
+
+    def fixedRateLoop(self, mailbox: Mailbox, report_interval: float = 5):
+        """
+        Tick the PID at `self.rate` Hz on the monotonic clock, extrapolating the
+        target error between detections.
+        """
+        period = 1 / self.rate
+        stats = TickStats(period)
+        tracking = False
+
+        next_tick = time.monotonic()
+        last_report = next_tick
+
+        while True:
+            start = time.monotonic()
+            late = start - next_tick
+
+            sample = mailbox.read()
+            if sample is not None:
+                self.pending_trace = (sample, start)
+                self.sample = sample
+                self.extrapolator.observe(sample.timestamp, sample.pan_error, sample.tilt_error)
+
+            errors = self.extrapolator.predict(start)
+            if errors is not None:
+                self.update(*errors, extrapolated=sample is None, velocity=self.extrapolator.velocity)
+                tracking = True
+            elif tracking:
+                # Target lost, stop instead of slewing on the last command
+                self.move(0, 0)
+                self.record(float('nan'), float('nan'), 0, 0, FLAG_STOP)
+                tracking = False
 
+            end = time.monotonic()
+            stats.record(late, end - start)
+
+            if end - last_report >= report_interval:
+                self.log(f"[i] control loop: {stats.summary(end - last_report)}, skipped {mailbox.skipped} frames", force=True)
+                if self.writer is not None:
+                    self.log(f"[i] serial writer: {self.writer.summary()}", force=True)
+                stats.reset()
+                last_report = end
+
+            next_tick += period
+            if end > next_tick:
+                # Fell behind by more than a tick, don't try to catch up with a burst
+                next_tick = end
+            else:
+                time.sleep(next_tick - end)
 
     # Runs single update
-    def update(self, pan_error, tilt_error):
+    def update(self, pan_error, tilt_error, extrapolated: bool = False, velocity: tuple[float, float] | None = None):
+        """
+        velocity: d(error)/dt per axis for the D term, instead of the PIDs differentiating the errors
+        """
         pan_correction = self.pid_pan(setpoint=0, processValue=pan_error)
         tilt_correction = self.pid_tilt(setpoint=0, processValue=tilt_error)
-        self.panVelocity(pan_correction)
-        self.tiltVelocity(tilt_correction)
+        if velocity is not None:
+            # derivative on measurement: PID_Py's error is setpoint - processValue
+            pan_correction -= self.kd * velocity[0]
+            tilt_correction -= self.kd * velocity[1]
+        self.move(pan_correction, tilt_correction)
+        self.record(pan_error, tilt_error, pan_correction, tilt_correction, FLAG_EXTRAPOLATED if extrapolated else 0)
+
+    def record(self, pan_error, tilt_error, pan_output, tilt_output, flags: int = 0):
+        """
+        Log a decision and the command it sent to the flight recorder, if there is one
+        """
+        if self.flight is None:
+            return
+
+        sample = self.sample
+        if self.writer is not None:
+            flags |= FLAG_ASYNC_WRITE
+        self.flight.record(
+            sample.frame if sample else 0,
+            sample.capture if sample else 0,
+            sample.probe if sample else 0,
+            time.monotonic(),
+            sample.target_id if sample else 0,
+            pan_error, tilt_error,
+            pan_output, tilt_output,
+            clamp_velocity(pan_output), clamp_velocity(tilt_output),
+            trigger=self.trigger_state,
+            flags=flags,
+        )
+
+    def log(self, message: str, force: bool = False):
+        """
+        Print only in verbose mode, and at most once per log_interval unless forced
+        """
+        if not self.verbose:
+            return
+
+        now = time.monotonic()
+        if force or now - self.last_log >= self.log_interval:
+            print(message)
+            self.last_log = now
 
     # Low level communication
     def send(self, data):
@@ -37,11 +194,57 @@ class Control:
     def receive(self):
         return self.serial.read()
 
+    def encode(self, pan_velocity=None, tilt_velocity=None, trigger: bool | None = None) -> list[bytes]:
+        """
+        Payloads for a command, None leaves that axis (or the trigger) unchanged
+        """
+        if self.encoder is not None:
+            return [self.encoder.encode(pan_velocity, tilt_velocity, trigger)]
+
+        data = []
+        if pan_velocity is not None:
+            data.append(('v0' + str(pan_velocity)).encode())
+        if tilt_velocity is not None:
+            data.append(('v1' + str(tilt_velocity)).encode())
+        if trigger is not None:
+            data.append(('t' + str(trigger).lower()).encode())
+        return data
+
+    def command(self, pan_velocity=None, tilt_velocity=None, trigger: bool | None = None):
+        trace, self.pending_trace = self.pending_trace, None
+        if trigger is not None:
+            self.trigger_state = int(trigger)
+
+        if self.writer is not None:
+            self.writer.submit(pan_velocity, tilt_velocity, trigger, trace)
+            return
+
+        for data in self.encode(pan_velocity, tilt_velocity, trigger):
+            self.send(data)
+        self.traced(trace)
+
+    def traced(self, trace):
+        """
+        Stamp the frame that caused a command once that command hit the serial port
+        """
+        if trace is None:
+            return
+
+        sample, received = trace
+        if sample.capture:
+            self.tracer.trace(sample.capture, sample.probe, sample.timestamp, received, time.monotonic())
+
+    def move(self, pan_velocity, tilt_velocity, trigger: bool | None = None):
+        """
+        Set both axes (and optionally the trigger). In binary mode this is a single write.
+        """
+        self.command(pan_velocity, tilt_velocity, trigger)
+
     def panVelocity(self, velocity):
-        self.send('v0' + str(velocity))
+        self.command(pan_velocity=velocity)
 
     def tiltVelocity(self, velocity):
-        self.send('v1' + str(velocity))
+        self.command(tilt_velocity=velocity)
 
     def trigger(self, active):
-        self.send('t' + str(active).lower())
+        self.command(trigger=active)
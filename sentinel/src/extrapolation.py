@@ -0,0 +1,59 @@
+from typing import Tuple
+
+
+class Extrapolator:
+    """
+    Predicts the target error between detections from its recent velocity,
+    so the control loop can tick faster than the camera.
+    """
+    alpha: float
+    max_age: float
+
+    def __init__(self, alpha: float = 0.5, max_age: float = 0.25):
+        """
+        alpha: EMA smoothing factor for the error velocity
+        max_age: seconds after the last detection before the target is considered lost
+        """
+        self.alpha = alpha
+        self.max_age = max_age
+        self.reset()
+
+    def reset(self):
+        self.timestamp = None
+        self.error = (0.0, 0.0)
+        self.velocity = (0.0, 0.0)
+
+    def observe(self, timestamp: float, pan_error: float, tilt_error: float):
+        """
+        Feed a new detection (timestamp in time.monotonic() seconds)
+        """
+        if self.timestamp is not None and timestamp > self.timestamp:
+            dt = timestamp - self.timestamp
+
+            # Drop the velocity estimate across gaps, it would be meaningless
+            if dt > self.max_age:
+                self.velocity = (0.0, 0.0)
+            else:
+                vx = (pan_error - self.error[0]) / dt
+                vy = (tilt_error - self.error[1]) / dt
+                self.velocity = (
+                    self.alpha * vx + (1 - self.alpha) * self.velocity[0],
+                    self.alpha * vy + (1 - self.alpha) * self.velocity[1],
+                )
+
+        self.timestamp = timestamp
+        self.error = (pan_error, tilt_error)
+
+    def predict(self, now: float) -> Tuple[float, float] | None:
+        """
+        Estimated (pan_error, tilt_error) at `now`, or None if the target is lost
+        """
+        if self.timestamp is None:
+            return None
+
+        dt = now - self.timestamp
+        if dt > self.max_age:
+            return None
+
+        dt = max(dt, 0.0)
+        return self.error[0] + self.velocity[0] * dt, self.error[1] + self.velocity[1] * dt
@@ -0,0 +1,108 @@
+"""
+Flight recorder: a fixed-size, memory-mapped ring file holding one fixed
+binary record per control decision, for post-mortems.
+
+    python flight.py flight.ring incident.csv       # oldest to newest
+    python flight.py flight.ring incident.parquet   # needs pandas + pyarrow
+
+Writing a record is a single struct.pack_into into the mapping; nothing is
+formatted or buffered, and the file never grows.
+"""
+import csv
+import mmap
+import os
+import struct
+from argparse import ArgumentParser
+
+MAGIC = b'SNTLFLT1'
+# magic, record size, capacity, records written
+HEADER = struct.Struct('<8sIIQ')
+HEADER_SIZE = 64
+
+RECORD = struct.Struct('<QQdddqddddiibB6x')
+FIELDS = (
+    "seq", "frame", "capture", "probe", "tick", "target_id",
+    "pan_error", "tilt_error", "pan_output", "tilt_output",
+    "pan_command", "tilt_command", "trigger", "flags",
+)
+
+FLAG_EXTRAPOLATED = 1 << 0
+FLAG_ASYNC_WRITE = 1 << 1
+FLAG_STOP = 1 << 2  # target lost, both axes stopped
+
+
+class FlightRecorder:
+    capacity: int
+
+    def __init__(self, path: str, capacity: int = 65536):
+        size = HEADER_SIZE + RECORD.size * capacity
+
+        # Keep the existing ring (and its history) if the layout matches
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        existing = os.fstat(fd).st_size == size
+        if not existing:
+            os.ftruncate(fd, size)
+        self.map = mmap.mmap(fd, size)
+        os.close(fd)
+
+        magic, record_size, old_capacity, written = HEADER.unpack_from(self.map)
+        if not existing or magic != MAGIC or record_size != RECORD.size or old_capacity != capacity:
+            written = 0
+            HEADER.pack_into(self.map, 0, MAGIC, RECORD.size, capacity, written)
+
+        self.capacity = capacity
+        self.written = written
+
+    def record(self, frame, capture, probe, tick, target_id, pan_error, tilt_error, pan_output, tilt_output, pan_command, tilt_command, trigger=-1, flags=0):
+        offset = HEADER_SIZE + (self.written % self.capacity) * RECORD.size
+        RECORD.pack_into(
+            self.map, offset, self.written, frame, capture, probe, tick, target_id,
+            pan_error, tilt_error, pan_output, tilt_output, pan_command, tilt_command, trigger, flags,
+        )
+        self.written += 1
+        HEADER.pack_into(self.map, 0, MAGIC, RECORD.size, self.capacity, self.written)
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+
+
+def read_ring(path: str) -> list[tuple]:
+    """
+    Every record still in the ring, oldest first
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, record_size, capacity, written = HEADER.unpack_from(data)
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a flight recorder ring (or has an incompatible layout)")
+
+    first = max(0, written - capacity)
+    return [
+        RECORD.unpack_from(data, HEADER_SIZE + (seq % capacity) * RECORD.size)
+        for seq in range(first, written)
+    ]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Decode a flight recorder ring into CSV or Parquet")
+    parser.add_argument('ring')
+    parser.add_argument('output', help='.csv or .parquet')
+    args = parser.parse_args()
+
+    records = read_ring(args.ring)
+
+    if args.output.endswith('.parquet'):
+        try:
+            import pandas as pd
+        except ImportError:
+            raise SystemExit("[!] Parquet output needs pandas and pyarrow installed")
+        pd.DataFrame.from_records(records, columns=FIELDS).to_parquet(args.output)
+    else:
+        with open(args.output, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(FIELDS)
+            writer.writerows(records)
+
+    print(f"[i] Wrote {len(records)} records to {args.output}")
@@ -0,0 +1,99 @@
+"""
+Latest-value mailbox shared between the GStreamer callback and the Control process.
+
+A single seqlock-protected slot in shared memory: the writer never blocks and
+never queues, the reader always gets the newest sample and can tell how many
+samples were overwritten before it saw them from the seqlock counter (two
+increments per publish). Frames without a person are never published, so
+they do not count as skipped.
+"""
+import struct
+import time
+from multiprocessing import Event, RawArray
+from typing import NamedTuple
+
+# seqlock counter, then the payload
+COUNTER = struct.Struct('<Q')
+PAYLOAD = struct.Struct('<dQddqdd')
+
+
+class Sample(NamedTuple):
+    timestamp: float  # time.monotonic() when written
+    frame: int
+    pan_error: float
+    tilt_error: float
+    target_id: int
+    capture: float  # when the frame hit the sensor (from the buffer PTS)
+    probe: float  # when process_callback saw the frame
+
+
+class Mailbox:
+    received: int
+    skipped: int
+
+    def __init__(self):
+        self.buffer = RawArray('B', COUNTER.size + PAYLOAD.size)
+        self.view = memoryview(self.buffer).cast('B')
+        self.event = Event()
+        self.last_published = 0
+        self.received = 0
+        self.skipped = 0  # samples published and overwritten before they were read
+
+    def __getstate__(self):
+        # memoryviews cannot be pickled, rebuild it on the other side
+        state = self.__dict__.copy()
+        del state['view']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.view = memoryview(self.buffer).cast('B')
+
+    # Writer side (GStreamer streaming thread)
+    def write(self, frame: int, pan_error: float, tilt_error: float, target_id: int = 0, capture: float = 0, probe: float = 0):
+        view = self.view
+        counter = COUNTER.unpack_from(view)[0]
+
+        # odd counter = write in progress
+        COUNTER.pack_into(view, 0, counter + 1)
+        PAYLOAD.pack_into(view, COUNTER.size, time.monotonic(), frame, pan_error, tilt_error, target_id, capture, probe)
+        COUNTER.pack_into(view, 0, counter + 2)
+
+        self.event.set()
+
+    # Reader side (Control process)
+    def read(self) -> Sample | None:
+        """
+        Return the newest sample, or None if nothing new was written since the last read
+        """
+        view = self.view
+        while True:
+            before = COUNTER.unpack_from(view)[0]
+            if before & 1:
+                # writer is mid-update, sleep until it publishes instead of spinning
+                self.event.clear()
+                if COUNTER.unpack_from(view)[0] & 1:
+                    self.event.wait(0.001)
+                continue
+
+            payload = PAYLOAD.unpack_from(view, COUNTER.size)
+            if COUNTER.unpack_from(view)[0] == before:
+                break
+
+        published = before // 2
+        if published == self.last_published:
+            return None
+
+        self.skipped += published - self.last_published - 1
+        self.last_published = published
+        self.received += 1
+        return Sample(*payload)
+
+    def wait(self, timeout: float | None = None) -> Sample | None:
+        """
+        Block until the writer publishes something new (or the timeout expires)
+        """
+        if not self.event.wait(timeout):
+            return None
+        self.event.clear()
+        return self.read()
@@ -0,0 +1,155 @@
+"""
+Glass-to-motor latency tracing.
+
+Every frame carries its capture time (derived from the GStreamer buffer PTS),
+the time the pad probe saw it and the time it was handed to Control. Control
+stamps it once more when the first command derived from it is written to the
+serial port. The stage durations go into rolling HDR-style histograms, which
+can be dumped with `kill -USR1 <control pid>` or fetched as JSON from a small
+local HTTP endpoint.
+"""
+import json
+import os
+import signal
+import threading
+import time
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STAGES = (
+    "capture->probe",    # camera, ISP, inference, tracker
+    "probe->handoff",    # target selection in process_callback
+    "handoff->control",  # waiting in the mailbox
+    "control->serial",   # PID and serial write
+    "glass->motor",      # end to end
+)
+
+# Log-linear buckets in microseconds: exact below 64us, then 32 sub-buckets per
+# power of two (~3% precision) up to ~16s.
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+NUM_BUCKETS = (25 - SUB_BUCKET_BITS) * SUB_BUCKETS
+
+
+def bucket_index(us: int) -> int:
+    if us < 2 * SUB_BUCKETS:
+        return max(us, 0)
+    shift = us.bit_length() - SUB_BUCKET_BITS - 1
+    return min(shift * SUB_BUCKETS + (us >> shift), NUM_BUCKETS - 1)
+
+
+def bucket_value(index: int) -> int:
+    """
+    Lowest value (in microseconds) that falls into the given bucket
+    """
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    return (index - shift * SUB_BUCKETS) << shift
+
+
+BUCKET_VALUES = np.array([bucket_value(i) for i in range(NUM_BUCKETS)], dtype=np.float64)
+
+
+class LatencyHistogram:
+    """
+    Histogram over the last one to two `window`s of seconds
+    """
+    window: float
+
+    def __init__(self, window: float = 10):
+        self.window = window
+        self.current = np.zeros(NUM_BUCKETS, dtype=np.int64)
+        self.previous = np.zeros(NUM_BUCKETS, dtype=np.int64)
+        self.current_max = 0.0
+        self.previous_max = 0.0
+        self.window_start = time.monotonic()
+
+    def _rotate(self, now: float):
+        if now - self.window_start < self.window:
+            return
+        self.previous, self.current = self.current, self.previous
+        self.current[:] = 0
+        self.previous_max, self.current_max = self.current_max, 0.0
+        self.window_start = now
+
+    def record(self, seconds: float, now: float | None = None):
+        self._rotate(time.monotonic() if now is None else now)
+        self.current[bucket_index(int(seconds * 1e6))] += 1
+        self.current_max = max(self.current_max, seconds)
+
+    def summary(self) -> dict:
+        """
+        Count, p50/p95/p99 and max in milliseconds
+        """
+        counts = self.current + self.previous
+        total = int(counts.sum())
+        if total == 0:
+            return {"count": 0}
+
+        cumulative = np.cumsum(counts)
+        result = {"count": total}
+        for p in (50, 95, 99):
+            index = int(np.searchsorted(cumulative, total * p / 100))
+            result[f"p{p}"] = BUCKET_VALUES[index] / 1e3
+        result["max"] = max(self.current_max, self.previous_max) * 1e3
+        return result
+
+
+class LatencyTracer:
+    histograms: dict[str, LatencyHistogram]
+
+    def __init__(self, window: float = 10):
+        self.histograms = {stage: LatencyHistogram(window) for stage in STAGES}
+
+    def trace(self, capture: float, probe: float, handoff: float, control: float, sent: float):
+        """
+        Record every stage of one frame (all time.monotonic() seconds)
+        """
+        self.histograms["capture->probe"].record(probe - capture, sent)
+        self.histograms["probe->handoff"].record(handoff - probe, sent)
+        self.histograms["handoff->control"].record(control - handoff, sent)
+        self.histograms["control->serial"].record(sent - control, sent)
+        self.histograms["glass->motor"].record(sent - capture, sent)
+
+    def snapshot(self) -> dict:
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def report(self) -> str:
+        lines = [f"{'stage':18} {'count':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)"]
+        for stage, summary in self.snapshot().items():
+            if summary["count"] == 0:
+                lines.append(f"{stage:18} {0:7d}")
+                continue
+            lines.append(
+                f"{stage:18} {summary['count']:7d} {summary['p50']:8.2f} {summary['p95']:8.2f} "
+                f"{summary['p99']:8.2f} {summary['max']:8.2f}"
+            )
+        return "\n".join(lines)
+
+    def install_signal(self, signum: int = signal.SIGUSR1):
+        signal.signal(signum, lambda *_: print(self.report(), flush=True))
+        print(f"[i] Latency stats: kill -{signal.Signals(signum).name[3:]} {os.getpid()}")
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serve the snapshot as JSON on http://host:port/ from a daemon thread
+        """
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(tracer.snapshot()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"[i] Latency stats on http://{host}:{port}/")
+        return server
@@ -1,13 +1,17 @@
 import gi
+import time
 
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst
 from keypoints import KEYPOINTS
 import cv2
 import hailo
-from multiprocessing import Process, Pipe
+from multiprocessing import Process
 from control import Control
-from person import Person
+from handoff import Mailbox
+from batch import DetectionBatch
+from targeting import TargetSelector
+from recording import Recorder
 from cli import options
 
 from hailo_apps_infra.hailo_rpi_common import (
@@ -19,22 +23,51 @@ from pipeline import GStreamerPoseEstimationApp
 
 class TurretContext(app_callback_class):
     comm_thread: Process
-    # pipe: Connection
+    mailbox: Mailbox
+    batch: DetectionBatch
+    selector: TargetSelector
+    recorder: Recorder | None
 
     def __init__(self):
-        parent_conn, child_conn = Pipe(duplex=True)
-        self.comm_thread = Process(target=Control("sim" if options.dry_run else options.board).updateLoop, args=(child_conn,))
+        self.mailbox = Mailbox()
+        self.batch = DetectionBatch()
+        self.selector = TargetSelector(hfov=options.hfov, hysteresis=options.hysteresis)
+        self.recorder = Recorder(options.record) if options.record else None
+        control = Control(
+            "sim" if options.dry_run else options.board,
+            binary=options.binary,
+            rate=options.control_rate,
+            stats_port=options.stats_port,
+            async_write=options.async_write,
+            flight_path=options.flight,
+            verbose=options.verbose,
+        )
+        self.comm_thread = Process(target=control.updateLoop, args=(self.mailbox,))
         self.comm_thread.start()
         print("[!] Communication thread started.")
-        self.conn = parent_conn
         super().__init__()
 
+def capture_timestamp(pad, buffer, probe: float) -> float:
+    """
+    Estimate when the frame was captured, in time.monotonic() seconds.
+    The pipeline clock is the (monotonic) system clock, and a buffer's PTS is its
+    capture time in running time, so its age is now - (base_time + pts).
+    """
+    element = pad.get_parent_element()
+    clock = element.get_clock() if element is not None else None
+    if clock is None or buffer.pts == Gst.CLOCK_TIME_NONE:
+        return probe
+
+    age = clock.get_time() - (element.get_base_time() + buffer.pts)
+    return probe - age / Gst.SECOND
+
 def process_callback(pad, info, user_data: TurretContext):
+    probe = time.monotonic()
     buffer = info.get_buffer()
     if buffer is None:
         return Gst.PadProbeReturn.OK
 
-    string_to_print = ""
+    user_data.increment()
 
     # Get the caps from the pad
     format, width, height = get_caps_from_pad(pad) or (None, None, None)
@@ -44,65 +77,38 @@ def process_callback(pad, info, user_data: TurretContext):
     roi = hailo.get_roi_from_buffer(buffer)
     detections = roi.get_objects_typed(hailo.HAILO_DETECTION)
 
-    # all detections parsed
-    parsed_detections = []
-
-    # Parse the detections
-    for detection in detections:
-        label, bbox, confidence = detection.get_label(), detection.get_bbox(), detection.get_confidence()
-
-        if label != "person":
-            continue
-
-        # tracking id
-        track_id = 0
-        track = detection.get_objects_typed(hailo.HAILO_UNIQUE_ID)
-        if len(track) == 1:
-            track_id = track[0].get_id()
+    capture = capture_timestamp(pad, buffer, probe)
+    if user_data.recorder is not None:
+        pts = None if buffer.pts == Gst.CLOCK_TIME_NONE else buffer.pts
+        user_data.recorder.write(user_data.get_count(), pts, probe, capture, format, width, height, detections)
 
-        string_to_print += (f"Detection: ID: {track_id} Label: {label} Confidence: {confidence:.2f}\n")
-
-        # now retrieve pose estimation landmarks
-        landmarks = detection.get_objects_typed(hailo.HAILO_LANDMARKS)
-        parsed_detections.append(Person(track_id, confidence, bbox, landmarks, (width, height)))
-
-        # if len(landmarks) != 0:
-        #     points = landmarks[0].get_points()
-        #     for eye in ['left_eye', 'right_eye']:
-        #         keypoint_index = KEYPOINTS[eye]
-        #         point = points[keypoint_index]
-        #         # Convert normalized coordinates to absolute pixel coordinates
-        #         # First scale relative to bounding box, then offset by bbox position, then scale to image dimensions
-        #         x = int((point.x() * bbox.width() + bbox.xmin()) * width)
-        #         y = int((point.y() * bbox.height() + bbox.ymin()) * height)
-
-        #         if user_data.use_frame:
-        #             cv2.circle(frame, (x, y), 5, (0, 255, 0), -1)
+    # Parse every person into one struct-of-arrays batch
+    batch = user_data.batch.fill(detections, (width, height))
 
     if user_data.use_frame:
         # Convert the frame to BGR
         frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
         user_data.set_frame(frame)
 
-    if len(parsed_detections) == 0:
+    # Nearest person to the crosshair, sticking to the current lock
+    target = user_data.selector.select(batch)
+    if target is None:
         return Gst.PadProbeReturn.OK
 
-    # find closest target
-    closest_target = parsed_detections[0]
-    closest_distance = -1 #parsed_detections[0].distance(width/2, height/2)
-
-    for detection in parsed_detections[1:]:
-        distance = -1#detection.distance(width/2, height/2)
-        if distance < closest_distance:
-            closest_target = detection
-            closest_distance = distance
-
-    # user_data.conn.send(closest_target)
-    center_x, center_y = closest_target.center()
-    user_data.conn.send((width/2 - center_x, height/2 - center_y))
+    center_x, center_y = batch.aim_points()[target]
+    user_data.mailbox.write(
+        user_data.get_count(), width/2 - center_x, height/2 - center_y, int(batch.ids[target]),
+        capture=capture, probe=probe,
+    )
 
     # print(f"Center: {center_x}, {center_y}")
     return Gst.PadProbeReturn.OK
 
 if __name__ == "__main__":
-    GStreamerPoseEstimationApp(process_callback, TurretContext()).run()
+    context = TurretContext()
+    try:
+        GStreamerPoseEstimationApp(process_callback, context).run()
+    finally:
+        # also on Ctrl+C or sys.exit, so the end of the recording reaches the disk
+        if context.recorder is not None:
+            context.recorder.close()
@@ -11,6 +11,7 @@ import os
 import setproctitle
 from cli import options
 from collections import defaultdict
+from profiles import LATENCY_SINK, latency_queues
 from hailo_apps_infra.hailo_rpi_common import (
     get_default_parser,
     detect_hailo_arch,
@@ -57,7 +58,7 @@ class GStreamerPoseEstimationApp(GStreamerApp):
         # Set the arguments
         args.input = options.video
         args.use_frame = False
-        args.show_fps = True
+        args.show_fps = options.profile != "latency"
         args.arch = None
         args.hef_path = options.hef
         args.disable_sync = True
@@ -72,6 +73,7 @@ class GStreamerPoseEstimationApp(GStreamerApp):
         self.video_width = 1280
         self.video_height = 720
         self.hef_path = options.hef
+        self.profile = options.profile
 
         # Determine the architecture if not specified
         if args.arch is None:
@@ -98,6 +100,8 @@ class GStreamerPoseEstimationApp(GStreamerApp):
         self.create_pipeline()
 
     def get_pipeline_string(self):
+        latency = self.profile == "latency"
+
         source_pipeline = SOURCE_PIPELINE(video_source=self.video_source, video_width=self.video_width, video_height=self.video_height)
         infer_pipeline = INFERENCE_PIPELINE(
             hef_path=self.hef_path,
@@ -108,11 +112,21 @@ class GStreamerPoseEstimationApp(GStreamerApp):
         infer_pipeline_wrapper = INFERENCE_PIPELINE_WRAPPER(infer_pipeline)
         tracker_pipeline = TRACKER_PIPELINE(class_id=0)
         user_callback_pipeline = USER_CALLBACK_PIPELINE()
-        display_pipeline = DISPLAY_PIPELINE(video_sink=self.video_sink, sync=self.sync, show_fps=self.show_fps)
 
         # Replace "framerate=30/1" with requested framerate
         source_pipeline = source_pipeline.replace("framerate=30/1", f"framerate={CAMERA_FRAMERATE}")
 
+        if latency:
+            # Headless: no compositing, and never keep more than one stale frame around
+            display_pipeline = LATENCY_SINK
+            source_pipeline = latency_queues(source_pipeline)
+            tracker_pipeline = latency_queues(tracker_pipeline)
+            user_callback_pipeline = latency_queues(user_callback_pipeline)
+            # The cropper/aggregator branches must stay in lockstep, so bound these but don't drop
+            infer_pipeline_wrapper = latency_queues(infer_pipeline_wrapper, leaky=False)
+        else:
+            display_pipeline = DISPLAY_PIPELINE(video_sink=self.video_sink, sync=self.sync, show_fps=self.show_fps)
+
         pipeline_string = (
             f'{source_pipeline} !'
             f'{infer_pipeline_wrapper} ! '
@@ -121,6 +135,7 @@ class GStreamerPoseEstimationApp(GStreamerApp):
             f'{display_pipeline}'
         )
 
+        print(f"[i] Effective pipeline ({self.profile} profile):")
         print(pipeline_string)
         return pipeline_string
 
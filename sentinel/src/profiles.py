@@ -0,0 +1,73 @@
+"""
+Pipeline profiles.
+
+    display  the stock hailo_apps_infra queues and a display sink with an FPS overlay
+    latency  headless: every queue holds at most one buffer and drops old ones,
+             and the pipeline ends in a fakesink instead of the display branch
+
+Kept free of any Hailo imports so the CPU-only pipeline below (videotestsrc and
+identity standing in for the camera and the Hailo elements) can be built and
+measured on any machine with GStreamer.
+"""
+import re
+
+PROFILES = ("display", "latency")
+
+LATENCY_SINK = "fakesink name=hailo_display sync=false async=false"
+
+
+def _set_property(element: str, name: str, value) -> str:
+    if re.search(rf"\b{name}=\S+", element):
+        return re.sub(rf"\b{name}=\S+", f"{name}={value}", element)
+    return f"{element.rstrip()} {name}={value}"
+
+
+def latency_queues(pipeline: str, leaky: bool = True) -> str:
+    """
+    Rewrite every queue in a pipeline description to hold a single buffer,
+    leaking (dropping the oldest buffer) instead of blocking upstream
+    """
+    elements = pipeline.split("!")
+    for i, element in enumerate(elements):
+        if element.split()[:1] != ["queue"]:
+            continue
+        element = _set_property(element, "max-size-buffers", 1)
+        element = _set_property(element, "max-size-bytes", 0)
+        element = _set_property(element, "max-size-time", 0)
+        element = _set_property(element, "leaky", "downstream" if leaky else "no")
+        elements[i] = f" {element.strip()} "
+    return "!".join(elements).strip()
+
+
+def queue(name: str, profile: str) -> str:
+    if profile == "latency":
+        return f"queue name={name} leaky=downstream max-size-buffers=1 max-size-bytes=0 max-size-time=0"
+    return f"queue name={name} leaky=no max-size-buffers=3 max-size-bytes=0 max-size-time=0"
+
+
+def cpu_pipeline_string(profile: str, width: int = 1280, height: int = 720, framerate: str = "120/1", inference_us: int = 20000, video_sink: str = "fakesink") -> str:
+    """
+    The same shape as GStreamerPoseEstimationApp's pipeline without any Hailo
+    elements: videotestsrc for the camera and identity elements (with an
+    artificial delay for inference) for the rest. The display profile still
+    composites the FPS overlay, into `video_sink`.
+    """
+    if profile == "latency":
+        sink = LATENCY_SINK
+    else:
+        sink = (
+            f"{queue('hailo_display_q', profile)} ! videoconvert ! "
+            f"fpsdisplaysink name=hailo_display video-sink={video_sink} sync=false text-overlay=true"
+        )
+
+    return (
+        f"videotestsrc is-live=true pattern=ball ! "
+        f"video/x-raw,format=RGB,width={width},height={height},framerate={framerate} ! "
+        f"{queue('source_q', profile)} ! "
+        f"identity name=inference sleep-time={inference_us} ! "
+        f"{queue('tracker_q', profile)} ! "
+        f"identity name=hailo_tracker ! "
+        f"{queue('identity_callback_q', profile)} ! "
+        f"identity name=identity_callback ! "
+        f"{sink}"
+    )
@@ -0,0 +1,158 @@
+"""
+Compact binary framing for the Control -> Warden serial link.
+
+Every frame is FRAME_SIZE bytes, little-endian:
+
+    offset  size  field
+    0       1     sync byte (0xA5, never the start of a valid UTF-8 text command)
+    1       1     flags (see FLAG_*)
+    2       2     sequence number (u16, wraps)
+    4       4     pan velocity (i32)
+    8       4     tilt velocity (i32)
+    12      1     CRC-8 (poly 0x07) over bytes 0..12
+
+Pan, tilt and trigger travel in a single write. Axes whose flag is not set are
+left untouched by the board. Mirrors `decode_frame` in warden/src/decoder.rs.
+"""
+import struct
+from typing import NamedTuple
+
+FRAME_SYNC = 0xA5
+FRAME_HEADER = struct.Struct('<BBHii')
+FRAME_SIZE = FRAME_HEADER.size + 1
+
+FLAG_PAN = 1 << 0
+FLAG_TILT = 1 << 1
+FLAG_TRIGGER = 1 << 2
+FLAG_TRIGGER_ACTIVE = 1 << 3
+
+INT32_MIN = -(1 << 31)
+INT32_MAX = (1 << 31) - 1
+
+
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data) -> int:
+    """
+    CRC-8/SMBUS (poly 0x07, init 0x00) of the given bytes
+    """
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def clamp_velocity(velocity) -> int:
+    """
+    Round a (float) PID output to the i32 the firmware expects
+    """
+    return max(INT32_MIN, min(INT32_MAX, int(round(velocity))))
+
+
+class Command(NamedTuple):
+    seq: int
+    pan: int | None
+    tilt: int | None
+    trigger: bool | None
+
+
+class DecodeError(ValueError):
+    pass
+
+
+class Encoder:
+    seq: int
+
+    def __init__(self):
+        self.seq = 0
+
+    def encode(self, pan=None, tilt=None, trigger: bool | None = None) -> bytes:
+        """
+        Build a single frame. Pass None for anything that should not change.
+        """
+        flags = 0
+        if pan is not None:
+            flags |= FLAG_PAN
+            pan = clamp_velocity(pan)
+        if tilt is not None:
+            flags |= FLAG_TILT
+            tilt = clamp_velocity(tilt)
+        if trigger is not None:
+            flags |= FLAG_TRIGGER
+            if trigger:
+                flags |= FLAG_TRIGGER_ACTIVE
+
+        header = FRAME_HEADER.pack(FRAME_SYNC, flags, self.seq, pan or 0, tilt or 0)
+        self.seq = (self.seq + 1) & 0xFFFF
+        return header + bytes((crc8(header),))
+
+
+def decode_frame(frame) -> Command:
+    """
+    Reference decoder for a single, complete frame
+    """
+    if len(frame) != FRAME_SIZE:
+        raise DecodeError(f"Expected {FRAME_SIZE} bytes, got {len(frame)}")
+
+    sync, flags, seq, pan, tilt = FRAME_HEADER.unpack_from(frame)
+    if sync != FRAME_SYNC:
+        raise DecodeError(f"Invalid sync byte {sync:#04x}")
+    if crc8(frame[:-1]) != frame[-1]:
+        raise DecodeError("Invalid checksum")
+
+    return Command(
+        seq,
+        pan if flags & FLAG_PAN else None,
+        tilt if flags & FLAG_TILT else None,
+        bool(flags & FLAG_TRIGGER_ACTIVE) if flags & FLAG_TRIGGER else None,
+    )
+
+
+class FrameDecoder:
+    """
+    Streaming decoder: feed it whatever the serial port returns and it yields
+    every valid frame, resynchronising on the sync byte after corruption.
+    """
+    buffer: bytearray
+    errors: int
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.errors = 0
+
+    def feed(self, data) -> list[Command]:
+        self.buffer += data
+        commands = []
+
+        while True:
+            start = self.buffer.find(FRAME_SYNC)
+            if start == -1:
+                if self.buffer:
+                    self.errors += 1
+                self.buffer.clear()
+                break
+            if start > 0:
+                self.errors += 1
+                del self.buffer[:start]
+            if len(self.buffer) < FRAME_SIZE:
+                break
+
+            try:
+                commands.append(decode_frame(bytes(self.buffer[:FRAME_SIZE])))
+                del self.buffer[:FRAME_SIZE]
+            except DecodeError:
+                # Not a real frame start, skip the sync byte and look again
+                self.errors += 1
+                del self.buffer[:1]
+
+        return commands
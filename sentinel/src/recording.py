@@ -0,0 +1,133 @@
+"""
+Compact binary log of the Hailo detection stream, written with `--record` and
+played back by replay.py.
+
+    file    := MAGIC frame*
+    frame   := FRAME detection*
+    detection := DETECTION label point_count POINT*
+"""
+import struct
+from typing import Iterator, NamedTuple
+
+try:
+    import hailo
+except ImportError:
+    # Only Recorder needs the bindings, logs can be read anywhere
+    hailo = None
+
+MAGIC = b'SNTLREC1'
+# frame seq, pts (-1 = none), probe, capture, width, height, caps format, detection count
+FRAME = struct.Struct('<QqddHH8sH')
+# xmin, ymin, width, height, confidence, track id (-1 = none), label length
+DETECTION = struct.Struct('<fffffqB')
+POINT_COUNT = struct.Struct('<H')
+POINT = struct.Struct('<fff')
+
+
+class DetectionRecord(NamedTuple):
+    label: str
+    bbox: tuple[float, float, float, float]  # normalized xmin, ymin, width, height
+    confidence: float
+    track_id: int | None
+    points: list[tuple[float, float, float]] | None  # bbox-relative x, y, confidence
+
+
+class FrameRecord(NamedTuple):
+    frame: int
+    pts: int | None  # nanoseconds, running time
+    probe: float  # time.monotonic() at the pad probe
+    capture: float
+    format: str | None
+    width: int
+    height: int
+    detections: list[DetectionRecord]
+
+
+class Recorder:
+    def __init__(self, path: str):
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.frames = 0
+
+    def write(self, frame: int, pts: int | None, probe: float, capture: float, format: str | None, width: int, height: int, detections):
+        """
+        Serialize one frame worth of Hailo detections
+        """
+        parts = [b'']
+        for detection in detections:
+            bbox = detection.get_bbox()
+            label = detection.get_label().encode()
+
+            track = detection.get_objects_typed(hailo.HAILO_UNIQUE_ID)
+            track_id = track[0].get_id() if len(track) == 1 else -1
+
+            parts.append(DETECTION.pack(
+                bbox.xmin(), bbox.ymin(), bbox.width(), bbox.height(),
+                detection.get_confidence(), track_id, len(label),
+            ))
+            parts.append(label)
+
+            landmarks = detection.get_objects_typed(hailo.HAILO_LANDMARKS)
+            points = landmarks[0].get_points() if len(landmarks) > 0 else []
+            parts.append(POINT_COUNT.pack(len(points)))
+            parts.extend(POINT.pack(p.x(), p.y(), p.confidence()) for p in points)
+
+        parts[0] = FRAME.pack(
+            frame, -1 if pts is None else pts, probe, capture,
+            width or 0, height or 0, (format or '').encode(), len(detections),
+        )
+        self.file.write(b''.join(parts))
+        self.frames += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        """
+        Flush the tail of the log to disk, safe to call more than once
+        """
+        if not self.file.closed:
+            self.file.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read(file, struct_: struct.Struct):
+    data = file.read(struct_.size)
+    if len(data) < struct_.size:
+        raise EOFError
+    return struct_.unpack(data)
+
+
+def read_log(path: str) -> Iterator[FrameRecord]:
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a sentinel detection log")
+
+        while True:
+            try:
+                frame, pts, probe, capture, width, height, format, count = _read(file, FRAME)
+                detections = []
+                for _ in range(count):
+                    xmin, ymin, w, h, confidence, track_id, label_length = _read(file, DETECTION)
+                    label = file.read(label_length).decode()
+                    (point_count,) = _read(file, POINT_COUNT)
+                    points = [_read(file, POINT) for _ in range(point_count)]
+                    detections.append(DetectionRecord(
+                        label, (xmin, ymin, w, h), confidence,
+                        None if track_id == -1 else track_id,
+                        points or None,
+                    ))
+            except EOFError:
+                # a truncated last frame (e.g. killed mid-write) is dropped
+                return
+
+            yield FrameRecord(
+                frame, None if pts == -1 else pts, probe, capture,
+                format.rstrip(b'\0').decode() or None, width, height, detections,
+            )
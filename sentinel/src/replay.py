@@ -0,0 +1,261 @@
+"""
+Replay a detection log recorded with `--record` through the real
+process_callback, target selection and Control, on any Linux box.
+
+    python replay.py run.rec [--max-speed] [--loops N] -- --dry-run --control-rate 500
+
+Everything after `--` is passed to sentinel's own CLI. The GStreamer, Hailo
+and hailo_apps_infra objects the callback touches are replaced by duck-typed
+stand-ins built from the log.
+"""
+import sys
+import time
+import types
+import numpy as np
+from argparse import ArgumentParser
+import recording
+from recording import FrameRecord, read_log
+
+HAILO_DETECTION = "HAILO_DETECTION"
+HAILO_UNIQUE_ID = "HAILO_UNIQUE_ID"
+HAILO_LANDMARKS = "HAILO_LANDMARKS"
+CLOCK_TIME_NONE = (1 << 64) - 1
+SECOND = 1_000_000_000
+
+
+# Stand-ins for the hailo objects
+class Point:
+    def __init__(self, x, y, confidence):
+        self._x, self._y, self._confidence = x, y, confidence
+
+    def x(self):
+        return self._x
+
+    def y(self):
+        return self._y
+
+    def confidence(self):
+        return self._confidence
+
+
+class BBox:
+    def __init__(self, xmin, ymin, width, height):
+        self._xmin, self._ymin, self._width, self._height = xmin, ymin, width, height
+
+    def xmin(self):
+        return self._xmin
+
+    def ymin(self):
+        return self._ymin
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+    def xmax(self):
+        return self._xmin + self._width
+
+    def ymax(self):
+        return self._ymin + self._height
+
+
+class UniqueID:
+    def __init__(self, id):
+        self._id = id
+
+    def get_id(self):
+        return self._id
+
+
+class Landmarks:
+    def __init__(self, points):
+        self._points = points
+
+    def get_points(self):
+        return self._points
+
+
+class Detection:
+    def __init__(self, record):
+        self._label = record.label
+        self._bbox = BBox(*record.bbox)
+        self._confidence = record.confidence
+        self._objects = {
+            HAILO_UNIQUE_ID: [UniqueID(record.track_id)] if record.track_id is not None else [],
+            HAILO_LANDMARKS: [Landmarks([Point(*p) for p in record.points])] if record.points else [],
+        }
+
+    def get_label(self):
+        return self._label
+
+    def get_bbox(self):
+        return self._bbox
+
+    def get_confidence(self):
+        return self._confidence
+
+    def get_objects_typed(self, type):
+        return self._objects.get(type, [])
+
+
+class ROI:
+    def __init__(self, detections):
+        self._detections = detections
+
+    def get_objects_typed(self, type):
+        return self._detections if type == HAILO_DETECTION else []
+
+
+# Stand-ins for the GStreamer objects
+class Clock:
+    def __init__(self, time):
+        self._time = time
+
+    def get_time(self):
+        return self._time
+
+
+class Element:
+    """
+    Reproduces the recorded capture->probe age: now - (base_time + pts)
+    """
+    def __init__(self, record: FrameRecord):
+        now = time.monotonic_ns()
+        self._clock = Clock(now)
+        self._base_time = now - record.pts - int((record.probe - record.capture) * SECOND)
+
+    def get_clock(self):
+        return self._clock
+
+    def get_base_time(self):
+        return self._base_time
+
+
+class Buffer:
+    def __init__(self, record: FrameRecord):
+        self.pts = record.pts if record.pts is not None else CLOCK_TIME_NONE
+        self.roi = ROI([Detection(d) for d in record.detections])
+
+
+class Pad:
+    def __init__(self, record: FrameRecord):
+        self.caps = (record.format, record.width, record.height)
+        self.element = Element(record) if record.pts is not None else None
+
+    def get_parent_element(self):
+        return self.element
+
+
+class ProbeInfo:
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def get_buffer(self):
+        return self.buffer
+
+
+class CallbackContext:
+    """
+    The subset of hailo_apps_infra's app_callback_class the callback uses
+    """
+    def __init__(self):
+        self.frame_count = 0
+        self.use_frame = False
+        self.running = True
+
+    def increment(self):
+        self.frame_count += 1
+
+    def get_count(self):
+        return self.frame_count
+
+    def set_frame(self, frame):
+        pass
+
+
+def install_stand_ins():
+    """
+    Register stand-in gi/hailo/hailo_apps_infra modules so main.py imports off-device
+    """
+    gst = types.SimpleNamespace(
+        PadProbeReturn=types.SimpleNamespace(OK=0),
+        CLOCK_TIME_NONE=CLOCK_TIME_NONE,
+        SECOND=SECOND,
+    )
+    modules = {
+        "gi": types.SimpleNamespace(require_version=lambda *_: None),
+        "gi.repository": types.SimpleNamespace(Gst=gst),
+        "hailo": types.SimpleNamespace(
+            HAILO_DETECTION=HAILO_DETECTION,
+            HAILO_UNIQUE_ID=HAILO_UNIQUE_ID,
+            HAILO_LANDMARKS=HAILO_LANDMARKS,
+            get_roi_from_buffer=lambda buffer: buffer.roi,
+        ),
+        "hailo_apps_infra": types.SimpleNamespace(),
+        "hailo_apps_infra.hailo_rpi_common": types.SimpleNamespace(
+            get_caps_from_pad=lambda pad: pad.caps,
+            get_numpy_from_buffer=lambda *_: None,
+            app_callback_class=CallbackContext,
+        ),
+        "pipeline": types.SimpleNamespace(GStreamerPoseEstimationApp=None),
+    }
+    sys.modules.update(modules)
+
+    # imported before the stand-ins existed, but `--record` during a replay still needs them
+    recording.hailo = modules["hailo"]
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    sentinel_argv = []
+    if "--" in argv:
+        sentinel_argv = argv[argv.index("--") + 1:]
+        argv = argv[:argv.index("--")]
+
+    parser = ArgumentParser()
+    parser.add_argument('log')
+    parser.add_argument('--max-speed', action='store_true', help='do not wait between frames')
+    parser.add_argument('--loops', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    frames = list(read_log(args.log))
+    if not frames:
+        raise SystemExit(f"{args.log} contains no frames")
+    print(f"[i] Loaded {len(frames)} frames from {args.log}")
+
+    # main parses sentinel's CLI on import
+    install_stand_ins()
+    sys.argv = ["main.py", *sentinel_argv]
+    import main
+
+    context = main.TurretContext()
+    costs = []
+    start = time.monotonic()
+
+    try:
+        for loop in range(args.loops):
+            loop_start = time.monotonic()
+            for record in frames:
+                if not args.max_speed:
+                    delay = loop_start + (record.probe - frames[0].probe) - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                pad, info = Pad(record), ProbeInfo(Buffer(record))
+                before = time.perf_counter()
+                main.process_callback(pad, info, context)
+                costs.append(time.perf_counter() - before)
+    finally:
+        elapsed = time.monotonic() - start
+        costs = np.array(costs) * 1e6
+        print(
+            f"[i] Replayed {len(costs)} frames in {elapsed:.2f}s ({len(costs) / elapsed:.1f} fps), "
+            f"callback p50 {np.percentile(costs, 50):.1f}us p99 {np.percentile(costs, 99):.1f}us max {costs.max():.1f}us, "
+            f"{context.selector.switches} target switches"
+        )
+        # let Control drain the last sample before stopping it
+        time.sleep(0.1)
+        context.comm_thread.terminate()
+        context.comm_thread.join()
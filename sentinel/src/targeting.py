@@ -0,0 +1,94 @@
+import time
+import numpy as np
+from batch import DetectionBatch
+
+
+class TargetSelector:
+    """
+    Picks the person nearest to the crosshair, by angular distance from the
+    boresight, and sticks to it.
+
+    Once locked on a track id, another person only takes over if they are at
+    least `hysteresis` degrees closer to the boresight. A lost target is waited
+    for `lost_timeout` seconds before anyone else can be picked, so the turret
+    doesn't bounce between people frame to frame.
+    """
+    hfov: float
+    vfov: float
+    hysteresis: float
+    lost_timeout: float
+
+    # runtime tracking
+    target_id: int | None = None
+    last_seen: float = 0
+    switches: int = 0
+    cost: float = 0  # seconds spent in the last select() call
+
+    def __init__(self, hfov: float, vfov: float = -1, hysteresis: float = 3, lost_timeout: float = 0.5):
+        """
+        hfov/vfov: field of view in degrees, vfov = -1 derives it from the aspect ratio
+        hysteresis: degrees a challenger must beat the current target by
+        lost_timeout: seconds to wait for a lost target before picking another one
+        """
+        self.hfov = hfov
+        self.vfov = vfov
+        self.hysteresis = hysteresis
+        self.lost_timeout = lost_timeout
+
+    def angles(self, points: np.ndarray, dimensions: tuple[int, int]) -> np.ndarray:
+        """
+        (N, 2) angular offset in degrees of each pixel position from the boresight
+        """
+        width, height = dimensions
+        vfov = self.vfov if self.vfov != -1 else self.hfov * (height / width)
+        return (points - (width / 2, height / 2)) * (self.hfov / width, vfov / height)
+
+    def select(self, batch: DetectionBatch, now: float | None = None) -> int | None:
+        """
+        Index into the batch of the person to aim at, or None
+        """
+        start = time.perf_counter()
+        now = time.monotonic() if now is None else now
+        try:
+            return self._select(batch, now)
+        finally:
+            self.cost = time.perf_counter() - start
+
+    def _select(self, batch: DetectionBatch, now: float) -> int | None:
+        if len(batch) == 0:
+            self._check_lost(now)
+            return None
+
+        offsets = self.angles(batch.aim_points(), batch.dimensions)
+        distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        nearest = int(np.argmin(distances))
+
+        if self.target_id is not None:
+            current = np.flatnonzero(batch.ids == self.target_id)
+
+            if current.size == 0:
+                # Wait for the locked target to come back before switching
+                if not self._check_lost(now):
+                    return None
+            else:
+                current = int(current[0])
+                self.last_seen = now
+                if distances[nearest] + self.hysteresis >= distances[current]:
+                    return current
+
+        # Untracked detections (id 0) cannot be locked on to
+        new_id = int(batch.ids[nearest])
+        if new_id != self.target_id:
+            if self.target_id is not None:
+                self.switches += 1
+            self.target_id = new_id if new_id != 0 else None
+        self.last_seen = now
+        return nearest
+
+    def _check_lost(self, now: float) -> bool:
+        """
+        Release the lock once the target has been gone for too long. Returns True if unlocked.
+        """
+        if self.target_id is not None and now - self.last_seen > self.lost_timeout:
+            self.target_id = None
+        return self.target_id is None
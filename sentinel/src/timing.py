@@ -0,0 +1,38 @@
+class TickStats:
+    """
+    Per-tick timing statistics for a fixed-rate loop: how late each tick
+    started relative to its schedule and how long the work took.
+    """
+    period: float
+
+    def __init__(self, period: float):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.overruns = 0
+        self.late_total = 0.0
+        self.late_max = 0.0
+        self.work_total = 0.0
+        self.work_max = 0.0
+
+    def record(self, late: float, work: float):
+        self.ticks += 1
+        self.late_total += late
+        self.late_max = max(self.late_max, late)
+        self.work_total += work
+        self.work_max = max(self.work_max, work)
+        if late + work > self.period:
+            self.overruns += 1
+
+    def summary(self, elapsed: float) -> str:
+        if self.ticks == 0:
+            return "no ticks"
+
+        return (
+            f"{self.ticks / elapsed:.1f} Hz (target {1 / self.period:.1f}), "
+            f"late avg {self.late_total / self.ticks * 1e6:.0f}us max {self.late_max * 1e6:.0f}us, "
+            f"work avg {self.work_total / self.ticks * 1e6:.0f}us max {self.work_max * 1e6:.0f}us, "
+            f"{self.overruns} overruns"
+        )
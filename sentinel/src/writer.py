@@ -0,0 +1,121 @@
+import threading
+import time
+import serial
+from latency import LatencyHistogram
+
+AXES = ("pan", "tilt", "trigger")
+
+
+class SerialWriter:
+    """
+    Writes commands to the serial port from a dedicated thread so a stalled
+    USB endpoint can never stall the control loop.
+
+    There is a single pending slot per axis: a newer value overwrites one that
+    has not been sent yet, so the board always gets the latest command and
+    nothing piles up behind a slow write.
+    """
+    deadline: float
+
+    def __init__(self, serial, encode, on_write=None, deadline: float = 0.01):
+        """
+        encode: (pan, tilt, trigger) -> list of payloads to write, None = unchanged
+        on_write: called from the writer thread with the trace of each completed write
+        deadline: seconds from the first submit to the end of its write before it counts as late
+        """
+        self.serial = serial
+        self.encode = encode
+        self.on_write = on_write
+        self.deadline = deadline
+
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.pending_since = None
+        self.pending_trace = None
+
+        # statistics
+        self.submitted = 0
+        self.written = 0
+        self.coalesced = 0  # submits merged into an unsent write
+        self.dropped = 0  # axis values overwritten before they were sent
+        self.late = 0  # writes that finished after the deadline
+        self.errors = 0  # writes the port failed
+        self.error = None  # last failure, not yet raised to a submitter
+        self.last_error = None
+        self.latency = LatencyHistogram()
+
+        self.thread = threading.Thread(target=self.run, name="serial-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, pan=None, tilt=None, trigger: bool | None = None, trace=None):
+        """
+        Queue the latest command, never blocks on the serial port.
+        Raises the last write failure since the previous submit, like a
+        synchronous write would have, the command is still queued
+        """
+        with self.condition:
+            self.submitted += 1
+            if self.pending:
+                self.coalesced += 1
+            else:
+                self.pending_since = time.monotonic()
+
+            for axis, value in zip(AXES, (pan, tilt, trigger)):
+                if value is None:
+                    continue
+                if axis in self.pending:
+                    self.dropped += 1
+                self.pending[axis] = value
+
+            if trace is not None:
+                self.pending_trace = trace
+            self.condition.notify()
+
+            error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                pending, self.pending = self.pending, {}
+                since, self.pending_since = self.pending_since, None
+                trace, self.pending_trace = self.pending_trace, None
+
+            try:
+                for data in self.encode(*(pending.get(axis) for axis in AXES)):
+                    if self.serial.is_open:
+                        self.serial.write(data)
+            except (serial.SerialException, OSError) as error:
+                # keep the thread alive for when the port comes back, the
+                # control loop gets the error on its next submit
+                with self.condition:
+                    self.errors += 1
+                    self.error = error
+                if str(error) != str(self.last_error):
+                    print(f"[!] Serial write failed: {error}")
+                self.last_error = error
+                continue
+
+            now = time.monotonic()
+            self.written += 1
+            self.latency.record(now - since, now)
+            if now - since > self.deadline:
+                self.late += 1
+
+            if self.on_write is not None and trace is not None:
+                self.on_write(trace)
+
+    def summary(self) -> str:
+        latency = self.latency.summary()
+        text = (
+            f"{self.written}/{self.submitted} writes, {self.coalesced} coalesced, "
+            f"{self.dropped} dropped, {self.late} late"
+        )
+        if self.errors:
+            text += f", {self.errors} failed ({self.last_error})"
+        if latency["count"]:
+            text += f", latency p99 {latency['p99']:.2f}ms max {latency['max']:.2f}ms"
+        return text
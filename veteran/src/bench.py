@@ -0,0 +1,318 @@
+"""
+End-to-end benchmark of the veteran pipelines on recorded clips, on CPU.
+
+    python bench.py                                   # clips from bench/clips/, compare to bench/baseline.json
+    python bench.py -p yolo-torch,yolo-onnxruntime-int8,rtm --clips a.mp4 b.mp4 -o results.json
+    python bench.py --save-baseline                   # make this run the new baseline
+
+Pipelines:
+  yolo-<backend>[-int8]  ultralytics YOLO + ByteTrack (main.py), any backend from models.BACKENDS
+  rtm                    juxtapose RTMDet + ByteTrack + RTMPose (poseclass.py)
+
+Every pipeline runs in its own process over the same frames (the first
+--frames of each clip) after --warmup frames, and reports:
+  latency_ms               per-stage and total p50/p99, frame decoding excluded
+  throughput_fps           frames over the wall-clock time of the run, decoding included
+  peak_rss_mb              of the benchmark process
+  alloc_blocks_per_frame   memory blocks allocated during a frame and still alive
+                           after it (tracemalloc snapshot count diff)
+  alloc_peak_kb_per_frame  transient heap growth within a frame (tracemalloc peak)
+Allocations are measured on a separate tracemalloc pass so the timings stay
+clean; they cover the Python and numpy heaps, not the torch/onnxruntime arenas.
+
+Results are written as JSON. If a baseline with the same clips exists, every
+metric that got worse by more than --tolerance is flagged and the exit code
+is 1.
+"""
+import cv2
+import sys
+import glob
+import json
+import time
+import hashlib
+import platform
+import resource
+import tracemalloc
+import numpy as np
+import multiprocessing
+from pathlib import Path
+from argparse import ArgumentParser
+
+BENCH_DIR = Path(__file__).parent.parent / "bench"
+
+# metric -> True if higher is better
+METRICS = {
+  "p50": False, "p99": False, "throughput_fps": True, "peak_rss_mb": False,
+  "alloc_blocks_per_frame": False, "alloc_peak_kb_per_frame": False,
+}
+# latency changes smaller than this are noise, whatever the relative change
+MIN_DELTA_MS = 0.5
+
+class YoloPipeline:
+  """
+  model.track() as main.py runs it, split with ultralytics' own stage timings
+  """
+  def __init__(self, weights: str, backend: str, imgsz: int, int8: bool = False):
+    from models import load_model
+    self.model = load_model(weights, backend, imgsz, int8=int8)
+    self.imgsz = imgsz
+
+  def reset(self):
+    # new clip, new tracks
+    for tracker in getattr(self.model.predictor, "trackers", None) or []:
+      tracker.reset()
+
+  def __call__(self, frame) -> dict[str, float]:
+    start = time.perf_counter()
+    results = self.model.track(frame, persist=True, classes=[0], imgsz=self.imgsz, device="cpu",
+                               tracker="bytetrack.yaml", verbose=False)
+    total = (time.perf_counter() - start) * 1e3
+
+    stages = {name: results[0].speed[name] for name in ("preprocess", "inference", "postprocess")}
+    # whatever track() spent outside the predictor is ByteTrack
+    stages["track"] = max(total - sum(stages.values()), 0.0)
+    return stages
+
+class RtmPipeline:
+  """
+  The PoseDetection stages, run in sequence
+  """
+  def __init__(self, clip: str):
+    from poseclass import PoseDetection
+    cap = cv2.VideoCapture(clip)
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+
+    self.detector = PoseDetection(clip, width=width, height=height, device="cpu", show=False)
+    self.detector.cap.release()  # frames come from the benchmark
+    self.stages = [
+      ("detect", self.detector.detect),
+      ("track", self.detector.update_tracker),
+      ("pose", self.detector.estimate_pose),
+      ("annotate", self.detector.annotate),
+    ]
+
+  def reset(self):
+    from juxtapose.trackers import Tracker
+    self.detector.tracker = Tracker("bytetrack").tracker
+
+  def __call__(self, frame) -> dict[str, float]:
+    stages = {}
+    item = frame
+    for name, stage in self.stages:
+      start = time.perf_counter()
+      item = stage(item)
+      stages[name] = (time.perf_counter() - start) * 1e3
+    return stages
+
+def build(name: str, clips: list[str], weights: str, imgsz: int):
+  if name == "rtm":
+    return RtmPipeline(clips[0])
+  parts = name.split("-")
+  if parts[0] != "yolo" or len(parts) not in (2, 3) or (len(parts) == 3 and parts[2] != "int8"):
+    raise ValueError(f"Unknown pipeline '{name}'")
+  return YoloPipeline(weights, parts[1], imgsz, int8=len(parts) == 3)
+
+def clip_frames(path: str, count: int):
+  cap = cv2.VideoCapture(path)
+  for _ in range(count):
+    success, frame = cap.read()
+    if not success:
+      break
+    yield frame
+  cap.release()
+
+def clip_hash(path: str) -> str:
+  digest = hashlib.sha256()
+  with open(path, 'rb') as file:
+    for chunk in iter(lambda: file.read(1 << 20), b''):
+      digest.update(chunk)
+  return digest.hexdigest()[:16]
+
+def percentiles(values: list[float]) -> dict[str, float]:
+  return {"p50": round(float(np.percentile(values, 50)), 3), "p99": round(float(np.percentile(values, 99)), 3)}
+
+def measure(name: str, clips: list[str], frames: int, warmup: int, traced: int, weights: str, imgsz: int, threads: int) -> dict:
+  """
+  Benchmark one pipeline, meant to run in a fresh process so peak RSS is its own
+  """
+  try:
+    import torch
+    torch.set_num_threads(threads)
+  except ImportError:
+    pass
+  cv2.setNumThreads(threads)
+
+  pipeline = build(name, clips, weights, imgsz)
+  for frame in clip_frames(clips[0], warmup):
+    pipeline(frame)
+
+  stages, totals, wall, count = {}, [], 0.0, 0
+  for clip in clips:
+    pipeline.reset()
+    started = time.perf_counter()
+    for frame in clip_frames(clip, frames):
+      start = time.perf_counter()
+      timings = pipeline(frame)
+      elapsed = time.perf_counter() - start
+      count += 1
+      totals.append(elapsed * 1e3)
+      for stage, ms in timings.items():
+        stages.setdefault(stage, []).append(ms)
+    wall += time.perf_counter() - started
+
+  if not count:
+    raise ValueError("No frames could be read from the clips")
+  peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+  # allocation pass, tracemalloc slows everything down
+  pipeline.reset()
+  blocks, peaks = [], []
+  tracemalloc.start()
+  for frame in clip_frames(clips[0], traced):
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    current = tracemalloc.get_traced_memory()[0]
+    pipeline(frame)
+    peaks.append((tracemalloc.get_traced_memory()[1] - current) / 1024)
+    after = tracemalloc.take_snapshot()
+    # leave out the first snapshot itself and other tracemalloc bookkeeping
+    after = after.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    blocks.append(sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno")))
+  tracemalloc.stop()
+
+  return {
+    "frames": count,
+    "throughput_fps": round(count / wall, 2),
+    "latency_ms": {"total": percentiles(totals), **{stage: percentiles(values) for stage, values in stages.items()}},
+    "peak_rss_mb": round(peak_rss_mb, 1),
+    "alloc_blocks_per_frame": round(float(np.median(blocks)), 1) if blocks else None,
+    "alloc_peak_kb_per_frame": round(float(np.median(peaks)), 1) if peaks else None,
+  }
+
+def _worker(connection, *args):
+  try:
+    connection.send(measure(*args))
+  except Exception as error:
+    connection.send({"error": f"{type(error).__name__}: {error}"})
+  connection.close()
+
+def run(name: str, *args) -> dict:
+  # spawn, so no pipeline inherits another's memory or threads
+  context = multiprocessing.get_context("spawn")
+  parent_conn, child_conn = context.Pipe(duplex=False)
+  process = context.Process(target=_worker, args=(child_conn, name, *args))
+  process.start()
+  child_conn.close()
+  try:
+    result = parent_conn.recv()
+  except EOFError:
+    result = None
+  process.join()
+  return result or {"error": f"benchmark process died with exit code {process.exitcode}"}
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+  """
+  Every metric that got worse than the baseline by more than `tolerance`
+  """
+  if baseline["meta"]["clips"] != results["meta"]["clips"] or baseline["meta"]["frames"] != results["meta"]["frames"]:
+    print("[w] Baseline was measured on other clips or frame counts, not comparing")
+    return []
+
+  regressions = []
+
+  def check(label: str, metric: str, old, new):
+    if old is None or new is None or not old:
+      return
+    change = (new - old) / old
+    if METRICS[metric]:
+      change = -change
+    if metric in ("p50", "p99") and new - old < MIN_DELTA_MS:
+      return
+    if change > tolerance:
+      regressions.append(f"{label} {metric}: {old} -> {new} ({change * 100:+.0f}% worse)")
+
+  for name, result in results["pipelines"].items():
+    old = baseline["pipelines"].get(name)
+    if old is None or "error" in old or "error" in result:
+      continue
+    for metric in ("throughput_fps", "peak_rss_mb", "alloc_blocks_per_frame", "alloc_peak_kb_per_frame"):
+      check(name, metric, old.get(metric), result.get(metric))
+    for stage, latency in result["latency_ms"].items():
+      for metric in ("p50", "p99"):
+        check(f"{name} {stage}", metric, old["latency_ms"].get(stage, {}).get(metric), latency[metric])
+  return regressions
+
+def report(name: str, result: dict):
+  if "error" in result:
+    print(f"[w] {name:24} unavailable: {result['error']}")
+    return
+  stages = ", ".join(
+    f"{stage} {latency['p50']:.1f}/{latency['p99']:.1f}"
+    for stage, latency in result["latency_ms"].items() if stage != "total"
+  )
+  total = result["latency_ms"]["total"]
+  print(
+    f"[i] {name:24} {result['throughput_fps']:6.1f} fps, total p50/p99 {total['p50']:.1f}/{total['p99']:.1f}ms "
+    f"({stages}), peak RSS {result['peak_rss_mb']:.0f}MB, "
+    f"{result['alloc_blocks_per_frame']} blocks and {result['alloc_peak_kb_per_frame']}KB peak allocated/frame"
+  )
+
+if __name__ == "__main__":
+  parser = ArgumentParser(description="Benchmark the veteran pipelines on recorded clips")
+  parser.add_argument('-p', '--pipelines', default='yolo-torch,yolo-onnxruntime,rtm')
+  parser.add_argument('-c', '--clips', nargs='+', default=[str(BENCH_DIR / "clips" / "*")], help='clips (globs are expanded)')
+  parser.add_argument('-n', '--frames', type=int, default=300, help='frames per clip')
+  parser.add_argument('-w', '--warmup', type=int, default=10)
+  parser.add_argument('--traced', type=int, default=20, help='frames of the allocation pass')
+  parser.add_argument('-m', '--model', default='yolov8n.pt')
+  parser.add_argument('--imgsz', type=int, default=640)
+  parser.add_argument('-t', '--threads', type=int, default=4, help='torch/OpenCV threads, fixed so runs are comparable')
+  parser.add_argument('-o', '--output', default='bench.json')
+  parser.add_argument('--baseline', default=str(BENCH_DIR / "baseline.json"))
+  parser.add_argument('--save-baseline', action='store_true')
+  parser.add_argument('--tolerance', type=float, default=0.10, help='relative change that counts as a regression')
+  args = parser.parse_args()
+
+  clips = sorted({path for pattern in args.clips for path in glob.glob(pattern)})
+  if not clips:
+    raise SystemExit(f"[!] No clips found in {' '.join(args.clips)}")
+
+  results = {
+    "meta": {
+      "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+      "python": platform.python_version(),
+      "machine": platform.machine(),
+      "processor": platform.processor(),
+      "cpus": multiprocessing.cpu_count(),
+      "threads": args.threads,
+      "model": args.model,
+      "imgsz": args.imgsz,
+      "frames": args.frames,
+      "warmup": args.warmup,
+      "clips": {Path(clip).name: clip_hash(clip) for clip in clips},
+    },
+    "pipelines": {},
+  }
+
+  for name in args.pipelines.split(','):
+    result = run(name, clips, args.frames, args.warmup, args.traced, args.model, args.imgsz, args.threads)
+    results["pipelines"][name] = result
+    report(name, result)
+
+  text = json.dumps(results, indent=2)
+  Path(args.output).write_text(text)
+  print(f"[i] Wrote {args.output}")
+
+  baseline = Path(args.baseline)
+  if args.save_baseline:
+    baseline.parent.mkdir(parents=True, exist_ok=True)
+    baseline.write_text(text)
+    print(f"[i] Saved baseline {baseline}")
+  elif baseline.exists():
+    regressions = compare(results, json.loads(baseline.read_text()), args.tolerance)
+    for regression in regressions:
+      print(f"[!] Regression: {regression}")
+    if regressions:
+      sys.exit(1)
+    print(f"[i] No regressions against {baseline}")
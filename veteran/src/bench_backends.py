@@ -0,0 +1,68 @@
+"""
+Compare CPU inference backends for a YOLO model.
+
+    python bench_backends.py --model yolov8n.pt --frames 100 --video clip.mp4
+
+For each backend: time to export (first run only), time to load from the
+cache (what every later start costs), and per-frame predict latency on the
+same frames.
+"""
+import time
+import cv2
+import numpy as np
+from argparse import ArgumentParser
+from models import BACKENDS, cached_path, export, load_model
+
+def frames(video: str | None, count: int):
+  if video is None:
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8) for _ in range(min(count, 8))]
+
+  cap = cv2.VideoCapture(video)
+  images = []
+  while len(images) < count:
+    success, frame = cap.read()
+    if not success:
+      break
+    images.append(frame)
+  cap.release()
+  return images
+
+def measure(weights: str, backend: str, images, count: int, imgsz: int):
+  try:
+    start = time.perf_counter()
+    cached = backend == "torch" or cached_path(weights, backend, imgsz).exists()
+    export(weights, backend, imgsz)
+    exported = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = load_model(weights, backend, imgsz)
+    model.predict(images[0], imgsz=imgsz, device="cpu", verbose=False)  # includes warm up
+    loaded = time.perf_counter() - start
+  except Exception as error:
+    print(f"{backend:12} unavailable: {error}")
+    return
+
+  latencies = []
+  for i in range(count):
+    start = time.perf_counter()
+    model.predict(images[i % len(images)], imgsz=imgsz, device="cpu", verbose=False)
+    latencies.append((time.perf_counter() - start) * 1e3)
+
+  print(
+    f"{backend:12} export {'cached' if cached else f'{exported:6.1f}s'}, load {loaded:5.2f}s, "
+    f"predict p50 {np.percentile(latencies, 50):6.1f}ms p95 {np.percentile(latencies, 95):6.1f}ms"
+  )
+
+if __name__ == "__main__":
+  parser = ArgumentParser()
+  parser.add_argument('-m', '--model', default='yolov8n.pt')
+  parser.add_argument('-n', '--frames', type=int, default=100)
+  parser.add_argument('-v', '--video', help='take frames from a video instead of random noise')
+  parser.add_argument('--imgsz', type=int, default=640)
+  parser.add_argument('-b', '--backends', default=','.join(BACKENDS))
+  args = parser.parse_args()
+
+  images = frames(args.video, args.frames)
+  for backend in args.backends.split(','):
+    measure(args.model, backend, images, args.frames, args.imgsz)
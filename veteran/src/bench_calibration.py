@@ -0,0 +1,92 @@
+"""
+Check calibration.build_table on synthetic fisheye lenses, wide ones included.
+
+    python bench_calibration.py --hfov 170 --resolution 640x360
+
+No photos needed: K is chosen so the frame spans --hfov, and the table is
+checked against the fisheye model run forwards. For every pixel, the ray
+from the table's (yaw, pitch) is projected back with
+theta_d = theta (1 + k1 theta^2 + ... + k4 theta^8) and must land on that pixel.
+Also checks that
+- the corners of an equidistant lens (D = 0) are more than 90 degrees
+  off-axis, at exactly the angle the model puts them,
+- within 60 degrees of the axis the table matches cv2.fisheye.undistortPoints.
+Exits non-zero if any check fails.
+"""
+import cv2
+import numpy as np
+from argparse import ArgumentParser
+from calibration import build_table
+
+def intrinsics(hfov, width, height, D):
+  """
+  K of a lens whose frame spans hfov degrees horizontally under distortion D
+  """
+  half = np.radians(hfov) / 2
+  k1, k2, k3, k4 = D
+  theta_d = half * (1 + k1 * half**2 + k2 * half**4 + k3 * half**6 + k4 * half**8)
+  f = (width / 2) / theta_d
+  return np.array([[f, 0, (width - 1) / 2], [0, f, (height - 1) / 2], [0, 0, 1]])
+
+def project(K, D, table):
+  """
+  Pixel the fisheye model maps each (yaw, pitch) in degrees onto
+  """
+  yaw, pitch = np.radians(table[..., 0].astype(np.float64)), np.radians(table[..., 1].astype(np.float64))
+  rx, ry, rz = np.cos(pitch) * np.sin(yaw), np.sin(pitch), np.cos(pitch) * np.cos(yaw)
+  theta = np.arctan2(np.hypot(rx, ry), rz)
+  phi = np.arctan2(ry, rx)
+  k1, k2, k3, k4 = D
+  theta_d = theta * (1 + k1 * theta**2 + k2 * theta**4 + k3 * theta**6 + k4 * theta**8)
+  return K[0, 0] * theta_d * np.cos(phi) + K[0, 2], K[1, 1] * theta_d * np.sin(phi) + K[1, 2]
+
+def check(ok, message):
+  print(f"[{'i' if ok else '!'}] {message}")
+  return ok
+
+if __name__ == "__main__":
+  parser = ArgumentParser()
+  parser.add_argument('--hfov', type=float, default=170)
+  parser.add_argument('-r', '--resolution', default='640x360')
+  args = parser.parse_args()
+  width, height = (int(value) for value in args.resolution.split('x'))
+
+  passed = True
+  xs, ys = np.meshgrid(np.arange(width, dtype=np.float64), np.arange(height, dtype=np.float64))
+  for name, D in (("equidistant", (0.0, 0.0, 0.0, 0.0)), ("distorted", (-0.02, 0.004, -0.001, 0.0001))):
+    K = intrinsics(args.hfov, width, height, D)
+    table = build_table(K, np.array(D).reshape(4, 1), width, height)
+    u, v = project(K, D, table)
+    error = np.hypot(u - xs, v - ys)
+    passed &= check(error.max() < 0.05, f"{name}: reprojection error max {error.max():.4f}px over {width}x{height}")
+
+    rx = np.cos(np.radians(table[..., 1])) * np.sin(np.radians(table[..., 0]))
+    ry = np.sin(np.radians(table[..., 1]))
+    rz = np.cos(np.radians(table[..., 1])) * np.cos(np.radians(table[..., 0]))
+    off_axis = np.degrees(np.arctan2(np.hypot(rx, ry), rz))
+    print(f"[i] {name}: corner (0, 0) yaw {table[0, 0, 0]:.1f} pitch {table[0, 0, 1]:.1f}, {off_axis[0, 0]:.1f} degrees off-axis")
+
+    if name == "equidistant":
+      # theta = theta_d = pixel radius / f, at the four corners
+      corners = [(0, 0), (0, width - 1), (height - 1, 0), (height - 1, width - 1)]
+      expected = np.degrees(np.hypot((width - 1) / 2, (height - 1) / 2) / K[0, 0])
+      actual = [off_axis[corner] for corner in corners]
+      passed &= check(
+        expected > 90 and all(abs(angle - expected) < 0.01 for angle in actual),
+        f"{name}: corners {', '.join(f'{angle:.2f}' for angle in actual)} degrees off-axis, model says {expected:.2f}",
+      )
+      signs = [np.sign(table[corner]).tolist() for corner in corners]
+      passed &= check(
+        signs == [[-1, -1], [1, -1], [-1, 1], [1, 1]],
+        f"{name}: corners point left/right and up/down the way they sit in the frame",
+      )
+
+    # where the ray still meets the z = 1 plane OpenCV's inverse is the reference
+    inner = off_axis < 60
+    normalized = cv2.fisheye.undistortPoints(np.stack((xs[inner], ys[inner]), axis=-1).reshape(1, -1, 2), K, np.array(D).reshape(4, 1)).reshape(-1, 2)
+    reference = np.degrees(np.arctan2(normalized[:, 0], 1.0))
+    difference = np.abs(reference - table[..., 0][inner]).max()
+    passed &= check(difference < 0.01, f"{name}: yaw within 60 degrees of the axis matches OpenCV to {difference:.5f} degrees")
+
+  if not passed:
+    raise SystemExit(1)
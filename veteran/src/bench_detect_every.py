@@ -0,0 +1,107 @@
+"""
+How much accuracy detect-every-K gives up, and how much detector time it saves.
+
+    python bench_detect_every.py clip.mp4 --model yolov8n.pt       # detect every frame, cache to clip.mp4.npz
+    python bench_detect_every.py clip.mp4 --control-rate 30         # reuse the cache
+
+Every-frame detection of the first tracked person is the reference. For each
+K the clip is replayed with the detector only on every K-th frame and the
+Kalman filter in between, reporting pixel error against the reference and
+the detector time per second of video.
+"""
+import numpy as np
+from pathlib import Path
+from argparse import ArgumentParser
+from kalman import ConstantVelocityKalman, DetectScheduler
+
+def detect_clip(path: str, model_path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+  """
+  (frame times, target centers (NaN when missing), inference seconds) for every frame
+  """
+  import cv2
+  import time
+  from ultralytics import YOLO
+
+  model = YOLO(model_path)
+  cap = cv2.VideoCapture(path)
+  fps = cap.get(cv2.CAP_PROP_FPS) or 30
+  times, centers, inference = [], [], []
+  target = None
+
+  while True:
+    success, frame = cap.read()
+    if not success:
+      break
+    start = time.perf_counter()
+    results = model.track(frame, persist=True, classes=[0], tracker="bytetrack.yaml", verbose=False)
+    inference.append(time.perf_counter() - start)
+    times.append(len(times) / fps)
+
+    center = (np.nan, np.nan)
+    if results[0].boxes.id is not None:
+      ids = results[0].boxes.id.int().cpu().tolist()
+      boxes = results[0].boxes.xywh.cpu().numpy()
+      if target not in ids:
+        target = ids[0]
+      center = tuple(boxes[ids.index(target)][:2])
+    centers.append(center)
+
+  cap.release()
+  return np.array(times), np.array(centers, dtype=np.float64), np.array(inference)
+
+def simulate(times, centers, inference, every: int | None, control_rate: float):
+  """
+  Replay the reference with detect-every-K, returns (pixel errors, detector seconds, detections)
+  """
+  scheduler = DetectScheduler(every, control_rate)
+  kalman = ConstantVelocityKalman()
+  errors, spent = [], 0.0
+
+  for now, center, seconds in zip(times, centers, inference):
+    found = not np.isnan(center[0])
+    if scheduler.due():
+      scheduler.record(seconds)
+      spent += seconds
+      if found:
+        kalman.update(center[0], center[1], now)
+        estimate = center
+      else:
+        kalman.reset()
+        estimate = None
+    else:
+      estimate = kalman.predict(now)
+
+    if found and estimate is not None:
+      errors.append(np.hypot(estimate[0] - center[0], estimate[1] - center[1]))
+
+  return np.array(errors), spent, scheduler.detections
+
+def report(times, centers, inference, control_rate: float):
+  duration = times[-1] - times[0] if len(times) > 1 else 1
+  print(f"{len(times)} frames, {np.isfinite(centers[:, 0]).mean() * 100:.0f}% with a target, inference {np.mean(inference) * 1e3:.1f}ms")
+  for every in [1, 2, 3, 4, 6, 8, None]:
+    errors, spent, detections = simulate(times, centers, inference, every, control_rate)
+    if not len(errors):
+      errors = np.zeros(1)
+    print(
+      f"K={'auto' if every is None else every:>4} {detections:5d} detections, "
+      f"detector {spent / duration * 1e3:6.1f}ms/s of video, "
+      f"error p50 {np.percentile(errors, 50):6.1f}px p95 {np.percentile(errors, 95):6.1f}px max {errors.max():6.1f}px"
+    )
+
+if __name__ == "__main__":
+  parser = ArgumentParser()
+  parser.add_argument('clip')
+  parser.add_argument('-m', '--model', default='yolov8n.pt')
+  parser.add_argument('--control-rate', type=float, default=30)
+  args = parser.parse_args()
+
+  cache = Path(args.clip + ".npz")
+  if cache.exists():
+    data = np.load(cache)
+    times, centers, inference = data["times"], data["centers"], data["inference"]
+  else:
+    times, centers, inference = detect_clip(args.clip, args.model)
+    np.savez(cache, times=times, centers=centers, inference=inference)
+
+  report(times, centers, inference, args.control_rate)
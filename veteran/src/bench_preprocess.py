@@ -0,0 +1,57 @@
+"""
+Compare the old per-call preprocess_frame with the preallocated Preprocessor.
+
+    python bench_preprocess.py --frames 500
+
+Reports ms per 1080p frame and how much memory each call allocates
+(tracemalloc sees every numpy/OpenCV output array).
+"""
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from argparse import ArgumentParser
+from preprocess import Preprocessor
+
+def preprocess_frame(frame, target_shape=None):
+  """The original pose.py implementation"""
+  if target_shape:
+    frame = cv2.resize(frame, target_shape)
+  frame = frame.astype(np.float32) / 255.0
+  frame = frame.transpose(2, 0, 1)
+  frame = np.expand_dims(frame, axis=0)
+  return frame
+
+def measure(name, run, frame, count):
+  run(frame)  # warm up (first call allocates the buffers)
+
+  start = time.perf_counter()
+  for _ in range(count):
+    run(frame)
+  ms = (time.perf_counter() - start) * 1e3 / count
+
+  # bytes allocated during a call on top of what was live before it
+  tracemalloc.start()
+  peak = 0
+  for _ in range(count):
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    result = run(frame)
+    peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    del result
+  tracemalloc.stop()
+
+  print(f"{name:16} {ms:7.3f} ms/frame, allocates {peak / 1e6:7.3f} MB/frame")
+
+if __name__ == "__main__":
+  parser = ArgumentParser()
+  parser.add_argument('-n', '--frames', type=int, default=200)
+  parser.add_argument('-s', '--size', type=int, default=416, help='model input side')
+  args = parser.parse_args()
+
+  frame = np.random.randint(0, 255, (1080, 1920, 3), dtype=np.uint8)
+  preprocessor = Preprocessor((args.size, args.size))
+  inverse = np.empty((2, 3), dtype=np.float32)
+
+  measure("preprocess_frame", lambda f: preprocess_frame(f, (args.size, args.size)), frame, args.frames)
+  measure("Preprocessor", lambda f: preprocessor(f, inverse), frame, args.frames)
@@ -0,0 +1,55 @@
+"""
+Compare sequential and pipelined StagePipeline runs with stand-in stages.
+
+    python bench_stages.py --frames 200 --ms 8,3,12,2
+
+Each stage sleeps for its share (models release the GIL while they run, just
+like sleep does), so this shows the best case overlap of the four stages of
+PoseDetection.track: frames per second and frame latency from capture to
+result.
+"""
+import time
+import numpy as np
+from argparse import ArgumentParser
+from stages import StagePipeline
+
+def stand_in(ms):
+  def stage(item):
+    time.sleep(ms / 1e3)
+    return item
+  return stage
+
+def measure(pipelined, stage_ms, frames, fps):
+  pipeline = StagePipeline(
+    [(f"stage{i}", stand_in(ms)) for i, ms in enumerate(stage_ms)],
+    pipelined=pipelined,
+  )
+
+  def source():
+    # a camera producing frames at `fps`
+    start = time.perf_counter()
+    for i in range(frames):
+      delay = start + i / fps - time.perf_counter()
+      if delay > 0:
+        time.sleep(delay)
+      yield time.perf_counter()
+
+  start = time.perf_counter()
+  latencies = [(time.perf_counter() - captured) * 1e3 for captured in pipeline.run(source())]
+  elapsed = time.perf_counter() - start
+
+  print(
+    f"{'pipelined' if pipelined else 'sequential':10} {len(latencies) / elapsed:6.1f} fps, "
+    f"latency p50 {np.percentile(latencies, 50):6.1f}ms p99 {np.percentile(latencies, 99):6.1f}ms | {pipeline.summary()}"
+  )
+
+if __name__ == "__main__":
+  parser = ArgumentParser()
+  parser.add_argument('-n', '--frames', type=int, default=200)
+  parser.add_argument('--ms', default='8,3,12,2', help='per-stage time in ms (detect, track, pose, annotate)')
+  parser.add_argument('--fps', type=float, default=60, help='source frame rate')
+  args = parser.parse_args()
+
+  stage_ms = [float(ms) for ms in args.ms.split(',')]
+  measure(False, stage_ms, args.frames, args.fps)
+  measure(True, stage_ms, args.frames, args.fps)
@@ -0,0 +1,74 @@
+"""
+Soak test for the track history: thousands of short-lived ids, as ByteTrack
+produces over a long session, with memory sampled along the way.
+
+    python bench_tracks.py --frames 100000
+
+The old defaultdict of lists grows with every id ever seen; TrackStore
+should stay flat.
+"""
+import time
+import tracemalloc
+import numpy as np
+from argparse import ArgumentParser
+from collections import defaultdict
+from tracks import TrackStore
+
+def churn(frames: int, people: int, lifetime: int):
+  """
+  (frame, time, ids on screen): `people` visible at once, each id lasting about `lifetime` frames
+  """
+  rng = np.random.default_rng(0)
+  active = list(range(people))
+  next_id = people
+  for frame in range(frames):
+    for i in range(people):
+      if rng.random() < 1 / lifetime:
+        active[i] = next_id
+        next_id += 1
+    yield frame, frame / 60, active
+
+def soak(name, frames, people, lifetime, step):
+  tracemalloc.start()
+  if name == "TrackStore":
+    store = TrackStore()
+    def update(track_id, x, y, t):
+      store.append(track_id, x, y, t)
+    def finish(t):
+      store.evict(t)
+  else:
+    store = defaultdict(lambda: [])
+    def update(track_id, x, y, t):
+      track = store[track_id]
+      track.append((x, y, t))
+      if len(track) > 30:
+        track.pop(0)
+    def finish(t):
+      pass
+
+  samples = []
+  start = time.perf_counter()
+  for frame, t, ids in churn(frames, people, lifetime):
+    for track_id in ids:
+      update(track_id, 100.0, 200.0, t)
+    finish(t)
+    if frame % step == 0:
+      samples.append(tracemalloc.get_traced_memory()[0] / 1e6)
+  elapsed = time.perf_counter() - start
+  tracemalloc.stop()
+
+  print(
+    f"{name:12} {elapsed / frames * 1e6:6.1f}us/frame (traced), {len(store):6d} tracks held, "
+    f"memory MB: " + " ".join(f"{sample:6.2f}" for sample in samples)
+  )
+
+if __name__ == "__main__":
+  parser = ArgumentParser()
+  parser.add_argument('-n', '--frames', type=int, default=100000)
+  parser.add_argument('-p', '--people', type=int, default=5)
+  parser.add_argument('-l', '--lifetime', type=int, default=120, help='average frames an id survives')
+  args = parser.parse_args()
+
+  step = args.frames // 8
+  for name in ("defaultdict", "TrackStore"):
+    soak(name, args.frames, args.people, args.lifetime, step)
@@ -0,0 +1,57 @@
+"""
+predict_with_ema against the incremental EmaVelocity in TrackStore.
+
+    python bench_velocity.py --tracks 20
+
+Checks both give the same predictions on random, irregularly timed tracks
+and times a prediction per track per frame.
+"""
+import time
+import numpy as np
+from argparse import ArgumentParser
+from tracks import TrackStore
+from utils import predict_with_ema
+
+if __name__ == "__main__":
+  parser = ArgumentParser()
+  parser.add_argument('-t', '--tracks', type=int, default=20)
+  parser.add_argument('-n', '--frames', type=int, default=2000)
+  parser.add_argument('-a', '--alpha', type=float, default=0.3)
+  args = parser.parse_args()
+
+  rng = np.random.default_rng(0)
+  store = TrackStore(length=30, capacity=args.tracks, alpha=args.alpha)
+  lists = {track_id: [] for track_id in range(args.tracks)}
+  ids = list(range(args.tracks))
+  spent = {"predict_with_ema": 0.0, "TrackStore.predict": 0.0, "TrackStore.predict_all": 0.0}
+  worst = 0.0
+
+  t = 0.0
+  for frame in range(args.frames):
+    t += rng.choice([1 / 60, 2 / 60])  # dropped frames
+    for track_id in ids:
+      x, y = rng.uniform(0, 1920), rng.uniform(0, 1080)
+      store.append(track_id, x, y, t)
+      lists[track_id].append((x, y, t))
+      if len(lists[track_id]) > 30:
+        lists[track_id].pop(0)
+
+    start = time.perf_counter()
+    expected = [predict_with_ema(lists[track_id], 500, args.alpha) for track_id in ids]
+    spent["predict_with_ema"] += time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = [store.predict(track_id, 500) for track_id in ids]
+    spent["TrackStore.predict"] += time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.predict_all(ids, 500)
+    spent["TrackStore.predict_all"] += time.perf_counter() - start
+
+    for a, b in zip(expected, single):
+      if a is not None:
+        worst = max(worst, abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+  print(f"max difference {worst:.3g}px over {args.frames} frames x {args.tracks} tracks")
+  for name, seconds in spent.items():
+    print(f"{name:24} {seconds / args.frames * 1e6:8.1f}us/frame")
@@ -0,0 +1,153 @@
+"""
+Fisheye calibration and the per-pixel angle table used by camera.py.
+
+    python calibration.py --camera c920 --images 'calib/*.jpg' --resolution 1920x1080
+
+Fits intrinsics and fisheye distortion from checkerboard photos, saves them to
+calibration/<camera>.npz, then writes calibration/<camera>_<width>x<height>.npy:
+the (yaw, pitch) in degrees of every pixel, which camera.AngleTable memory-maps.
+Tables for other resolutions can be built from the saved intrinsics with
+--from-intrinsics (the photos must share the capture's aspect ratio).
+"""
+import cv2
+import glob
+import numpy as np
+from pathlib import Path
+from argparse import ArgumentParser
+
+CALIBRATION_DIR = Path(__file__).parent.parent / "calibration"
+
+def _fisheye_flag(name: str) -> int:
+  # OpenCV 4 keeps these in cv2.fisheye, OpenCV 5 shares the cv2.CALIB_* ones
+  return getattr(cv2.fisheye, name, None) or getattr(cv2, name)
+
+def table_path(camera: str, width: int, height: int) -> Path:
+  return CALIBRATION_DIR / f"{camera}_{width}x{height}.npy"
+
+def intrinsics_path(camera: str) -> Path:
+  return CALIBRATION_DIR / f"{camera}.npz"
+
+def find_corners(paths: list[str], pattern: tuple[int, int] = (9, 6)) -> tuple[list, list, tuple[int, int]]:
+  """
+  Checkerboard inner corners of every image where the whole board was found
+  """
+  board = np.zeros((1, pattern[0] * pattern[1], 3), np.float64)
+  board[0, :, :2] = np.mgrid[0:pattern[0], 0:pattern[1]].T.reshape(-1, 2)
+
+  object_points, image_points, size = [], [], None
+  for path in paths:
+    image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+      print(f"[w] Could not read {path}")
+      continue
+    size = image.shape[::-1]
+
+    found, corners = cv2.findChessboardCorners(
+      image, pattern, cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE + cv2.CALIB_CB_FAST_CHECK
+    )
+    if not found:
+      print(f"[w] No checkerboard in {path}")
+      continue
+    corners = cv2.cornerSubPix(
+      image, corners, (3, 3), (-1, -1), (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.1)
+    )
+    object_points.append(board)
+    image_points.append(corners.reshape(1, -1, 2).astype(np.float64))
+
+  return object_points, image_points, size
+
+def fit(object_points: list, image_points: list, size: tuple[int, int]) -> tuple[float, np.ndarray, np.ndarray]:
+  """
+  Fisheye intrinsics: (rms reprojection error, K, D)
+  """
+  if len(image_points) < 3:
+    raise ValueError(f"Need at least 3 checkerboard views, got {len(image_points)}")
+
+  K = np.zeros((3, 3))
+  D = np.zeros((4, 1))
+  rms, K, D, _, _ = cv2.fisheye.calibrate(
+    object_points, image_points, size, K, D,
+    flags=_fisheye_flag("CALIB_RECOMPUTE_EXTRINSIC") | _fisheye_flag("CALIB_CHECK_COND") | _fisheye_flag("CALIB_FIX_SKEW"),
+    criteria=(cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 100, 1e-6),
+  )
+  return rms, K, D
+
+def scale_intrinsics(K: np.ndarray, size: tuple[int, int], width: int, height: int) -> np.ndarray:
+  """
+  K for another resolution of the same sensor area
+  """
+  scaled = K.copy()
+  scaled[0] *= width / size[0]
+  scaled[1] *= height / size[1]
+  return scaled
+
+def undistort_angles(K: np.ndarray, D: np.ndarray, u: np.ndarray, v: np.ndarray, iterations: int = 20) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Off-axis angle theta and azimuth phi in radians of the rays through pixels
+  (u, v), inverting the fisheye model theta_d = theta (1 + k1 theta^2 + ... + k4 theta^8).
+  Unlike cv2.fisheye.undistortPoints this holds past 90 degrees off-axis,
+  where the ray no longer meets the z = 1 plane
+  """
+  k1, k2, k3, k4 = np.asarray(D, dtype=np.float64).ravel()[:4]
+  y = (v - K[1, 2]) / K[1, 1]
+  x = (u - K[0, 2] - K[0, 1] * y) / K[0, 0]
+  theta_d = np.hypot(x, y)
+
+  # Newton from theta = theta_d, the polynomial is monotonic over any usable field of view
+  theta = theta_d.copy()
+  for _ in range(iterations):
+    t2 = theta * theta
+    f = theta * (1 + t2 * (k1 + t2 * (k2 + t2 * (k3 + t2 * k4)))) - theta_d
+    df = 1 + t2 * (3 * k1 + t2 * (5 * k2 + t2 * (7 * k3 + t2 * 9 * k4)))
+    theta = np.clip(theta - f / df, 0.0, np.pi)
+  return theta, np.arctan2(y, x)
+
+def build_table(K: np.ndarray, D: np.ndarray, width: int, height: int) -> np.ndarray:
+  """
+  (height, width, 2) float32 yaw and pitch in degrees of every pixel center,
+  right and down positive like camera.pixel_to_angle
+  """
+  xs, ys = np.meshgrid(np.arange(width, dtype=np.float64), np.arange(height, dtype=np.float64))
+  theta, phi = undistort_angles(K, D, xs, ys)
+
+  # unit ray, z along the optical axis; z goes negative past 90 degrees off-axis
+  rx, ry, rz = np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)
+
+  table = np.empty((height, width, 2), dtype=np.float32)
+  table[..., 0] = np.degrees(np.arctan2(rx, rz))
+  table[..., 1] = np.degrees(np.arctan2(ry, np.hypot(rx, rz)))
+  return table
+
+def save(camera: str, K: np.ndarray, D: np.ndarray, size: tuple[int, int], width: int, height: int) -> Path:
+  CALIBRATION_DIR.mkdir(parents=True, exist_ok=True)
+  np.savez(intrinsics_path(camera), K=K, D=D, size=np.array(size))
+
+  path = table_path(camera, width, height)
+  np.save(path, build_table(scale_intrinsics(K, size, width, height), D, width, height))
+  return path
+
+if __name__ == "__main__":
+  parser = ArgumentParser(description="Calibrate a fisheye camera and build its pixel -> angle table")
+  parser.add_argument('-c', '--camera', required=True, help='name the table is stored under')
+  parser.add_argument('-i', '--images', help="glob of checkerboard photos, e.g. 'calib/*.jpg'")
+  parser.add_argument('-p', '--pattern', default='9x6', help='inner corners of the checkerboard')
+  parser.add_argument('-r', '--resolution', default='1920x1080', help='capture resolution to build the table for')
+  parser.add_argument('--from-intrinsics', action='store_true', help='reuse calibration/<camera>.npz instead of photos')
+  args = parser.parse_args()
+
+  width, height = (int(value) for value in args.resolution.split('x'))
+
+  if args.from_intrinsics:
+    saved = np.load(intrinsics_path(args.camera))
+    K, D, size = saved["K"], saved["D"], tuple(int(value) for value in saved["size"])
+  else:
+    if not args.images:
+      raise SystemExit("[!] --images is required unless --from-intrinsics is given")
+    pattern = tuple(int(value) for value in args.pattern.split('x'))
+    object_points, image_points, size = find_corners(sorted(glob.glob(args.images)), pattern)
+    rms, K, D = fit(object_points, image_points, size)
+    print(f"[i] Calibrated from {len(image_points)} views, RMS reprojection error {rms:.3f}px")
+    print(f"[i] K =\n{K}\n[i] D = {D.ravel()}")
+
+  path = save(args.camera, K, D, size, width, height)
+  print(f"[i] Wrote {path}")
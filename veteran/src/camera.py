@@ -1,6 +1,9 @@
 import os
+import numpy as np
+from calibration import table_path
 HFOV_DEFAULT = int(os.getenv("CAMERA_HFOV", 170))
 VFOV_DEFAULT = int(os.getenv("CAMERA_VFOV", -1))
+CAMERA_NAME = os.getenv("CAMERA_NAME", "default")
 
 def pixel_to_angle(x, y, width=1920, height=1080, hfov=HFOV_DEFAULT, vfov=VFOV_DEFAULT):
   """
@@ -38,3 +41,59 @@ def pixel_to_angle(x, y, width=1920, height=1080, hfov=HFOV_DEFAULT, vfov=VFOV_D
   vertical_angle = delta_y * angle_per_pixel_y
 
   return horizontal_angle, vertical_angle
+
+class AngleTable:
+  """
+  Calibrated pixel -> (yaw, pitch) lookup, see calibration.py.
+
+  The table is memory-mapped, so only the pages around the points looked up
+  are ever read. Points are bilinearly interpolated between pixel centers.
+  """
+  def __init__(self, path):
+    # plain ndarray view of the mapping, numpy.memmap adds overhead to every index
+    self.table = np.asarray(np.load(path, mmap_mode='r'))
+    self.height, self.width = self.table.shape[:2]
+
+  def lookup(self, points) -> np.ndarray:
+    """
+    (N, 2) pixel positions -> (N, 2) horizontal and vertical angles in degrees
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    x = np.minimum(np.maximum(points[:, 0], 0), self.width - 1)
+    y = np.minimum(np.maximum(points[:, 1], 0), self.height - 1)
+    x0 = np.minimum(x.astype(np.intp), self.width - 2)
+    y0 = np.minimum(y.astype(np.intp), self.height - 2)
+    fx = (x - x0)[:, None]
+    fy = (y - y0)[:, None]
+
+    top = self.table[y0, x0] * (1 - fx) + self.table[y0, x0 + 1] * fx
+    bottom = self.table[y0 + 1, x0] * (1 - fx) + self.table[y0 + 1, x0 + 1] * fx
+    return top * (1 - fy) + bottom * fy
+
+  def __call__(self, x, y, *_):
+    """
+    Drop-in for pixel_to_angle(x, y, ...)
+    """
+    x = min(max(float(x), 0.0), self.width - 1.0)
+    y = min(max(float(y), 0.0), self.height - 1.0)
+    x0 = min(int(x), self.width - 2)
+    y0 = min(int(y), self.height - 2)
+    fx, fy = x - x0, y - y0
+
+    (a, b), (c, d) = self.table[y0, x0:x0 + 2].tolist(), self.table[y0 + 1, x0:x0 + 2].tolist()
+    top = [a[i] * (1 - fx) + b[i] * fx for i in (0, 1)]
+    bottom = [c[i] * (1 - fx) + d[i] * fx for i in (0, 1)]
+    return top[0] * (1 - fy) + bottom[0] * fy, top[1] * (1 - fy) + bottom[1] * fy
+
+def angle_lookup(width: int, height: int, camera: str = CAMERA_NAME):
+  """
+  The calibrated table for this camera and resolution if one was built,
+  otherwise the linear pixel_to_angle model
+  """
+  path = table_path(camera, int(width), int(height))
+  if path.exists():
+    print(f"[i] Using calibrated angle table {path}")
+    return AngleTable(path)
+
+  print(f"[w] No calibration for '{camera}' at {int(width)}x{int(height)}, using the linear {HFOV_DEFAULT} degree model")
+  return lambda x, y, *_: pixel_to_angle(x, y, width, height)
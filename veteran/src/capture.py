@@ -0,0 +1,134 @@
+import cv2
+import time
+import threading
+import numpy as np
+from pathlib import Path
+from typing import NamedTuple
+
+class CapturedFrame(NamedTuple):
+  image: np.ndarray
+  timestamp: float  # time.monotonic() when the frame was dequeued
+  seq: int
+
+class FrameGrabber:
+  """
+  Reads a video source on its own thread so the camera's buffer never fills
+  up behind a slow inference loop, and inference never waits on the camera
+  longer than it takes for the next frame.
+
+  Frames are retrieved into a small ring of preallocated images. `next()`
+  always returns the newest one; any frame that was replaced before it was
+  picked up counts as dropped. The image stays valid until the following
+  `next()` call.
+
+  Video files are replayed at their native frame rate (so they behave like a
+  camera) unless `realtime` is False, in which case every frame is handed out.
+  """
+  dropped: int = 0
+  captured: int = 0
+
+  def __init__(self, source, width: int | None = None, height: int | None = None, ring: int = 3, realtime: bool = True):
+    self.cap = cv2.VideoCapture(source)
+    if width and height:
+      self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width) # try to force the requested resolution
+      self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    # files are paced to their own fps, cameras pace themselves
+    is_file = isinstance(source, str) and Path(source).is_file()
+    fps = self.cap.get(cv2.CAP_PROP_FPS) if is_file else 0
+    self.interval = 1 / fps if is_file and realtime and fps > 0 else 0
+    self.realtime = realtime or not is_file
+
+    self.frames = [None] * max(ring, 3)
+    self.stamps = [0.0] * len(self.frames)
+    self.seqs = [0] * len(self.frames)
+    self.latest = None  # slot of the newest frame
+    self.held = None  # slot the consumer is using
+    self.handed = 0  # seq of the last frame handed out
+
+    self.condition = threading.Condition()
+    self.running = self.cap.isOpened()
+    self.thread = threading.Thread(target=self.run, name="frame-grabber", daemon=True)
+    self.thread.start()
+
+  def run(self):
+    start = time.monotonic()
+    seq = 0
+    while self.running:
+      if self.interval:
+        delay = start + seq * self.interval - time.monotonic()
+        if delay > 0:
+          time.sleep(delay)
+
+      if not self.cap.grab():
+        break
+      timestamp = time.monotonic()
+
+      with self.condition:
+        # never write into the newest frame or the one being processed
+        slot = next(i for i in range(len(self.frames)) if i != self.latest and i != self.held)
+        # in file mode without pacing, wait for the consumer instead of dropping
+        while not self.realtime and self.running and self.latest is not None and self.seqs[self.latest] > self.handed:
+          self.condition.wait()
+
+      success, image = self.cap.retrieve(self.frames[slot])
+      if not success:
+        continue
+
+      seq += 1
+      with self.condition:
+        if self.latest is not None and self.seqs[self.latest] > self.handed:
+          self.dropped += 1
+        self.frames[slot] = image
+        self.stamps[slot] = timestamp
+        self.seqs[slot] = seq
+        self.latest = slot
+        self.captured += 1
+        self.condition.notify_all()
+
+    with self.condition:
+      self.running = False
+      self.condition.notify_all()
+
+  def next(self, timeout: float | None = 1.0) -> CapturedFrame | None:
+    """
+    The newest frame not handed out yet, waiting for one if needed.
+    None on timeout or once the source has ended.
+    """
+    with self.condition:
+      if not self.condition.wait_for(lambda: self._fresh() or not self.running, timeout):
+        return None
+      if not self._fresh():
+        return None
+
+      self.held = self.latest
+      self.handed = self.seqs[self.held]
+      self.condition.notify_all()
+      return CapturedFrame(self.frames[self.held], self.stamps[self.held], self.handed)
+
+  def _fresh(self) -> bool:
+    return self.latest is not None and self.seqs[self.latest] > self.handed
+
+  def read(self) -> tuple[bool, np.ndarray | None]:
+    """
+    cv2.VideoCapture.read compatible
+    """
+    frame = self.next()
+    return (False, None) if frame is None else (True, frame.image)
+
+  def isOpened(self) -> bool:
+    with self.condition:
+      return self.running or self._fresh()
+
+  def get(self, prop: int) -> float:
+    return self.cap.get(prop)
+
+  def release(self):
+    with self.condition:
+      self.running = False
+      self.condition.notify_all()
+    self.thread.join(timeout=1)
+    self.cap.release()
+
+  def summary(self) -> str:
+    return f"{self.captured} captured, {self.dropped} dropped"
@@ -1,13 +1,27 @@
 from argparse import ArgumentParser
+from models import BACKENDS
 
 parser = ArgumentParser()
 parser.add_argument('-d', '--dry-run', action='store_true')
-parser.add_argument('-q', '--quantize', action='store_true')
+parser.add_argument('-q', '--quantize', action='store_true', help='torch: dynamic quantization, onnxruntime: the static INT8 model from quantize.py')
 parser.add_argument('-v', '--video', default='/dev/video32')
 parser.add_argument('-V', '--verbose', action='store_true')
 parser.add_argument('-m', '--model', default='yolov8n.pt')
 parser.add_argument('-r', '--resolution', default='1920x1080')
 parser.add_argument('-H', '--hailo', action='store_true')
+parser.add_argument('-b', '--backend', choices=BACKENDS, default='torch', help='inference runtime for --model (main.py), exported and cached on first use')
+parser.add_argument('--imgsz', type=int, default=640, help='model input size the model is exported and run at')
+parser.add_argument('-k', '--detect-every', default='1', help="run the detector every K frames, or 'auto' to adapt K to --control-rate (main.py)")
+parser.add_argument('--control-rate', type=float, default=30, help='frames per second to keep up with --detect-every auto')
+parser.add_argument('--actuator-lag', type=float, default=50, help='ms from a command being sent to the turret reaching it, added to the aim lead (main.py)')
+parser.add_argument('--no-lead', action='store_true', help='aim at the last observed position instead of leading the target')
+parser.add_argument('--headless', action='store_true', help='no window, skip drawing entirely (main.py)')
+parser.add_argument('--record-raw', action='store_true', help='record raw timestamped frames to output.frames instead of output.mp4 (track_then_video.py)')
+parser.add_argument('--record-block', action='store_true', help='wait for the encoder instead of dropping frames when it falls behind')
+parser.add_argument('--pose-onnx', help='RTMPose .onnx model for batched CPU pose estimation (pose.py)')
+parser.add_argument('-c', '--crop-track', action='store_true', help='detect on a crop around the locked target (pose.py)')
+parser.add_argument('--scan-every', type=int, default=15, help='full-frame scan cadence in crop tracking mode')
+parser.add_argument('--crop-padding', type=float, default=0.5, help='crop padding as a fraction of the target box')
 options = parser.parse_args()
 
 # Let user know of certain flags
@@ -17,3 +31,6 @@ if options.dry_run:
 # Break options.resolution into width and height
 options.resolution = options.resolution.split('x')
 options.resolution = (int(options.resolution[0]), int(options.resolution[1]))
+
+# None = adapt K from the measured inference time
+options.detect_every = None if options.detect_every == 'auto' else int(options.detect_every)
@@ -0,0 +1,103 @@
+import numpy as np
+
+class CropScheduler:
+  """
+  Decides whether the detector should look at the full frame or only at a
+  padded crop around the locked target's last bounding box.
+
+  A full-frame scan still happens every `scan_every` frames (to notice new
+  people) and right after the crop loses the target.
+  """
+  padding: float
+  scan_every: int
+  min_size: int
+
+  def __init__(self, width: int, height: int, padding: float = 0.5, scan_every: int = 15, min_size: int = 320):
+    """
+    padding: fraction of the box size added on every side
+    scan_every: force a full-frame scan after this many crop frames
+    min_size: smallest crop side in pixels, so small (far away) targets still get context
+    """
+    self.width = int(width)
+    self.height = int(height)
+    self.padding = padding
+    self.scan_every = scan_every
+    self.min_size = min_size
+
+    self.since_scan = 0
+    self.region = None
+
+    # Detection time per kind of frame, for the savings estimate
+    self.full_ms = None
+    self.crop_ms = None
+    self.crop_frames = 0
+    self.full_frames = 0
+
+  def next_region(self, target_box) -> tuple[int, int, int, int] | None:
+    """
+    Region (x1, y1, x2, y2) to run the detector on this frame, or None for the full frame
+    """
+    if target_box is None or self.since_scan >= self.scan_every:
+      self.since_scan = 0
+      self.region = None
+      return None
+
+    x1, y1, x2, y2 = target_box
+    w = max(x2 - x1, 1)
+    h = max(y2 - y1, 1)
+    pad_x = max(w * self.padding, (self.min_size - w) / 2)
+    pad_y = max(h * self.padding, (self.min_size - h) / 2)
+
+    self.since_scan += 1
+    self.region = (
+      int(max(0, x1 - pad_x)), int(max(0, y1 - pad_y)),
+      int(min(self.width, x2 + pad_x)), int(min(self.height, y2 + pad_y)),
+    )
+    return self.region
+
+  def lost(self):
+    """
+    The crop did not contain the target, scan the full frame next time
+    """
+    self.since_scan = self.scan_every
+
+  def record(self, detection_ms: float):
+    """
+    Record how long the detector took on this frame's region
+    """
+    if self.region is None:
+      self.full_frames += 1
+      self.full_ms = detection_ms if self.full_ms is None else 0.9 * self.full_ms + 0.1 * detection_ms
+    else:
+      self.crop_frames += 1
+      self.crop_ms = detection_ms if self.crop_ms is None else 0.9 * self.crop_ms + 0.1 * detection_ms
+
+  def saved(self) -> float:
+    """
+    Estimated fraction of detector time saved against scanning every frame
+    """
+    total = self.full_frames + self.crop_frames
+    if total == 0 or self.full_ms is None or self.crop_ms is None:
+      return 0.0
+    spent = self.full_frames * self.full_ms + self.crop_frames * self.crop_ms
+    return 1 - spent / (total * self.full_ms)
+
+  def summary(self) -> str:
+    if self.region is None:
+      return f"full scan, saved ~{self.saved() * 100:.0f}%"
+
+    x1, y1, x2, y2 = self.region
+    area = (x2 - x1) * (y2 - y1) / (self.width * self.height)
+    return (
+      f"crop {x2 - x1}x{y2 - y1} ({area * 100:.0f}% of frame), "
+      f"scan in {self.scan_every - self.since_scan}, saved ~{self.saved() * 100:.0f}%"
+    )
+
+def offset_boxes(boxes: np.ndarray, region) -> np.ndarray:
+  """
+  Move xyxy boxes detected inside `region` back into full-frame coordinates
+  """
+  if region is None or len(boxes) == 0:
+    return boxes
+  x1, y1 = region[0], region[1]
+  return boxes + np.array([x1, y1, x1, y1], dtype=boxes.dtype)
@@ -0,0 +1,157 @@
+"""
+Recording sink: frames go through a bounded shared-memory queue to an encoder
+process, so writing video never runs on the tracking loop.
+
+When the queue is full the sink either drops the frame (default, tracking
+latency is unaffected) or waits for the encoder (every frame is kept).
+
+Besides a cv2.VideoWriter the encoder can write raw frames with their capture
+timestamps for lossless replay:
+
+    for timestamp, frame in read_raw("output.frames"):
+      ...
+"""
+import cv2
+import time
+import struct
+import numpy as np
+from multiprocessing import Process, RawArray, RawValue, Semaphore
+
+RAW_MAGIC = b'TRTFRM01'
+# magic, height, width, channels
+RAW_HEADER = struct.Struct('<8sIII')
+# sequence number, capture timestamp
+RAW_FRAME = struct.Struct('<Qd')
+
+class EncoderSink:
+  """
+  Hands frames to an encoder process through `slots` preallocated frames
+  """
+  def __init__(self, path: str, shape: tuple[int, ...], fps: float = 60.0, fourcc: str = 'MP4V', slots: int = 8, block: bool = False, raw: bool = False):
+    """
+    shape: (height, width, channels) of every frame
+    block: wait for a free slot instead of dropping the frame when the encoder is behind
+    raw: write raw timestamped frames instead of encoding
+    """
+    self.shape = tuple(shape)
+    self.slots = slots
+    self.block = block
+    self.frame_size = int(np.prod(shape))
+
+    self.ring = RawArray('B', self.frame_size * slots)
+    self.timestamps = RawArray('d', slots)
+    self.free = Semaphore(slots)
+    self.filled = Semaphore(0)
+    self.encoded = RawValue('Q', 0)
+    self.encoder_fps = RawValue('d', 0.0)
+    self.stop = RawValue('B', 0)
+
+    self.head = 0
+    self.queued = 0
+    self.dropped = 0
+    self.waited = 0.0  # seconds spent blocked on a full queue
+
+    self.process = Process(
+      target=encode_loop,
+      args=(path, self.shape, fps, fourcc, raw, self.ring, self.timestamps, slots, self.free, self.filled, self.encoded, self.encoder_fps, self.stop),
+      daemon=True,
+    )
+    self.process.start()
+
+  def write(self, frame: np.ndarray, timestamp: float | None = None) -> bool:
+    """
+    Queue a frame, returns False if it was dropped
+    """
+    if not self.free.acquire(block=False):
+      if not self.block:
+        self.dropped += 1
+        return False
+      start = time.monotonic()
+      self.free.acquire()
+      self.waited += time.monotonic() - start
+
+    slot = self.head
+    self.head = (slot + 1) % self.slots
+    np.frombuffer(self.ring, dtype=np.uint8, count=self.frame_size, offset=slot * self.frame_size)[:] = frame.reshape(-1)
+    self.timestamps[slot] = time.monotonic() if timestamp is None else timestamp
+    self.queued += 1
+    self.filled.release()
+    return True
+
+  def backlog(self) -> int:
+    return self.queued - self.encoded.value
+
+  def close(self):
+    """
+    Let the encoder finish what is queued, then stop it
+    """
+    self.stop.value = 1
+    self.filled.release()  # wake it up if it is idle
+    self.process.join()
+
+  def summary(self) -> str:
+    text = (
+      f"{self.queued} queued, {self.dropped} dropped, backlog {self.backlog()}, "
+      f"encoder {self.encoder_fps.value:.1f} fps"
+    )
+    if self.block:
+      text += f", waited {self.waited * 1e3:.0f}ms"
+    return text
+
+def encode_loop(path, shape, fps, fourcc, raw, ring, timestamps, slots, free, filled, encoded, encoder_fps, stop):
+  frame_size = int(np.prod(shape))
+  height, width = shape[:2]
+  channels = shape[2] if len(shape) > 2 else 1
+
+  if raw:
+    out = open(path, 'wb')
+    out.write(RAW_HEADER.pack(RAW_MAGIC, height, width, channels))
+  else:
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+
+  tail = 0
+  busy = 0.0  # seconds spent writing, so the fps is what the encoder can sustain
+  while True:
+    filled.acquire()
+    # stop is only honoured once everything queued has been written
+    if stop.value and not _pending(free, slots):
+      break
+
+    start = time.monotonic()
+    frame = np.frombuffer(ring, dtype=np.uint8, count=frame_size, offset=tail * frame_size)
+    if raw:
+      out.write(RAW_FRAME.pack(encoded.value, timestamps[tail]))
+      out.write(frame.data)
+    else:
+      out.write(frame.reshape(shape))
+
+    tail = (tail + 1) % slots
+    free.release()
+    busy += time.monotonic() - start
+    encoded.value += 1
+    encoder_fps.value = encoded.value / max(busy, 1e-9)
+
+  out.close() if raw else out.release()
+
+def _pending(free, slots: int) -> bool:
+  # slots not free are either queued or being written
+  return free.get_value() < slots
+
+def read_raw(path: str):
+  """
+  (timestamp, frame) of every frame in a raw recording
+  """
+  with open(path, 'rb') as file:
+    magic, height, width, channels = RAW_HEADER.unpack(file.read(RAW_HEADER.size))
+    if magic != RAW_MAGIC:
+      raise ValueError(f"{path} is not a raw frame recording")
+    shape = (height, width, channels) if channels > 1 else (height, width)
+    size = height * width * channels
+
+    while True:
+      header = file.read(RAW_FRAME.size)
+      data = file.read(size)
+      if len(header) < RAW_FRAME.size or len(data) < size:
+        return
+      seq, timestamp = RAW_FRAME.unpack(header)
+      yield timestamp, np.frombuffer(data, dtype=np.uint8).reshape(shape)
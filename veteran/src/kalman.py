@@ -0,0 +1,118 @@
+import math
+import numpy as np
+
+class ConstantVelocityKalman:
+  """
+  Kalman filter over (x, y, vx, vy) in pixels, used to carry the locked
+  target between detector runs.
+  """
+  def __init__(self, process_noise: float = 2000.0, measurement_noise: float = 25.0):
+    """
+    process_noise: acceleration variance in (px/s^2)^2 scaled per second
+    measurement_noise: detector position variance in px^2
+    """
+    self.q = process_noise
+    self.r = measurement_noise
+    self.state = None  # (4,) x, y, vx, vy
+    self.covariance = None
+    self.time = None
+
+  def reset(self):
+    self.state = None
+
+  def initialized(self) -> bool:
+    return self.state is not None
+
+  def _propagate(self, now: float) -> tuple[np.ndarray, np.ndarray]:
+    dt = max(now - self.time, 0.0)
+    f = np.eye(4)
+    f[0, 2] = f[1, 3] = dt
+
+    # white noise acceleration
+    q = np.zeros((4, 4))
+    q[0, 0] = q[1, 1] = dt ** 3 / 3
+    q[0, 2] = q[2, 0] = q[1, 3] = q[3, 1] = dt ** 2 / 2
+    q[2, 2] = q[3, 3] = dt
+    return f @ self.state, f @ self.covariance @ f.T + q * self.q
+
+  def predict(self, now: float) -> tuple[float, float] | None:
+    """
+    Where the target should be at `now`, without changing the filter
+    """
+    if self.state is None:
+      return None
+    state, _ = self._propagate(now)
+    return float(state[0]), float(state[1])
+
+  def update(self, x: float, y: float, now: float):
+    """
+    Fold in a detection at `now`
+    """
+    if self.state is None:
+      self.state = np.array([x, y, 0.0, 0.0])
+      # unknown velocity
+      self.covariance = np.diag([self.r, self.r, 1e6, 1e6])
+      self.time = now
+      return
+
+    state, covariance = self._propagate(now)
+    innovation = np.array([x, y]) - state[:2]
+    s = covariance[:2, :2] + np.eye(2) * self.r
+    gain = covariance[:, :2] @ np.linalg.inv(s)
+
+    self.state = state + gain @ innovation
+    self.covariance = (np.eye(4) - gain @ np.eye(2, 4)) @ covariance
+    self.time = now
+
+class DetectScheduler:
+  """
+  Runs the detector every K frames, with K chosen so detection fits the
+  control rate budget: K = ceil(inference time * control rate).
+  A fixed K can be given instead.
+  """
+  every: int
+
+  def __init__(self, every: int | None = None, control_rate: float = 30.0, max_every: int = 8, alpha: float = 0.2):
+    """
+    every: fixed K, or None to adapt from measured inference time
+    control_rate: frames per second the loop should keep up
+    """
+    self.fixed = every
+    self.control_rate = control_rate
+    self.max_every = max_every
+    self.alpha = alpha
+    self.every = every or 1
+    self.inference = None  # EMA of detector seconds
+    self.since = 0
+    self.detections = 0
+    self.frames = 0
+
+  def due(self) -> bool:
+    """
+    Whether the detector should run on this frame
+    """
+    self.frames += 1
+    if self.since + 1 >= self.every or self.inference is None:
+      self.since = 0
+      self.detections += 1
+      return True
+    self.since += 1
+    return False
+
+  def force(self):
+    """
+    Detect on the next frame (e.g. target lost)
+    """
+    self.since = self.every
+
+  def record(self, seconds: float):
+    """
+    Record how long the detector took
+    """
+    self.inference = seconds if self.inference is None else (1 - self.alpha) * self.inference + self.alpha * seconds
+    if self.fixed is None:
+      self.every = min(self.max_every, max(1, math.ceil(self.inference * self.control_rate)))
+
+  def summary(self) -> str:
+    ms = self.inference * 1e3 if self.inference is not None else 0
+    return f"detect every {self.every} ({self.detections}/{self.frames} frames), inference {ms:.1f}ms"
@@ -0,0 +1,78 @@
+import time
+import numpy as np
+from collections import deque
+
+class LeadPredictor:
+  """
+  Works out how far ahead of the last observation the turret has to aim:
+  the time from the frame's capture to the command going out (measured on
+  every frame) plus the actuator's lag.
+
+  Every lead prediction is kept until a later observation of the same track
+  passes its target time, then scored against the position interpolated at
+  that time, along with the error aiming at the stale position would have had.
+  """
+  actuator_lag: float
+
+  def __init__(self, actuator_lag: float = 0.05, window: int = 512):
+    """
+    actuator_lag: seconds from a command being sent to the turret getting there
+    window: number of recent delays / errors kept for the summary
+    """
+    self.actuator_lag = actuator_lag
+    self.delays = deque(maxlen=window)
+    self.errors = deque(maxlen=window)
+    self.stale_errors = deque(maxlen=window)
+    self.pending = {}  # track id -> deque of (target time, predicted x, y, stale x, y)
+    self.last = {}  # track id -> last observation (t, x, y)
+
+  def horizon(self, captured: float, now: float | None = None) -> float:
+    """
+    Seconds to lead a target observed in a frame captured at `captured`
+    (time.monotonic()), measured when the command is about to be sent
+    """
+    delay = (time.monotonic() if now is None else now) - captured
+    self.delays.append(delay)
+    return delay + self.actuator_lag
+
+  def predicted(self, track_id, target_time: float, x: float, y: float, stale_x: float, stale_y: float):
+    """
+    Remember a prediction of where `track_id` will be at `target_time`
+    """
+    self.pending.setdefault(track_id, deque(maxlen=64)).append((target_time, x, y, stale_x, stale_y))
+
+  def observe(self, track_id, x: float, y: float, t: float):
+    """
+    A new observation, scores every pending prediction it has caught up with
+    """
+    previous = self.last.get(track_id)
+    self.last[track_id] = (t, x, y)
+    pending = self.pending.get(track_id)
+    if not pending or previous is None:
+      return
+
+    while pending and pending[0][0] <= t:
+      target_time, px, py, sx, sy = pending.popleft()
+      if target_time < previous[0]:
+        continue  # fell between observations we never saw
+      # where the target actually was at target_time
+      span = t - previous[0]
+      f = (target_time - previous[0]) / span if span > 0 else 1.0
+      ax, ay = previous[1] + f * (x - previous[1]), previous[2] + f * (y - previous[2])
+      self.errors.append(np.hypot(px - ax, py - ay))
+      self.stale_errors.append(np.hypot(sx - ax, sy - ay))
+
+  def forget(self, track_id):
+    self.pending.pop(track_id, None)
+    self.last.pop(track_id, None)
+
+  def summary(self) -> str:
+    text = f"lead {self.actuator_lag * 1e3:.0f}ms lag"
+    if self.delays:
+      text += f" + {np.median(self.delays) * 1e3:.1f}ms delay (p50)"
+    if self.errors:
+      text += (
+        f", aim error p50 {np.median(self.errors):.1f}px p95 {np.percentile(self.errors, 95):.1f}px"
+        f" (uncompensated p50 {np.median(self.stale_errors):.1f}px)"
+      )
+    return text
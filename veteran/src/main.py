@@ -9,31 +9,39 @@ import numpy as np
 import time
 import torch
 from cli import options
-from camera import pixel_to_angle
-from utils import predict_with_ema
+from camera import angle_lookup
+from capture import FrameGrabber
+from kalman import ConstantVelocityKalman, DetectScheduler
+from lead import LeadPredictor
+from models import load_model
+from render import Renderer, Overlay
+from tracks import TrackStore
 from PID_Py.PID import PID
 from pathlib import Path
-from ultralytics import YOLO
-from collections import defaultdict
-from ultralytics.utils.plotting import Annotator
 from torch.quantization import quantize_dynamic
 from multiprocessing import Process, Pipe
 
-track_history = defaultdict(lambda: [])
 pid = PID(kp = 0.006, ki = 0, kd = 0.0002)
 
-# Load the model
-model = YOLO(options.model)
+# Load the model, exported for the requested backend (cached after the first run),
+# with onnxruntime --quantize loads the INT8 model calibrated by quantize.py
+int8 = options.quantize and options.backend == "onnxruntime"
+model = load_model(options.model, options.backend, options.imgsz, int8=int8)
 device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
-print("[i] Using device: ", device)
-model.to(device)
+print(f"[i] Using backend {options.backend} on device: ", device)
+if options.backend == "torch":
+  model.to(device)
 
 # quantize if requested
-if options.quantize:
-  quantized_model = quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
-  model.model = quantized_model
+if options.quantize and not int8:
+  if options.backend != "torch":
+    print("[w] --quantize only applies to the torch and onnxruntime backends, ignoring it")
+  else:
+    # dynamic, only touches Linear layers, see quantize.py for a static INT8 model
+    quantized_model = quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.model = quantized_model
 
-names = model.model.names
+names = model.names
 video_path = options.video
 
 # Load the video file (or webcam)
@@ -42,13 +50,19 @@ if not Path(video_path).exists():
                           f"'{video_path}' "
                           f"does not exist.")
 
-cap = cv2.VideoCapture(video_path)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, options.resolution[0]) # try to force the requested resolution
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, options.resolution[1])
+# Frames are read on a background thread, we always get the newest one
+cap = FrameGrabber(video_path, *options.resolution)
 
-PREDICT_TIME = 500  # in milliseconds
 alpha = 0.3  # Smoothing factor for EMA
 
+# Aim where the target will be once the command lands: capture-to-command
+# delay of each frame plus the actuator lag
+lead = LeadPredictor(actuator_lag=options.actuator_lag / 1000)
+
+# Last 30 positions of every active track, evicted after 2s unseen,
+# with their EMA velocity updated as samples come in
+track_history = TrackStore(length=30, max_age=2.0, alpha=alpha)
+
 # Spherical without the r, so (phi, theta)
 current_phi = 180
 current_theta = 0
@@ -62,62 +76,82 @@ if not options.dry_run:
 # Read the actual width and height
 width  = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
 height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+to_angle = angle_lookup(width, height)
 current_target = None
 target_last_found = time.time()
 shooting_enabled = True
 
+# Drawing and the window live in their own process (started on the first frame)
+renderer = None
+
+# Only detect every K frames, carrying the target with a Kalman filter in between
+scheduler = DetectScheduler(options.detect_every, options.control_rate)
+kalman = ConstantVelocityKalman()
+
+def aim(x, y):
+  """
+  Send the turret towards pixel (x, y), returns the relative angles
+  """
+  rel_phi, rel_theta = to_angle(x, y)
+
+  # Communicate the new angles to the board
+  if not options.dry_run:
+    parent_conn.send(f"move {str(rel_phi/45)} {str(rel_theta/45)}")
+
+    if shooting_enabled:
+      parent_conn.send("shoot" if rel_phi < 2 else "noshoot")
+
+  return rel_phi, rel_theta
+
 while cap.isOpened():
-  success, frame = cap.read()
+  captured = cap.next()
 
-  if not success:
+  if captured is None:
     print('[w] Ignoring empty frame')
     continue
+  frame = captured.image
 
-  # Detect objects and extract bounding boxes
-  results = model.track(frame, persist=True, classes=[0],
-                        tracker="bytetrack.yaml", verbose=options.verbose)
+  detect = scheduler.due()
+  boxes, clss, track_ids = [], [], []
 
-  boxes = results[0].boxes.xywh.cpu()
-  clss = results[0].boxes.cls.cpu().tolist()
+  if detect:
+    # Detect objects and extract bounding boxes
+    start = time.perf_counter()
+    results = model.track(frame, persist=True, classes=[0], imgsz=options.imgsz,
+                          tracker="bytetrack.yaml", verbose=options.verbose)
+    scheduler.record(time.perf_counter() - start)
 
-  if results[0].boxes.id is not None:
-    track_ids = results[0].boxes.id.int().cpu().tolist()
-  else:
-    track_ids = []
+    boxes = results[0].boxes.xywh.cpu()
+    clss = results[0].boxes.cls.cpu().tolist()
+
+    if results[0].boxes.id is not None:
+      track_ids = results[0].boxes.id.int().cpu().tolist()
 
-  # Draw bounding boxes and labels
-  annotator = Annotator(frame, line_width=2,
-                        example=str(names))
+  # Bounding boxes, labels, trails... drawn by the renderer
+  overlay = Overlay()
 
   for box, track_id, cls in zip(boxes, track_ids, clss):
     x, y, w, h = box
     x1, y1, x2, y2 = (x - w / 2, y - h / 2,
                       x + w / 2, y + h / 2)
     label = str(names[cls]) + " : " + str(track_id)
-    annotator.box_label([x1, y1, x2, y2],
-                        label, (218, 100, 255))
+    overlay.box(x1, y1, x2, y2, label)
 
     # Keep track of previous locations for EMA
-    track = track_history[track_id]
-    track.append((float(box[0]), float(box[1]), time.time()))
-    if len(track) > 30:
-      track.pop(0)
+    track = track_history.append(track_id, float(box[0]), float(box[1]), captured.timestamp)
 
-    # Draw the previous locations, extracting only (x,y) points
-    points = np.hstack([(p[0], p[1]) for p in track]).astype(np.int32).reshape((-1, 1, 2))
-    cv2.polylines(frame, [points], isClosed=False,
-                  color=(37, 255, 225), thickness=2)
+    # Draw the previous locations
+    overlay.trail(track_history.points(track_id))
 
     # Circle indicating the center of the person.
-    cv2.circle(frame,
-                (int(track[-1][0]), int(track[-1][1])),
-                5, (235, 219, 11), -1)
+    overlay.circle(track[-1][0], track[-1][1], 5, (235, 219, 11))
 
     # --------------
     # The turret should only track ONE person at a time
     # so it doesn't bounce between people
     if current_target is None:
       current_target = track_id
+      kalman.reset()
       print("[i] Acquired new target with id: " + str(track_id))
 
     # Ignore everyone else
@@ -125,43 +159,67 @@ while cap.isOpened():
       continue
 
     target_last_found = time.time()
+    kalman.update(track[-1][0], track[-1][1], captured.timestamp)
+    lead.observe(track_id, track[-1][0], track[-1][1], captured.timestamp)
 
-    # Find absolute angle of person
-    rel_phi, rel_theta = pixel_to_angle(track[-1][0], track[-1][1], width, height)
+    # Guess where the person will be by the time the turret gets there
+    horizon = lead.horizon(captured.timestamp)
+    predicted = track_history.predict(track_id, horizon * 1000)
+    if predicted is not None:
+      lead.predicted(track_id, captured.timestamp + horizon, *predicted, track[-1][0], track[-1][1])
+
+    # Find absolute angle of person, and aim at it
+    aim_x, aim_y = predicted if predicted is not None and not options.no_lead else track[-1][:2]
+    rel_phi, rel_theta = aim(aim_x, aim_y)
     track_phi = current_phi + rel_phi
     track_theta = current_theta + rel_theta
 
-    # Guess where we are probably going to go
-    predicted = predict_with_ema(track, PREDICT_TIME, alpha)
-
-    # Communicate the new angles to the board
-    if not options.dry_run:
-      parent_conn.send(f"move {str(rel_phi/45)} {str(rel_theta/45)}")
-
-      if shooting_enabled:
-        parent_conn.send("shoot" if rel_phi < 2 else "noshoot")
-
     if options.verbose:
       print("[d] phi = " + str(track_phi))
       print("[d] theta = " + str(track_theta))
 
     # Draw a circle representing the predicted location
     if predicted is not None:
-      cv2.circle(frame,
-                  (int(predicted[0]), int(predicted[1])),
-                  10, (135, 206, 250), -1)
+      overlay.circle(predicted[0], predicted[1], 10, (135, 206, 250))
+
+  # Between detections, follow where the filter says the target is now
+  if not detect and current_target is not None:
+    propagated = kalman.predict(captured.timestamp + (0 if options.no_lead else lead.horizon(captured.timestamp)))
+    if propagated is not None:
+      aim(*propagated)
+      overlay.circle(propagated[0], propagated[1], 5, (235, 219, 11))
+
+  if options.verbose and scheduler.frames % 30 == 0:
+    print(f"[d] {scheduler.summary()}")
+    print(f"[d] {lead.summary()}")
+
+  # Forget people that left
+  track_history.evict(captured.timestamp)
 
   # If we haven't seen the target for a while, reset
   if time.time() - target_last_found > 2:
+    if current_target is not None:
+      lead.forget(current_target)
     current_target = None
+    kalman.reset()
+    scheduler.force()
+
+  if options.headless:
+    continue
 
   # Show the frame, and quit if 'q' is pressed
-  cv2.imshow("Turret", frame)
-  if cv2.waitKey(1) & 0xFF == ord("q"):
+  if renderer is None:
+    renderer = Renderer(frame.shape, "Turret")
+  renderer.submit(frame, overlay)
+  key = renderer.key()
+  if key == ord("q"):
     break
-  if cv2.waitKey(1) & 0xFF == ord("s"):
+  if key == ord("s"):
     parent_conn.send("noshoot")
     shooting_enabled = False
 
 cap.release()
-cv2.destroyAllWindows()
+if renderer is not None:
+  renderer.close()
+print(f"[i] Capture: {cap.summary()}")
+print(f"[i] Aim: {lead.summary()}")
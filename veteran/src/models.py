@@ -0,0 +1,139 @@
+"""
+Model manager: exports the selected YOLO weights once per backend, input size
+and opset, caches the artifact under a hash of the weights and that config,
+and loads whichever runtime was asked for.
+
+    python models.py yolov8n.pt --backend onnxruntime --imgsz 640   # export ahead of time
+
+Statically quantized INT8 models (quantize.py) live in the same cache, next to
+the FP32 export they were calibrated from. An already exported model (e.g. an
+.onnx file) can be given as the weights and is loaded as is.
+
+All backends are loaded through ultralytics' YOLO, so model.track() and the
+results look the same whichever runtime runs underneath.
+"""
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from argparse import ArgumentParser
+
+CACHE_DIR = Path(__file__).parent.parent / "models" / "cache"
+
+# backend -> (ultralytics export format, suffix of the exported artifact)
+BACKENDS = {
+  "torch": (None, ".pt"),
+  "onnxruntime": ("onnx", ".onnx"),
+  "openvino": ("openvino", "_openvino_model"),
+  "torchscript": ("torchscript", ".torchscript"),
+}
+
+def weights_hash(weights: str) -> str:
+  digest = hashlib.sha256()
+  with open(weights, 'rb') as file:
+    for chunk in iter(lambda: file.read(1 << 20), b''):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+def export_config(backend: str, imgsz: int, opset: int | None) -> dict:
+  config = {"format": BACKENDS[backend][0], "imgsz": imgsz}
+  if backend == "onnxruntime":
+    config.update(opset=opset, simplify=True, dynamic=False)
+  return config
+
+def cache_key(weights: str, backend: str, imgsz: int, opset: int | None) -> str:
+  config = json.dumps(export_config(backend, imgsz, opset), sort_keys=True)
+  return hashlib.sha256((weights_hash(weights) + config).encode()).hexdigest()[:16]
+
+def cached_path(weights: str, backend: str, imgsz: int, opset: int | None = 12) -> Path:
+  key = cache_key(weights, backend, imgsz, opset)
+  return CACHE_DIR / f"{Path(weights).stem}-{imgsz}-{key}{BACKENDS[backend][1]}"
+
+def int8_path(weights: str, imgsz: int, opset: int | None = 12) -> Path:
+  """
+  Where quantize.py stores the INT8 model calibrated from this FP32 export
+  """
+  path = cached_path(weights, "onnxruntime", imgsz, opset)
+  return path.with_name(path.stem + "-int8.onnx")
+
+def is_exported(weights: str) -> bool:
+  return any(weights.endswith(suffix) for _, suffix in BACKENDS.values() if suffix != ".pt")
+
+def resolve(weights: str) -> str:
+  """
+  Path of the weights file, downloading official models by name
+  """
+  if Path(weights).exists():
+    return weights
+  from ultralytics import YOLO
+  return YOLO(weights).ckpt_path
+
+def export(weights: str, backend: str, imgsz: int = 640, opset: int | None = 12) -> Path:
+  """
+  Path of the exported model for this backend, exporting it if it is not cached yet
+  """
+  if backend == "torch" or is_exported(weights):
+    return Path(weights)
+
+  weights = resolve(weights)
+  path = cached_path(weights, backend, imgsz, opset)
+  if path.exists():
+    return path
+
+  from ultralytics import YOLO
+
+  config = export_config(backend, imgsz, opset)
+  print(f"[i] Exporting {weights} for {backend} ({config}), this only happens once")
+  source = YOLO(weights)
+  exported = Path(source.export(**config))
+
+  # ultralytics writes next to the weights, move it into the cache
+  CACHE_DIR.mkdir(parents=True, exist_ok=True)
+  shutil.move(str(exported), str(path))
+  with open(path.with_name(path.name + ".json"), 'w') as file:
+    json.dump({"weights": str(weights), "sha256": weights_hash(weights), "task": source.task, **config}, file, indent=2)
+  return path
+
+def model_task(path: Path) -> str | None:
+  """
+  Task (detect, pose...) of an exported model as recorded at export time,
+  None lets ultralytics read it from the model itself
+  """
+  sidecar = path.with_name(path.name + ".json")
+  if not sidecar.exists():
+    return None
+  with open(sidecar) as file:
+    return json.load(file).get("task")
+
+def load_model(weights: str, backend: str = "torch", imgsz: int = 640, opset: int | None = 12, int8: bool = False):
+  """
+  A YOLO model running on the chosen backend,
+  int8: the statically quantized model from quantize.py (onnxruntime only)
+  """
+  if backend not in BACKENDS:
+    raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+  from ultralytics import YOLO
+
+  if int8:
+    if backend != "onnxruntime":
+      raise ValueError("INT8 models are only available for the onnxruntime backend")
+    weights = resolve(weights)
+    path = int8_path(weights, imgsz, opset)
+    if not path.exists():
+      raise FileNotFoundError(f"No INT8 model for {weights} at {imgsz}, run quantize.py {weights} --imgsz {imgsz} --calibrate <clips> first")
+    # same task as the FP32 export it was calibrated from
+    return YOLO(str(path), task=model_task(cached_path(weights, backend, imgsz, opset)))
+
+  path = export(weights, backend, imgsz, opset)
+  return YOLO(str(path), task=model_task(path))
+
+if __name__ == "__main__":
+  parser = ArgumentParser(description="Export and cache a model for a backend")
+  parser.add_argument('weights')
+  parser.add_argument('-b', '--backend', choices=BACKENDS, default='onnxruntime')
+  parser.add_argument('--imgsz', type=int, default=640)
+  parser.add_argument('--opset', type=int, default=12)
+  args = parser.parse_args()
+
+  print(f"[i] {export(args.weights, args.backend, args.imgsz, args.opset)}")
@@ -12,6 +12,10 @@ from juxtapose.trackers import Tracker
 from juxtapose.utils.core import Detections
 from juxtapose.utils.ops import Profile
 from multiprocessing import Process, Pipe
+from crop import CropScheduler, offset_boxes
+from capture import FrameGrabber
+from posebatch import PoseBatcher, OnnxPose
+from preprocess import Preprocessor, invert_boxes
 
 try:
     from hailort import (
@@ -28,17 +32,20 @@ except ImportError:
 CENTER_THRESHOLD = 200 # Pixels for center threshold
 NO_DETECTION_TIMEOUT = 2  # Seconds before switching target
 
-cap = cv2.VideoCapture(options.video)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, options.resolution[0]) # try to force the requested resolution
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, options.resolution[1])
+# Frames are read on a background thread, we always get the newest one
+cap = FrameGrabber(options.video, *options.resolution)
 width  = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
 height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
 center_x, center_y = width // 2, height // 2
 
 # Variables to track the target person and last detection time
 target_id = None
+target_box = None
 last_detection_time = time.time()
 
+# Run detection on a crop around the locked target, with periodic full-frame scans
+cropper = CropScheduler(width, height, padding=options.crop_padding, scan_every=options.scan_every) if options.crop_track else None
+
 parent_conn, child_conn = Pipe(duplex=True)
 client = KlipperWebSocketClient()
 p = Process(target=client.start, args=(child_conn,))
@@ -74,6 +81,16 @@ else:
     rtmpose = RTMPose("s", device="cpu")
     print("[i] CPU models loaded")
 
+# Batched pose estimation: every person in one inference call
+if options.hailo and HAILO_AVAILABLE:
+    pose_backend = rtmpose_streams
+elif options.pose_onnx:
+    pose_backend = OnnxPose(options.pose_onnx)
+    print(f"[i] ONNX pose model loaded from {options.pose_onnx}")
+else:
+    pose_backend = None
+pose_batcher = PoseBatcher() if pose_backend is not None else None
+
 tracker = Tracker("bytetrack").tracker
 annotator = Annotator(thickness=3, font_color=(128, 128, 128))
 
@@ -81,23 +98,16 @@ annotator = Annotator(thickness=3, font_color=(128, 128, 128))
 # (detection, tracking, pose estimation)
 profilers = (Profile(), Profile(), Profile())
 
-def preprocess_frame(frame, target_shape=None):
-    """Preprocess frame for Hailo input"""
-    if target_shape:
-        frame = cv2.resize(frame, target_shape)
-    # Convert to float32 and normalize to [0, 1]
-    frame = frame.astype(np.float32) / 255.0
-    # Transpose from HWC to CHW format
-    frame = frame.transpose(2, 0, 1)
-    # Add batch dimension
-    frame = np.expand_dims(frame, axis=0)
-    return frame
-
-def postprocess_detections(output):
+# Letterboxes frames into a reused Hailo input tensor, (height, width)
+preprocess_frame = Preprocessor((416, 416))
+detection_inverse = np.empty((2, 3), dtype=np.float32)
+
+def postprocess_detections(output, inverse):
     """Convert Hailo detection output to Detections format"""
     # This needs to be implemented based on the actual output format of your converted model
     # The exact implementation depends on how the model was converted and its output format
     boxes = output['boxes'] if isinstance(output, dict) else output[0]
+    boxes = invert_boxes(np.asarray(boxes, dtype=np.float32), inverse)  # model input pixels -> frame pixels
     scores = output['scores'] if isinstance(output, dict) else output[1]
     labels = np.ones(len(boxes))  # Assuming all detections are people
     
@@ -107,20 +117,17 @@ def postprocess_detections(output):
         labels=labels
     )
 
-def postprocess_pose(output, orig_shape):
-    """Convert Hailo pose output to keypoints format"""
+def postprocess_pose(output, inverse):
+    """Convert batched pose output to keypoints in frame coordinates"""
     # This needs to be implemented based on the actual output format of your converted model
     # The exact implementation depends on how the model was converted and its output format
     keypoints = output['keypoints'] if isinstance(output, dict) else output[0]
     scores = output['scores'] if isinstance(output, dict) else output[1]
-    
-    # Scale keypoints back to original image size if needed
-    if orig_shape is not None:
-        h, w = orig_shape[:2]
-        keypoints[:, :, 0] *= w
-        keypoints[:, :, 1] *= h
-    
-    return keypoints, scores
+
+    # Keypoints are normalized to the model input, scale to its pixels
+    # then undo every crop's letterbox in one go
+    keypoints = keypoints * np.array([pose_batcher.width, pose_batcher.height], dtype=np.float32)
+    return pose_batcher.unletterbox(keypoints, inverse), scores
 
 while cap.isOpened():
     ret, frame = cap.read()
@@ -128,17 +135,31 @@ while cap.isOpened():
         print('[w] Ignoring empty frame')
         continue
 
+    # Only look around the locked target, unless a full scan is due
+    region = cropper.next_region(target_box if target_id is not None else None) if cropper else None
+    detect_frame = frame if region is None else frame[region[1]:region[3], region[0]:region[2]]
+
     # Perform detection
     with profilers[0]:
         if options.hailo and HAILO_AVAILABLE:
             # Preprocess frame for Hailo
-            input_data = preprocess_frame(frame, (416, 416))  # Adjust size as needed
+            input_data, inverse = preprocess_frame(detect_frame, detection_inverse)
             # Run inference on Hailo
             outputs = rtmdet_streams.infer(input_data)
             # Convert Hailo output to Detections format
-            detections = postprocess_detections(outputs)
+            detections = postprocess_detections(outputs, inverse)
         else:
-            detections: Detections = rtmdet(frame)
+            detections: Detections = rtmdet(detect_frame)
+
+        if region is not None and detections:
+            detections = Detections(
+                xyxy=offset_boxes(detections.xyxy, region),
+                confidence=detections.confidence,
+                labels=detections.labels,
+            )
+
+    if cropper:
+        cropper.record(profilers[0].dt * 1e3)
 
     # Only do the expensive calculations if we found a person
     if detections:
@@ -152,31 +173,17 @@ while cap.isOpened():
 
         # Perform pose estimation
         with profilers[2]:
-            if options.hailo and HAILO_AVAILABLE:
-                # Crop and preprocess regions for pose estimation
-                person_crops = [frame[int(bbox[1]):int(bbox[3]), int(bbox[0]):int(bbox[2])] 
-                              for bbox in detections.xyxy]
-                kpts = []
-                kpts_scores = []
-                
-                for crop in person_crops:
-                    # Preprocess crop for Hailo
-                    crop_input = preprocess_frame(crop, (256, 192))  # Standard RTMPose input size
-                    # Run inference
-                    pose_outputs = rtmpose_streams.infer(crop_input)
-                    # Convert output to keypoints format
-                    crop_kpts, crop_scores = postprocess_pose(pose_outputs, crop.shape)
-                    kpts.append(crop_kpts)
-                    kpts_scores.append(crop_scores)
-                
-                kpts = np.array(kpts)
-                kpts_scores = np.array(kpts_scores)
+            if pose_backend is not None:
+                # Letterbox every person into one batch and run a single inference
+                batch, inverse = pose_batcher.fill(frame, detections.xyxy)
+                pose_outputs = pose_backend.infer(batch)
+                kpts, kpts_scores = postprocess_pose(pose_outputs, inverse)
             else:
                 kpts, kpts_scores = rtmpose(frame, bboxes=detections.xyxy)
 
         # Turn into an easier to use format
         persons = [
-          {"id": str(id), "kpts": kpt.tolist(), "bboxes": bboxes}
+          {"id": str(i), "kpts": kpt.tolist(), "bboxes": bboxes}
           for i, kpt, bboxes in zip(
             detections.track_id, kpts, detections.xyxy.tolist()
           )
@@ -197,8 +204,10 @@ while cap.isOpened():
 
         # Print the tracking stats
         bbox_ms, track_ms, pose_ms = [profile.dt * 1e3 / 1 for profile in profilers]
-        fps = 1.0 / (bbox_ms + track_ms + pose_ms)
+        fps = 1e3 / (bbox_ms + track_ms + pose_ms)
         print(f"Found {len(persons)} person(s), bbox: {bbox_ms:.2f}ms, track: {track_ms:.2f}ms, pose: {pose_ms:.2f}ms | FPS: {fps:.2f}")
+        if cropper:
+            print(f"[d] {cropper.summary()}")
 
         if persons:
           # Select or update target
@@ -211,6 +220,8 @@ while cap.isOpened():
 
           if target_person is None:
               print("no one")
+              if cropper:
+                  cropper.lost()
               if time.time() - last_detection_time > NO_DETECTION_TIMEOUT:
                   target_id = None  # Reset target if current one is gone
               continue
@@ -225,6 +236,7 @@ while cap.isOpened():
               continue
 
           last_detection_time = time.time()  # Update last detection time
+          target_box = target_person['bboxes']
 
           # Extract head position (e.g., keypoint 0 for head center)
           head_x, head_y = keypoints[0]
@@ -241,6 +253,8 @@ while cap.isOpened():
     else:
         print("Found no targets")
         parent_conn.send("noshoot")
+        if cropper:
+            cropper.lost()
         if time.time() - last_detection_time > NO_DETECTION_TIMEOUT:
             target_id = None  # Reset target if no one is detected for long
 
@@ -255,6 +269,7 @@ while cap.isOpened():
 
 # Clean up
 cap.release()
+print(f"[i] Capture: {cap.summary()}")
 cv2.destroyAllWindows()
 if not options.dry_run:
     p.terminate()
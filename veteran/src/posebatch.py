@@ -0,0 +1,108 @@
+import numpy as np
+from preprocess import Preprocessor
+
+try:
+  import onnxruntime as ort
+  ONNX_AVAILABLE = True
+except ImportError:
+  ONNX_AVAILABLE = False
+
+# RTMPose input, (height, width)
+POSE_INPUT = (256, 192)
+# RTMPose (mmpose) RGB normalization and bbox padding
+POSE_MEAN = (123.675, 116.28, 103.53)
+POSE_STD = (58.395, 57.12, 57.375)
+POSE_PADDING = 1.25
+
+class PoseBatcher:
+  """
+  Letterboxes every person crop into one preallocated (N, 3, H, W) tensor so
+  the pose model runs once per frame instead of once per person.
+
+  Like mmpose, each box is grown by `padding` and widened or heightened to the
+  model's aspect ratio before being warped straight out of the full frame (no
+  intermediate slice or resize), normalized with RTMPose's mean/std. The
+  inverse affine transform is kept so keypoints can be mapped back for the
+  whole batch at once.
+  """
+  capacity: int
+
+  def __init__(self, input_shape: tuple[int, int] = POSE_INPUT, capacity: int = 16, padding: float = POSE_PADDING, mean=POSE_MEAN, std=POSE_STD):
+    self.height, self.width = input_shape
+    self.padding = padding
+    self.preprocessor = Preprocessor(input_shape, mean=mean, std=std)
+    self._allocate(capacity)
+
+  def _allocate(self, capacity: int):
+    self.capacity = capacity
+    self.boxes = np.empty((capacity, 4), dtype=np.float32)
+    self.batch = self.preprocessor.buffer(capacity)
+    self.inverse = np.empty((capacity, 2, 3), dtype=np.float32)
+
+  def fill(self, frame: np.ndarray, boxes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Letterbox the xyxy `boxes` of `frame` into the batch.
+    Returns views of the first N batch entries and their inverse transforms
+    (model input pixels -> frame pixels).
+    """
+    n = len(boxes)
+    if n > self.capacity:
+      # more people than ever before, grow once and keep the new size
+      self._allocate(max(n, self.capacity * 2))
+
+    padded = self.pad_boxes(boxes, self.boxes[:n])
+    for i in range(n):
+      self.preprocessor.write(frame, self.batch[i], self.inverse[i], padded[i])
+
+    return self.batch[:n], self.inverse[:n]
+
+  def pad_boxes(self, boxes: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    Grow xyxy `boxes` by `padding` around their center and fix their aspect
+    ratio to the model input's, like mmpose's bbox_xyxy2cs + _fix_aspect_ratio
+    """
+    boxes = np.asarray(boxes, dtype=np.float32)
+    center = (boxes[:, :2] + boxes[:, 2:]) / 2
+    size = (boxes[:, 2:] - boxes[:, :2]) * self.padding
+    aspect = self.width / self.height
+    w = np.maximum(size[:, 0], size[:, 1] * aspect)
+    h = np.maximum(size[:, 1], size[:, 0] / aspect)
+    out[:, 0] = center[:, 0] - w / 2
+    out[:, 1] = center[:, 1] - h / 2
+    out[:, 2] = center[:, 0] + w / 2
+    out[:, 3] = center[:, 1] + h / 2
+    return out
+
+  def unletterbox(self, keypoints: np.ndarray, inverse: np.ndarray) -> np.ndarray:
+    """
+    Map (N, K, 2) keypoints from model input pixels back to frame pixels
+    """
+    return np.einsum('nij,nkj->nki', inverse[:, :, :2], keypoints) + inverse[:, None, :, 2]
+
+def decode_simcc(simcc_x: np.ndarray, simcc_y: np.ndarray, input_shape: tuple[int, int] = POSE_INPUT):
+  """
+  Decode RTMPose SimCC outputs (N, K, bins) into keypoints normalized to the
+  model input and per keypoint scores
+  """
+  x = np.argmax(simcc_x, axis=2) / simcc_x.shape[2]
+  y = np.argmax(simcc_y, axis=2) / simcc_y.shape[2]
+  scores = np.minimum(simcc_x.max(axis=2), simcc_y.max(axis=2))
+  return np.stack((x, y), axis=2).astype(np.float32), scores
+
+class OnnxPose:
+  """
+  CPU stand-in for the Hailo RTMPose stream with the same batched interface:
+  infer((N, 3, H, W)) -> {'keypoints': (N, K, 2) normalized, 'scores': (N, K)}
+  """
+  def __init__(self, path: str, input_shape: tuple[int, int] = POSE_INPUT):
+    if not ONNX_AVAILABLE:
+      raise ImportError("onnxruntime is required for the ONNX pose backend")
+
+    self.session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+    self.input_name = self.session.get_inputs()[0].name
+    self.input_shape = input_shape
+
+  def infer(self, batch: np.ndarray) -> dict:
+    simcc_x, simcc_y = self.session.run(None, {self.input_name: batch})[:2]
+    keypoints, scores = decode_simcc(simcc_x, simcc_y, self.input_shape)
+    return {'keypoints': keypoints, 'scores': scores}
@@ -6,6 +6,8 @@ from juxtapose import Annotator, RTMDet, RTMPose
 from juxtapose.trackers import Tracker
 from juxtapose.utils.core import Detections
 from juxtapose.utils.ops import Profile
+from capture import FrameGrabber
+from stages import StagePipeline
 
 class PoseDetectionOptions(TypedDict):
   width: int
@@ -14,15 +16,17 @@ class PoseDetectionOptions(TypedDict):
   center_threshold: int
   no_detection_timeout: int
   show: bool
+  pipelined: bool
 
 class PoseDetection:
   # configuration
   center_threshold: int = 60
   no_detection_timeout: int = 2
   show: bool = True
+  pipelined: bool = False
 
   # video
-  cap: cv2.VideoCapture
+  cap: FrameGrabber
   width: int = 0
   height: int = 0
 
@@ -35,18 +39,19 @@ class PoseDetection:
     """
     Initialize the PoseDetection class
     """
-    self.cap = cv2.VideoCapture(source)
-    self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, kwargs.width)
-    self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, kwargs.height)
-    self.width = kwargs.width
-    self.height = kwargs.height
-    self.center_threshold = kwargs.center_threshold if 'center_threshold' in kwargs else 60
-    self.no_detection_timeout = kwargs.no_detection_timeout if 'no_detection_timeout' in kwargs else 2
-    self.show = kwargs.show if 'show' in kwargs else True
+    # newest-frame capture on a background thread
+    self.cap = FrameGrabber(source, kwargs['width'], kwargs['height'])
+    self.width = kwargs['width']
+    self.height = kwargs['height']
+    self.center_threshold = kwargs.get('center_threshold', 60)
+    self.no_detection_timeout = kwargs.get('no_detection_timeout', 2)
+    self.show = kwargs.get('show', True)
+    # run detection, tracking, pose and annotation on their own threads
+    self.pipelined = kwargs.get('pipelined', False)
 
     # Load the models
-    self.rtmdet = RTMDet("s", device=kwargs.device)
-    self.rtmpose = RTMPose("s", device=kwargs.device)
+    self.rtmdet = RTMDet("s", device=kwargs['device'])
+    self.rtmpose = RTMPose("s", device=kwargs['device'])
     self.tracker = Tracker("bytetrack").tracker
     self.annotator = Annotator(thickness=3, font_color=(128, 128, 128))
 
@@ -74,92 +79,135 @@ class PoseDetection:
     self.annotator.draw_kpts(frame, kpts)
     self.annotator.draw_skeletons(frame, kpts)
 
-  def track(self) -> Generator[tuple[int, int] | None]:
+  def detect(self, frame):
     """
-    Generator returning the current target
-    Returns the (x, y) coordinate of the current target
+    Stage 1: person detection
+    """
+    with self.profilers[0]:
+      detections: Detections = self.rtmdet(frame)
+    return frame, detections
+
+  def update_tracker(self, item):
+    """
+    Stage 2: ByteTrack, only ever called in frame order
+    """
+    frame, detections = item
+    if detections:
+      with self.profilers[1]:
+        detections: Detections = self.tracker.update(
+          bboxes=detections.xyxy,
+          confidence=detections.confidence,
+          labels=detections.labels,
+        )
+    return frame, detections
+
+  def estimate_pose(self, item):
+    """
+    Stage 3: pose estimation for everyone that was tracked
+    """
+    frame, detections = item
+    kpts = None
+    if detections:
+      with self.profilers[2]:
+        kpts, kpts_scores = self.rtmpose(frame, bboxes=detections.xyxy)
+    return frame, detections, kpts
+
+  def annotate(self, item):
+    """
+    Stage 4: turn the results into persons and draw them
+    """
+    frame, detections, kpts = item
+    if not detections:
+      return frame, None
+
+    # Turn into an easier to use format
+    persons = [
+      {"id": str(i), "kpts": kpt.tolist(), "bboxes": bboxes}
+      for i, kpt, bboxes in zip(
+        detections.track_id, kpts, detections.xyxy.tolist()
+      )
+    ]
+
+    # Draw
+    if self.show:
+      self.annotate_frame(frame, detections, kpts)
+
+    return frame, persons
+
+  def frames(self):
+    """
+    Frames from the capture, copied when pipelined since the capture reuses
+    its buffers while earlier frames are still in flight
     """
     while self.cap.isOpened():
       success, frame = self.cap.read()
       if not success:
         print('[w] Ignoring empty/invalid frame')
         continue
+      yield frame.copy() if self.pipelined else frame
+
+  def select_target(self, persons) -> tuple[int, int] | None:
+    """
+    Keep following the current target, returns its head position
+    """
+    if not persons:
+      print("Found no targets")
+      if time.time() - self.last_detection_time > self.no_detection_timeout:
+          self.target_id = None  # Reset target if no one is detected for long
+      return None
+
+    # Print the tracking stats
+    bbox_ms, track_ms, pose_ms = [profile.dt * 1e3 / 1 for profile in self.profilers]
+    fps = 1e3 / (bbox_ms + track_ms + pose_ms)
+    print(f"Found {len(persons)} person(s), bbox: {bbox_ms:.2f}ms, track: {track_ms:.2f}ms, pose: {pose_ms:.2f}ms | FPS: {fps:.2f}")
+
+    # Select or update target
+    if self.target_id is None:
+        self.target_id = persons[0]['id']  # Select the first person as target
+        self.last_detection_time = time.time()
+
+    # Find target person
+    target_person = next((person for person in persons if person['id'] == self.target_id), None)
+
+    if target_person is None:
+        if time.time() - self.last_detection_time > self.no_detection_timeout:
+            self.target_id = None  # Reset target if current one is gone
+        return None
 
-      # Perform detection
-      with self.profilers[0]:
-        detections: Detections = self.rtmdet(frame)
-
-      # Only do the expensive calculations if we found a person
-      if detections:
-        # Invoke bytetrack
-        with self.profilers[1]:
-          detections: Detections = self.tracker.update(
-            bboxes=detections.xyxy,
-            confidence=detections.confidence,
-            labels=detections.labels,
-          )
-
-        # Perform pose estimation
-        with self.profilers[2]:
-          kpts, kpts_scores = self.rtmpose(frame, bboxes=detections.xyxy)
-
-        # Turn into an easier to use format
-        persons = [
-          {"id": str(id), "kpts": kpt.tolist(), "bboxes": bboxes}
-          for i, kpt, bboxes in zip(
-            detections.track_id, kpts, detections.xyxy.tolist()
-          )
-        ]
-
-        # Draw
-        if self.show:
-          self.annotate_frame(frame, detections, kpts)
-
-        # Print the tracking stats
-        bbox_ms, track_ms, pose_ms = [profile.dt * 1e3 / 1 for profile in self.profilers]
-        fps = 1.0 / (bbox_ms + track_ms + pose_ms)
-        print(f"Found {len(persons)} person(s), bbox: {bbox_ms:.2f}ms, track: {track_ms:.2f}ms, pose: {pose_ms:.2f}ms | FPS: {fps:.2f}")
-
-        if persons:
-          # Select or update target
-          if self.target_id is None:
-              self.target_id = persons[0]['id']  # Select the first person as target
-              self.last_detection_time = time.time()
-
-          # Find target person
-          target_person = next((person for person in persons if person['id'] == self.target_id), None)
-
-          if target_person is None:
-              if time.time() - self.last_detection_time > self.no_detection_timeout:
-                  self.target_id = None  # Reset target if current one is gone
-              yield None
-              continue
-
-          # Get keypoints for the target person
-          keypoints = target_person['kpts']
-
-          if keypoints is None or len(keypoints) < 5:  # Ensure head keypoints are available
-              if time.time() - self.last_detection_time > self.no_detection_timeout:
-                  self.target_id = None
-              yield None
-              continue
-
-          last_detection_time = time.time()  # Update last detection time
-
-          # Extract head position (e.g., keypoint 0 for head center)
-          head_x, head_y = keypoints[0]
-          yield (head_x, head_y)
-      else:
-        print("Found no targets")
+    # Get keypoints for the target person
+    keypoints = target_person['kpts']
+
+    if keypoints is None or len(keypoints) < 5:  # Ensure head keypoints are available
         if time.time() - self.last_detection_time > self.no_detection_timeout:
-            self.target_id = None  # Reset target if no one is detected for long
+            self.target_id = None
+        return None
+
+    self.last_detection_time = time.time()  # Update last detection time
+
+    # Extract head position (e.g., keypoint 0 for head center)
+    head_x, head_y = keypoints[0]
+    return (head_x, head_y)
+
+  def track(self) -> Generator[tuple[int, int] | None]:
+    """
+    Generator returning the current target
+    Returns the (x, y) coordinate of the current target
+    """
+    self.pipeline = StagePipeline([
+      ("detect", self.detect),
+      ("track", self.update_tracker),
+      ("pose", self.estimate_pose),
+      ("annotate", self.annotate),
+    ], pipelined=self.pipelined)
 
-        yield None
+    for frame, persons in self.pipeline.run(self.frames()):
+      yield self.select_target(persons)
 
       # show
       if self.show:
         cv2.imshow("Turret tracking", frame)
         if cv2.waitKey(1) & 0xFF == ord('q'):
           print("[i] Recieved 'q' key. Exiting...")
+          print(f"[i] Stage occupancy: {self.pipeline.summary()}")
           time.sleep(0.1)
           break
@@ -0,0 +1,96 @@
+import cv2
+import numpy as np
+
+# float32 so the normalization loop never goes through a float64 temporary
+INV_255 = np.float32(1 / 255)
+
+class Preprocessor:
+  """
+  Letterboxes frames (or boxes inside them) straight into preallocated
+  (N, 3, H, W) float32 inference inputs.
+
+  One warpAffine does the crop, resize and padding into a uint8 scratch image,
+  then one pass does BGR -> RGB, [0, 1] normalization and HWC -> CHW while
+  writing into the input tensor (a second in-place pass with mean/std). No
+  arrays are allocated per frame once a shape has been seen.
+  """
+
+  def __init__(self, input_shape: tuple[int, int], rgb: bool = True, pad: int = 0, mean=None, std=None):
+    """
+    input_shape: model input (height, width)
+    rgb: convert OpenCV's BGR frames to RGB
+    pad: letterbox border value (ultralytics uses 114)
+    mean, std: per channel (in output channel order, 0-255) to normalize with
+      (x - mean) / std instead of x / 255
+    """
+    self.height, self.width = input_shape
+    self.rgb = rgb
+    self.pad = (pad, pad, pad)
+    self.mean = None if mean is None else np.array(mean, dtype=np.float32).reshape(3, 1, 1)
+    self.inv_std = None if std is None else (1 / np.array(std, dtype=np.float32)).reshape(3, 1, 1)
+    self.scratch = np.empty((self.height, self.width, 3), dtype=np.uint8)
+    self.forward = np.zeros((2, 3), dtype=np.float32)
+    self.buffers = {}
+
+  def buffer(self, batch: int = 1) -> np.ndarray:
+    """
+    The preallocated input tensor for a batch size
+    """
+    if batch not in self.buffers:
+      self.buffers[batch] = np.empty((batch, 3, self.height, self.width), dtype=np.float32)
+    return self.buffers[batch]
+
+  def write(self, frame: np.ndarray, out: np.ndarray, inverse: np.ndarray, box=None):
+    """
+    Letterbox `box` (xyxy, whole frame if None) of `frame` into `out` (3, H, W)
+    and store the input -> frame pixel transform in `inverse` (2, 3)
+    """
+    if box is None:
+      x1, y1, x2, y2 = 0, 0, frame.shape[1], frame.shape[0]
+    else:
+      x1, y1, x2, y2 = box
+    scale = min(self.width / max(x2 - x1, 1), self.height / max(y2 - y1, 1))
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+
+    # input = scale * (frame - center) + input center
+    self.forward[0, 0] = self.forward[1, 1] = scale
+    self.forward[0, 2] = self.width / 2 - scale * cx
+    self.forward[1, 2] = self.height / 2 - scale * cy
+    cv2.warpAffine(
+      frame, self.forward, (self.width, self.height), dst=self.scratch,
+      flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=self.pad,
+    )
+
+    channels = self.scratch[:, :, ::-1] if self.rgb else self.scratch
+    if self.mean is None:
+      np.multiply(channels.transpose(2, 0, 1), INV_255, out=out, casting='unsafe')
+    else:
+      np.subtract(channels.transpose(2, 0, 1), self.mean, out=out, casting='unsafe')
+      np.multiply(out, self.inv_std, out=out)
+
+    inverse[0, 0] = inverse[1, 1] = 1 / scale
+    inverse[0, 1] = inverse[1, 0] = 0
+    inverse[0, 2] = cx - self.width / 2 / scale
+    inverse[1, 2] = cy - self.height / 2 / scale
+
+  def __call__(self, frame: np.ndarray, inverse: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Whole frame -> ((1, 3, H, W) input tensor, (2, 3) inverse transform)
+    """
+    tensor = self.buffer(1)
+    if inverse is None:
+      inverse = np.empty((2, 3), dtype=np.float32)
+    self.write(frame, tensor[0], inverse)
+    return tensor, inverse
+
+def invert_points(points: np.ndarray, inverse: np.ndarray) -> np.ndarray:
+  """
+  Map (..., 2) points from model input pixels back to frame pixels
+  """
+  return points @ inverse[:, :2].T + inverse[:, 2]
+
+def invert_boxes(boxes: np.ndarray, inverse: np.ndarray) -> np.ndarray:
+  """
+  Map (N, 4) xyxy boxes from model input pixels back to frame pixels
+  """
+  return invert_points(boxes.reshape(-1, 2, 2), inverse).reshape(-1, 4)
@@ -0,0 +1,246 @@
+"""
+Static INT8 (QDQ) quantization of a YOLO model, calibrated on turret footage.
+
+    python quantize.py yolov8n.pt --calibrate footage/*.mp4 --held-out test.mp4
+
+Exports the FP32 ONNX model through the model cache, samples frames evenly
+from the calibration clips, and writes a QDQ model with per-channel INT8
+weights next to it in the cache (models.int8_path). main.py picks it up with
+--backend onnxruntime --quantize, or the file can be passed as --model.
+
+The detection head stays in FP32: its output concatenates box coordinates
+(0-imgsz) with class scores (0-1), and a single uint8 scale for both would
+flatten the scores. head_nodes() finds it from the graph, --exclude adds more
+nodes to keep in FP32.
+
+With --held-out the FP32 and INT8 models are compared on that clip: predict
+latency, file size, mAP@0.5 of the INT8 detections taking the FP32 ones as
+ground truth, and, for pose models, the mean keypoint error.
+"""
+import cv2
+import glob
+import numpy as np
+from pathlib import Path
+from argparse import ArgumentParser
+from models import export, int8_path, model_task, resolve
+from preprocess import Preprocessor
+
+try:
+  from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+  )
+  from onnxruntime.quantization.shape_inference import quant_pre_process
+  import onnxruntime as ort
+  import onnx
+  ONNX_AVAILABLE = True
+except ImportError:
+  CalibrationDataReader = object
+  ONNX_AVAILABLE = False
+
+def sample_frames(paths: list[str], count: int) -> list[np.ndarray]:
+  """
+  About `count` frames spread evenly over all the clips
+  """
+  lengths = []
+  for path in paths:
+    cap = cv2.VideoCapture(path)
+    lengths.append(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    cap.release()
+
+  total = max(sum(lengths), 1)
+  frames = []
+  for path, length in zip(paths, lengths):
+    wanted = max(1, round(count * length / total))
+    cap = cv2.VideoCapture(path)
+    for index in np.linspace(0, max(length - 1, 0), wanted).astype(int):
+      cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+      success, frame = cap.read()
+      if success:
+        frames.append(frame)
+    cap.release()
+  return frames
+
+class FrameReader(CalibrationDataReader):
+  """
+  Feeds calibration frames, letterboxed the way ultralytics does it
+  """
+  def __init__(self, frames: list[np.ndarray], input_name: str, imgsz: int):
+    self.frames = iter(frames)
+    self.input_name = input_name
+    self.preprocessor = Preprocessor((imgsz, imgsz), pad=114)
+
+  def get_next(self):
+    frame = next(self.frames, None)
+    if frame is None:
+      return None
+    tensor, _ = self.preprocessor(frame)
+    return {self.input_name: tensor.copy()}
+
+def head_nodes(model) -> list[str]:
+  """
+  Nodes of the Detect/Pose head that must stay in FP32: everything in the
+  module that produces the graph outputs except its convolutions, plus DFL
+  """
+  producers = {output: node for node in model.graph.node for output in node.output}
+  heads = {producers[output.name].name.rsplit("/", 1)[0] + "/" for output in model.graph.output if output.name in producers}
+  return [
+    node.name
+    for node in model.graph.node
+    if any(node.name.startswith(head) for head in heads) and (node.op_type != "Conv" or "/dfl/" in node.name)
+  ]
+
+def quantize(weights: str, clips: list[str], imgsz: int = 640, samples: int = 300, method: str = "minmax", exclude: list[str] = ()) -> Path:
+  """
+  Calibrate and write the INT8 model, returns its path
+  """
+  if not ONNX_AVAILABLE:
+    raise ImportError("onnxruntime is required for quantization")
+
+  weights = resolve(weights)
+  fp32 = export(weights, "onnxruntime", imgsz)
+  int8 = int8_path(weights, imgsz)
+  prepared = fp32.with_name(fp32.stem + "-prepared.onnx")
+  # shape inference and graph cleanup so every tensor gets quantization params
+  quant_pre_process(str(fp32), str(prepared))
+
+  frames = sample_frames(clips, samples)
+  if not frames:
+    raise ValueError("No calibration frames could be read")
+  print(f"[i] Calibrating on {len(frames)} frames from {len(clips)} clip(s)")
+
+  graph = onnx.load(str(prepared))
+  excluded = head_nodes(graph) + list(exclude)
+  print(f"[i] Keeping {len(excluded)} head node(s) in FP32")
+
+  input_name = ort.InferenceSession(str(prepared), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+  quantize_static(
+    str(prepared), str(int8), FrameReader(frames, input_name, imgsz),
+    quant_format=QuantFormat.QDQ,
+    per_channel=True,
+    activation_type=QuantType.QUInt8,
+    weight_type=QuantType.QInt8,
+    calibrate_method=CalibrationMethod.Percentile if method == "percentile" else CalibrationMethod.MinMax,
+    nodes_to_exclude=excluded,
+  )
+  prepared.unlink()
+
+  # ultralytics reads names, stride and task from the metadata, carry it over
+  quantized = onnx.load(str(int8))
+  del quantized.metadata_props[:]
+  quantized.metadata_props.extend(onnx.load(str(fp32)).metadata_props)
+  onnx.save(quantized, str(int8))
+  return int8
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+  """
+  (N, M) IoU of xyxy boxes
+  """
+  top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+  bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+  intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+  area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+  area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+  return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+def average_precision(predictions: list[tuple[np.ndarray, np.ndarray]], references: list[np.ndarray], threshold: float = 0.5) -> float:
+  """
+  AP at an IoU threshold over a clip: predictions are (boxes, scores) per frame,
+  references the boxes taken as ground truth per frame
+  """
+  scores, hits = [], []
+  total = sum(len(reference) for reference in references)
+  for (boxes, confidence), reference in zip(predictions, references):
+    order = np.argsort(-confidence)
+    matched = np.zeros(len(reference), dtype=bool)
+    iou = box_iou(boxes[order], reference) if len(boxes) and len(reference) else np.zeros((len(boxes), 0))
+    for i, index in enumerate(order):
+      scores.append(confidence[index])
+      best = int(np.argmax(iou[i])) if iou.shape[1] else -1
+      hit = best >= 0 and iou[i, best] >= threshold and not matched[best]
+      if hit:
+        matched[best] = True
+      hits.append(hit)
+
+  if total == 0:
+    return 1.0 if not hits else 0.0
+
+  hits = np.array(hits)[np.argsort(-np.array(scores))]
+  true_positives = np.cumsum(hits)
+  recall = true_positives / total
+  precision = true_positives / np.arange(1, len(hits) + 1)
+  # all-point interpolation
+  precision = np.maximum.accumulate(precision[::-1])[::-1]
+  return float(np.sum(np.diff(np.concatenate(([0.0], recall))) * precision))
+
+def keypoint_error(a_boxes, a_keypoints, b_boxes, b_keypoints, threshold: float = 0.5) -> list[float]:
+  """
+  Mean keypoint distance in pixels for every pair of boxes matching at the IoU threshold
+  """
+  if a_keypoints is None or b_keypoints is None or not len(a_boxes) or not len(b_boxes):
+    return []
+  iou = box_iou(a_boxes, b_boxes)
+  errors = []
+  for i in range(len(a_boxes)):
+    j = int(np.argmax(iou[i]))
+    if iou[i, j] >= threshold:
+      errors.append(float(np.linalg.norm(a_keypoints[i] - b_keypoints[j], axis=-1).mean()))
+  return errors
+
+def evaluate(fp32: Path, int8: Path, clip: str, imgsz: int, frames: int = 300):
+  """
+  Compare the two models on a held-out clip
+  """
+  import time
+  from ultralytics import YOLO
+
+  images = sample_frames([clip], frames)
+  results = {}
+  for name, path in (("fp32", fp32), ("int8", int8)):
+    # task comes from the export, so pose models keep their keypoints
+    model = YOLO(str(path), task=model_task(fp32))
+    model.predict(images[0], imgsz=imgsz, device="cpu", verbose=False)  # warm up
+    outputs, latencies = [], []
+    for image in images:
+      start = time.perf_counter()
+      result = model.predict(image, imgsz=imgsz, classes=[0], device="cpu", verbose=False)[0]
+      latencies.append((time.perf_counter() - start) * 1e3)
+      keypoints = result.keypoints.xy.cpu().numpy() if getattr(result, "keypoints", None) is not None else None
+      outputs.append((result.boxes.xyxy.cpu().numpy(), result.boxes.conf.cpu().numpy(), keypoints))
+    results[name] = (outputs, latencies)
+
+  reference = [boxes for boxes, _, _ in results["fp32"][0]]
+  ap = average_precision([(boxes, scores) for boxes, scores, _ in results["int8"][0]], reference)
+  errors = [
+    error
+    for (a, _, a_kpts), (b, _, b_kpts) in zip(results["int8"][0], results["fp32"][0])
+    for error in keypoint_error(a, a_kpts, b, b_kpts)
+  ]
+
+  for name, path in (("fp32", fp32), ("int8", int8)):
+    latencies = results[name][1]
+    print(f"[i] {name}: {path.stat().st_size / 1e6:6.1f}MB, predict p50 {np.percentile(latencies, 50):6.1f}ms p95 {np.percentile(latencies, 95):6.1f}ms")
+  print(f"[i] int8 mAP@0.5 against fp32: {ap:.3f} (fp32 = 1.000 by definition)")
+  if errors:
+    print(f"[i] int8 keypoint error against fp32: mean {np.mean(errors):.2f}px, p95 {np.percentile(errors, 95):.2f}px")
+
+if __name__ == "__main__":
+  parser = ArgumentParser(description="Statically quantize a YOLO model to INT8 using recorded footage")
+  parser.add_argument('weights')
+  parser.add_argument('-c', '--calibrate', nargs='+', required=True, help='calibration clips (globs are expanded)')
+  parser.add_argument('-t', '--held-out', help='clip to compare FP32 and INT8 on')
+  parser.add_argument('-n', '--samples', type=int, default=300, help='calibration frames')
+  parser.add_argument('--imgsz', type=int, default=640)
+  parser.add_argument('--method', choices=('minmax', 'percentile'), default='minmax')
+  parser.add_argument('--exclude', nargs='*', default=[], help='more node names to keep in FP32, the head always is')
+  args = parser.parse_args()
+
+  clips = sorted({path for pattern in args.calibrate for path in glob.glob(pattern)})
+  int8 = quantize(args.weights, clips, args.imgsz, args.samples, args.method, args.exclude)
+  print(f"[i] Wrote {int8}")
+
+  if args.held_out:
+    evaluate(export(args.weights, "onnxruntime", args.imgsz), int8, args.held_out, args.imgsz)
@@ -0,0 +1,171 @@
+"""
+Display in a separate process, so drawing and cv2.imshow/waitKey never
+hold up inference.
+
+The tracking loop copies each frame into a shared-memory ring together with a
+small pickled overlay (boxes, trails, circles) and carries on. It never waits:
+each slot is seqlock-protected, and the renderer simply skips a frame that
+was overwritten while it was copying it. The renderer draws the newest frame
+at its own capped rate and reports key presses back through the header.
+"""
+import cv2
+import time
+import pickle
+import struct
+import numpy as np
+from multiprocessing import Process, RawArray
+
+# header fields, each with a single writer:
+# newest slot (-1 = none yet) and stop flag from the tracking loop,
+# number of key presses and the last key from the renderer
+FIELD = struct.Struct('<q')
+LATEST, STOP, PRESSES, KEY = (i * FIELD.size for i in range(4))
+# per slot: seqlock counter, overlay length
+SLOT = struct.Struct('<QQ')
+
+BOX_COLOR = (218, 100, 255)
+TRAIL_COLOR = (37, 255, 225)
+
+class Overlay:
+  """
+  What to draw over a frame, cheap to build and pickle
+  """
+  def __init__(self):
+    self.boxes = []  # (x1, y1, x2, y2, label)
+    self.trails = []  # (n, 1, 2) int32 point arrays
+    self.circles = []  # (x, y, radius, color)
+
+  def box(self, x1, y1, x2, y2, label: str):
+    self.boxes.append((int(x1), int(y1), int(x2), int(y2), label))
+
+  def trail(self, points: np.ndarray):
+    self.trails.append(np.array(points, dtype=np.int32))
+
+  def circle(self, x, y, radius: int, color: tuple[int, int, int]):
+    self.circles.append((int(x), int(y), radius, color))
+
+  def draw(self, frame: np.ndarray, line_width: int = 2):
+    for x1, y1, x2, y2, label in self.boxes:
+      cv2.rectangle(frame, (x1, y1), (x2, y2), BOX_COLOR, line_width)
+      (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+      cv2.rectangle(frame, (x1, y1 - h - 6), (x1 + w + 4, y1), BOX_COLOR, -1)
+      cv2.putText(frame, label, (x1 + 2, y1 - 4), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
+    if self.trails:
+      cv2.polylines(frame, self.trails, isClosed=False, color=TRAIL_COLOR, thickness=line_width)
+    for x, y, radius, color in self.circles:
+      cv2.circle(frame, (x, y), radius, color, -1)
+
+class Renderer:
+  """
+  Owns the frame ring and the display process.
+
+  submit() costs one frame copy; everything else happens in the other process.
+  """
+  def __init__(self, shape: tuple[int, ...], title: str = "Turret", slots: int = 3, overlay_size: int = 1 << 16, fps: float = 30):
+    self.shape = shape
+    self.slots = slots
+    self.overlay_size = overlay_size
+    self.frame_size = int(np.prod(shape))
+    self.slot_size = SLOT.size + overlay_size + self.frame_size
+
+    self.header = RawArray('B', 4 * FIELD.size)
+    self.ring = RawArray('B', self.slot_size * slots)
+    self.view = memoryview(self.ring).cast('B')
+    FIELD.pack_into(self.header, LATEST, -1)
+    self.presses = 0
+    self.next_slot = 0
+    self.submitted = 0
+    self.oversized = 0
+
+    self.process = Process(
+      target=render_loop,
+      args=(self.header, self.ring, shape, slots, overlay_size, title, fps),
+      daemon=True,
+    )
+    self.process.start()
+
+  def submit(self, frame: np.ndarray, overlay: Overlay):
+    """
+    Hand a frame to the display, never blocks
+    """
+    slot = self.next_slot
+    self.next_slot = (slot + 1) % self.slots
+    offset = slot * self.slot_size
+    data = pickle.dumps(overlay, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) > self.overlay_size:
+      # too much to draw, show the bare frame rather than stall
+      self.oversized += 1
+      data = pickle.dumps(Overlay(), protocol=pickle.HIGHEST_PROTOCOL)
+
+    counter = SLOT.unpack_from(self.ring, offset)[0]
+    # odd counter = write in progress
+    SLOT.pack_into(self.ring, offset, counter + 1, len(data))
+    start = offset + SLOT.size
+    self.view[start:start + len(data)] = data
+    start += self.overlay_size
+    np.frombuffer(self.ring, dtype=np.uint8, count=self.frame_size, offset=start)[:] = frame.reshape(-1)
+    SLOT.pack_into(self.ring, offset, counter + 2, len(data))
+
+    FIELD.pack_into(self.header, LATEST, slot)
+    self.submitted += 1
+
+  def key(self) -> int:
+    """
+    Key pressed in the window since the last call (-1 for none)
+    """
+    presses = FIELD.unpack_from(self.header, PRESSES)[0]
+    if presses == self.presses:
+      return -1
+    self.presses = presses
+    return FIELD.unpack_from(self.header, KEY)[0]
+
+  def close(self):
+    FIELD.pack_into(self.header, STOP, 1)
+    self.process.join(timeout=1)
+    if self.process.is_alive():
+      self.process.terminate()
+
+def render_loop(header, ring, shape, slots: int, overlay_size: int, title: str, fps: float):
+  view = memoryview(ring).cast('B')
+  frame_size = int(np.prod(shape))
+  slot_size = SLOT.size + overlay_size + frame_size
+  frame = np.empty(shape, dtype=np.uint8)
+  shown = {}  # slot -> counter last displayed
+  interval = 1 / fps
+  drawn = skipped = presses = 0
+
+  while True:
+    start = time.monotonic()
+    if FIELD.unpack_from(header, STOP)[0]:
+      break
+
+    latest = FIELD.unpack_from(header, LATEST)[0]
+
+    if latest >= 0:
+      offset = latest * slot_size
+      counter, length = SLOT.unpack_from(ring, offset)
+      if not counter & 1 and shown.get(latest) != counter:
+        overlay = bytes(view[offset + SLOT.size:offset + SLOT.size + length])
+        frame.reshape(-1)[:] = np.frombuffer(ring, dtype=np.uint8, count=frame_size, offset=offset + SLOT.size + overlay_size)
+
+        # the tracking loop came around and rewrote this slot, drop the frame
+        if SLOT.unpack_from(ring, offset)[0] != counter:
+          skipped += 1
+        else:
+          shown[latest] = counter
+          pickle.loads(overlay).draw(frame)
+          cv2.imshow(title, frame)
+          drawn += 1
+
+    pressed = cv2.waitKey(1) & 0xFF
+    if pressed != 0xFF:
+      presses += 1
+      FIELD.pack_into(header, KEY, pressed)
+      FIELD.pack_into(header, PRESSES, presses)
+
+    delay = interval - (time.monotonic() - start)
+    if delay > 0:
+      time.sleep(delay)
+
+  cv2.destroyAllWindows()
+  print(f"[i] Renderer: {drawn} frames drawn, {skipped} dropped mid-copy")
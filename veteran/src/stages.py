@@ -0,0 +1,140 @@
+import time
+import queue
+import threading
+from typing import Callable, Iterator
+
+# marks the end of the stream as it flows through the stages
+_END = object()
+
+class _Error:
+  """
+  An exception raised by a stage (or the source), carried downstream to be
+  re-raised where the results are consumed
+  """
+  def __init__(self, exc: BaseException):
+    self.exc = exc
+
+class Stage:
+  """
+  One step of a StagePipeline and how busy it has been
+  """
+  def __init__(self, name: str, fn: Callable):
+    self.name = name
+    self.fn = fn
+    self.busy = 0.0  # seconds spent inside fn
+    self.items = 0
+
+  def __call__(self, item):
+    start = time.perf_counter()
+    result = self.fn(item)
+    self.busy += time.perf_counter() - start
+    self.items += 1
+    return result
+
+class StagePipeline:
+  """
+  Runs a chain of stages over a stream of items.
+
+  Pipelined, every stage gets its own thread and a bounded queue in front of
+  it, so stage 1 can work on item N+1 while stage 2 is still on item N. Each
+  stage is a single thread consuming its queue in order, so output order is
+  the input order and stateful stages (the tracker) see items one at a time,
+  in sequence. Sequential mode runs the same stages inline for comparison.
+  """
+  def __init__(self, stages: list[tuple[str, Callable]], pipelined: bool = True, depth: int = 2):
+    self.stages = [Stage(name, fn) for name, fn in stages]
+    self.pipelined = pipelined
+    self.depth = depth
+    self.started = None
+
+  def run(self, source: Iterator) -> Iterator:
+    """
+    Feed items from `source` through every stage, yielding the results in order
+    """
+    self.started = time.perf_counter()
+    if not self.pipelined:
+      for item in source:
+        for stage in self.stages:
+          item = stage(item)
+        yield item
+      return
+
+    queues = [queue.Queue(maxsize=self.depth) for _ in range(len(self.stages) + 1)]
+    stop = threading.Event()
+
+    def put(q, item):
+      # bounded put that gives up once the consumer has gone away
+      while not stop.is_set():
+        try:
+          q.put(item, timeout=0.1)
+          return True
+        except queue.Full:
+          pass
+      return False
+
+    def get(q):
+      # bounded get that gives up once the consumer has gone away
+      while not stop.is_set():
+        try:
+          return q.get(timeout=0.1)
+        except queue.Empty:
+          pass
+      return _END
+
+    def feed():
+      try:
+        for item in source:
+          if not put(queues[0], item):
+            return
+      except Exception as exc:
+        put(queues[0], _Error(exc))
+        return
+      put(queues[0], _END)
+
+    def work(stage, inbox, outbox):
+      while True:
+        item = get(inbox)
+        if item is not _END and not isinstance(item, _Error):
+          try:
+            item = stage(item)
+          except Exception as exc:
+            item = _Error(exc)
+        # an error ends the stream like _END does, after passing it on
+        if not put(outbox, item) or item is _END or isinstance(item, _Error):
+          return
+
+    threads = [threading.Thread(target=feed, name="stage-feed", daemon=True)]
+    for i, stage in enumerate(self.stages):
+      threads.append(threading.Thread(
+        target=work, args=(stage, queues[i], queues[i + 1]), name=f"stage-{stage.name}", daemon=True
+      ))
+    for thread in threads:
+      thread.start()
+
+    try:
+      while (item := queues[-1].get()) is not _END:
+        if isinstance(item, _Error):
+          raise item.exc
+        yield item
+    finally:
+      # closed early (target lost, track() called again), failed or done: stop
+      # the threads and drop whatever frames are still queued
+      stop.set()
+      for thread in threads:
+        thread.join(timeout=1)
+      for q in queues:
+        while True:
+          try:
+            q.get_nowait()
+          except queue.Empty:
+            break
+
+  def occupancy(self) -> dict[str, float]:
+    """
+    Fraction of wall time each stage spent working
+    """
+    elapsed = time.perf_counter() - self.started if self.started else 0
+    return {stage.name: stage.busy / elapsed if elapsed else 0.0 for stage in self.stages}
+
+  def summary(self) -> str:
+    return ", ".join(f"{name} {value * 100:.0f}%" for name, value in self.occupancy().items())
@@ -9,35 +9,35 @@ import numpy as np
 import time
 import torch
 from cli import options
-from camera import pixel_to_angle
-from utils import predict_with_ema
+from camera import angle_lookup
+from encoder import EncoderSink
+from tracks import TrackStore
 from PID_Py.PID import PID
 from pathlib import Path
-from ultralytics import YOLO
-from collections import defaultdict
+from models import load_model
 from ultralytics.utils.plotting import Annotator
 from torch.quantization import quantize_dynamic
 from multiprocessing import Process, Pipe
 
-track_history = defaultdict(lambda: [])
 pid = PID(kp = 0.006, ki = 0, kd = 0.0002)
 
-# Load the model
-model = YOLO(options.model)
+# Load the model, with onnxruntime --quantize the INT8 model calibrated by quantize.py
+int8 = options.quantize and options.backend == "onnxruntime"
+model = load_model(options.model, options.backend, options.imgsz, int8=int8)
 device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
-print("[i] Using device: ", device)
-model.to(device)
+print(f"[i] Using backend {options.backend} on device: ", device)
+if options.backend == "torch":
+  model.to(device)
 
-# Define the codec and create a VideoWriter object
-fourcc = cv2.VideoWriter_fourcc(*'MP4V')
-out = cv2.VideoWriter('output.mp4', fourcc, 60.0, options.resolution)
+# Frames are encoded in another process (created once the frame size is known)
+out = None
 
 # quantize if requested
-if options.quantize:
+if options.quantize and options.backend == "torch":
   quantized_model = quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
   model.model = quantized_model
 
-names = model.model.names
+names = model.names
 video_path = options.video
 
 # Load the video file (or webcam)
@@ -53,6 +53,10 @@ cap.set(cv2.CAP_PROP_FRAME_HEIGHT, options.resolution[1])
 PREDICT_TIME = 500  # in milliseconds
 alpha = 0.3  # Smoothing factor for EMA
 
+# Last 30 positions of every active track, evicted after 2s unseen,
+# with their EMA velocity updated as samples come in
+track_history = TrackStore(length=30, max_age=2.0, alpha=alpha)
+
 # Spherical without the r, so (phi, theta)
 current_phi = 180
 current_theta = 0
@@ -66,19 +70,31 @@ parent_conn, child_conn = Pipe(duplex=True)
 # Read the actual width and height
 width  = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
 height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+to_angle = angle_lookup(width, height)
 current_target = None
 target_last_found = time.time()
 shooting_enabled = True
 
 while cap.isOpened():
   success, frame = cap.read()
+  captured = time.monotonic()
 
   if not success:
     print('[w] Ignoring empty frame')
     break
 
+  if out is None:
+    if options.record_raw:
+      out = EncoderSink('output.frames', frame.shape, block=options.record_block, raw=True)
+    else:
+      out = EncoderSink('output.mp4', frame.shape, 60.0, 'MP4V', block=options.record_block)
+  # the raw recording is for replaying through the model, so it gets the frame
+  # before anything is drawn on it (write copies it into the ring)
+  if options.record_raw:
+    out.write(frame, captured)
+
   # Detect objects and extract bounding boxes
-  results = model.track(frame, persist=True, classes=[0],
+  results = model.track(frame, persist=True, classes=[0], imgsz=options.imgsz,
                         tracker="bytetrack.yaml", verbose=options.verbose)
 
   boxes = results[0].boxes.xywh.cpu()
@@ -103,14 +119,10 @@ while cap.isOpened():
                         label, (218, 100, 255))
 
     # Keep track of previous locations for EMA
-    track = track_history[track_id]
-    track.append((float(box[0]), float(box[1]), time.time()))
-    if len(track) > 30:
-      track.pop(0)
-
-    # Draw the previous locations, extracting only (x,y) points
-    points = np.hstack([(p[0], p[1]) for p in track]).astype(np.int32).reshape((-1, 1, 2))
-    cv2.polylines(frame, [points], isClosed=False,
+    track = track_history.append(track_id, float(box[0]), float(box[1]), time.time())
+
+    # Draw the previous locations
+    cv2.polylines(frame, [track_history.points(track_id)], isClosed=False,
                   color=(37, 255, 225), thickness=4)
 
     # Circle indicating the center of the person.
@@ -132,12 +144,12 @@ while cap.isOpened():
     target_last_found = time.time()
 
     # Find absolute angle of person
-    rel_phi, rel_theta = pixel_to_angle(track[-1][0], track[-1][1], width, height)
+    rel_phi, rel_theta = to_angle(track[-1][0], track[-1][1])
     track_phi = current_phi + rel_phi
     track_theta = current_theta + rel_theta
 
     # Guess where we are probably going to go
-    predicted = predict_with_ema(track, PREDICT_TIME, alpha)
+    predicted = track_history.predict(track_id, PREDICT_TIME)
 
     # Communicate the new angles to the board
     if not options.dry_run:
@@ -156,12 +168,18 @@ while cap.isOpened():
                   (int(predicted[0]), int(predicted[1])),
                   10, (135, 206, 250), -1)
 
+  # Forget people that left
+  track_history.evict(time.time())
+
   # If we haven't seen the target for a while, reset
   if time.time() - target_last_found > 2:
     current_target = None
 
-  # Show the frame, and quit if 'q' is pressed
-  out.write(frame)
+  # Record the annotated frame (the raw recording has it already), and show it. Quit if 'q' is pressed
+  if not options.record_raw:
+    out.write(frame, captured)
+  if options.verbose:
+    print(f"[d] Recording: {out.summary()}")
   cv2.imshow("Turret", frame)
   if cv2.waitKey(1) & 0xFF == ord("q"):
     break
@@ -170,5 +188,7 @@ while cap.isOpened():
     shooting_enabled = False
 
 cap.release()
-out.release()
+if out is not None:
+  out.close()
+  print(f"[i] Recording: {out.summary()}")
 cv2.destroyAllWindows()
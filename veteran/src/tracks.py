@@ -0,0 +1,131 @@
+import numpy as np
+from collections import OrderedDict
+from velocity import EmaVelocity
+
+class TrackStore:
+  """
+  Recent (x, y, t) history of every active track in preallocated rings.
+
+  Each ring is written twice (at i and i + length), so the last `length`
+  samples are always one contiguous slice: `track()` and `points()` return
+  views in oldest-to-newest order without copying, and appending is O(1).
+
+  Tracks not seen for `max_age` seconds are evicted, and when all `capacity`
+  slots are taken the least recently updated track makes room.
+
+  With `alpha` set, an EmaVelocity is kept up to date over the same window
+  so predictions don't have to walk the history.
+  """
+  length: int
+  capacity: int
+  max_age: float
+
+  def __init__(self, length: int = 30, capacity: int = 64, max_age: float = 2.0, alpha: float | None = None):
+    self.length = length
+    self.capacity = capacity
+    self.max_age = max_age
+
+    self.samples = np.zeros((capacity, 2 * length, 3), dtype=np.float64)
+    # the same positions as int32, ready for cv2.polylines
+    self.pixels = np.zeros((capacity, 2 * length, 2), dtype=np.int32)
+    # plain lists, numpy scalar indexing would dominate append()
+    self.head = [0] * capacity  # next write position in [0, length)
+    self.count = [0] * capacity
+
+    self.slots = OrderedDict()  # track id -> slot, least recently updated first
+    self.free = list(range(capacity - 1, -1, -1))
+    self.evicted = 0
+    self.velocity = EmaVelocity(capacity, alpha, window=length - 1) if alpha is not None else None
+
+  def __contains__(self, track_id) -> bool:
+    return track_id in self.slots
+
+  def __len__(self) -> int:
+    return len(self.slots)
+
+  def append(self, track_id, x: float, y: float, t: float) -> np.ndarray:
+    """
+    Add a sample to a track (creating it if needed), returns its history view
+    """
+    slot = self.slots.get(track_id)
+    if slot is None:
+      slot = self._allocate(track_id)
+    else:
+      self.slots.move_to_end(track_id)
+
+    head = self.head[slot]
+    samples, pixels = self.samples[slot], self.pixels[slot]
+    samples[head] = samples[head + self.length] = (x, y, t)
+    pixels[head] = pixels[head + self.length] = (int(x), int(y))
+    self.head[slot] = (head + 1) % self.length
+    if self.velocity is not None:
+      self.velocity.update(slot, x, y, t)
+    if self.count[slot] < self.length:
+      self.count[slot] += 1
+    return samples[head + self.length + 1 - self.count[slot]:head + self.length + 1]
+
+  def _allocate(self, track_id) -> int:
+    if not self.free:
+      # full, drop the least recently updated track
+      self.remove(next(iter(self.slots)))
+    slot = self.free.pop()
+    self.head[slot] = 0
+    self.count[slot] = 0
+    if self.velocity is not None:
+      self.velocity.reset(slot)
+    self.slots[track_id] = slot
+    return slot
+
+  def _window(self, track_id) -> tuple[int, int, int]:
+    slot = self.slots[track_id]
+    end = self.head[slot] + self.length
+    return slot, end - self.count[slot], end
+
+  def track(self, track_id) -> np.ndarray:
+    """
+    (n, 3) view of x, y, t, oldest first. Only valid until the next append.
+    """
+    slot, start, end = self._window(track_id)
+    return self.samples[slot, start:end]
+
+  def points(self, track_id) -> np.ndarray:
+    """
+    (n, 1, 2) int32 view of the positions for cv2.polylines
+    """
+    slot, start, end = self._window(track_id)
+    return self.pixels[slot, start:end].reshape(-1, 1, 2)
+
+  def predict(self, track_id, predict_time_ms: float) -> tuple[float, float] | None:
+    """
+    Same as utils.predict_with_ema(track, predict_time_ms, alpha), in O(1)
+    """
+    return self.velocity.predict_one(self.slots[track_id], predict_time_ms / 1000.0)
+
+  def predict_all(self, track_ids, predict_time_ms: float) -> np.ndarray:
+    """
+    (N, 2) predictions for many tracks at once, NaN where there is not enough data
+    """
+    slots = [self.slots[track_id] for track_id in track_ids]
+    return self.velocity.predict(slots, predict_time_ms / 1000.0)
+
+  def last_seen(self, track_id) -> float:
+    slot = self.slots[track_id]
+    return float(self.samples[slot, self.head[slot] + self.length - 1, 2])
+
+  def remove(self, track_id):
+    self.free.append(self.slots.pop(track_id))
+    self.evicted += 1
+
+  def evict(self, now: float) -> int:
+    """
+    Drop every track not updated within max_age of `now`, returns how many
+    """
+    stale = []
+    # least recently updated first, so stop at the first fresh one
+    for track_id in self.slots:
+      if now - self.last_seen(track_id) <= self.max_age:
+        break
+      stale.append(track_id)
+    for track_id in stale:
+      self.remove(track_id)
+    return len(stale)
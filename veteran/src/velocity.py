@@ -0,0 +1,128 @@
+import numpy as np
+
+class EmaVelocity:
+  """
+  Incremental version of utils.predict_with_ema for many tracks at once.
+
+  predict_with_ema folds an EMA over the velocities of the last `window`
+  velocities (seeded with the oldest one) on every call. The same value comes
+  out of a running EMA G started at zero:
+
+    ema = d^m * v_k + G_n - d^m * G_k,   d = 1 - alpha, m = n - k
+
+  where v_k / G_k are the velocity and running EMA at the oldest sample still
+  in the window, kept in a small ring per track. Every update and prediction
+  is O(1), and `predict` works on an array of slots.
+
+  Optionally also keeps an (unwindowed) EMA of the acceleration.
+  """
+  alpha: float
+  window: int
+
+  def __init__(self, capacity: int, alpha: float = 0.1, window: int = 29, acceleration: bool = False):
+    """
+    window: velocities the EMA covers, one less than the track length
+    acceleration: add 1/2 a t^2 to predictions
+    """
+    self.alpha = alpha
+    self.decay = 1 - alpha
+    self.window = window
+    self.acceleration = acceleration
+
+    self.count = np.zeros(capacity, dtype=np.int64)  # velocities seen
+    self.position = np.zeros((capacity, 2))
+    self.time = np.full(capacity, np.nan)  # NaN until the first sample
+    self.running = np.zeros((capacity, 2))  # G_n
+    self.velocities = np.zeros((capacity, window, 2))  # v_j at j % window
+    self.history = np.zeros((capacity, window, 2))  # G_j at j % window
+    self.accel = np.zeros((capacity, 2))
+
+  def reset(self, slot: int):
+    self.count[slot] = 0
+    self.time[slot] = np.nan
+    self.running[slot] = 0
+    self.accel[slot] = 0
+
+  def update(self, slot: int, x: float, y: float, t: float):
+    """
+    Add a sample. Samples that are not newer than the last one are ignored
+    (predict_with_ema would divide by zero on them).
+    """
+    last = self.time[slot]
+    if last != last:  # first sample
+      self.position[slot] = (x, y)
+      self.time[slot] = t
+      return
+    dt = t - last
+    if dt <= 0:
+      return
+
+    n = self.count[slot] + 1
+    position = self.position[slot]
+    vx, vy = (x - position[0]) / dt, (y - position[1]) / dt
+
+    if self.acceleration and n > 1:
+      previous = self.velocities[slot, (n - 1) % self.window]
+      ax, ay = (vx - previous[0]) / dt, (vy - previous[1]) / dt
+      accel = self.accel[slot]
+      if n == 2:
+        accel[:] = (ax, ay)
+      else:
+        accel[0] = self.alpha * ax + self.decay * accel[0]
+        accel[1] = self.alpha * ay + self.decay * accel[1]
+
+    running = self.running[slot]
+    running[0] = self.alpha * vx + self.decay * running[0]
+    running[1] = self.alpha * vy + self.decay * running[1]
+    self.velocities[slot, n % self.window] = (vx, vy)
+    self.history[slot, n % self.window] = running
+
+    position[:] = (x, y)
+    self.time[slot] = t
+    self.count[slot] = n
+
+  def velocity(self, slots) -> np.ndarray:
+    """
+    (N, 2) EMA velocity in px/s, NaN for tracks with fewer than two samples
+    """
+    slots = np.asarray(slots)
+    n = self.count[slots]
+    oldest = np.maximum(1, n - self.window + 1)
+    index = oldest % self.window
+    scale = (self.decay ** (n - oldest))[:, None]
+
+    ema = scale * self.velocities[slots, index] + self.running[slots] - scale * self.history[slots, index]
+    ema[n == 0] = np.nan
+    return ema
+
+  def predict_one(self, slot: int, horizon: float) -> tuple[float, float] | None:
+    """
+    predict() for a single track without the array overhead
+    """
+    n = int(self.count[slot])
+    if n == 0:
+      return None
+    oldest = max(1, n - self.window + 1)
+    scale = self.decay ** (n - oldest)
+    first = self.velocities[slot, oldest % self.window].tolist()
+    seed = self.history[slot, oldest % self.window].tolist()
+    running = self.running[slot].tolist()
+    x, y = self.position[slot].tolist()
+
+    x += (scale * first[0] + running[0] - scale * seed[0]) * horizon
+    y += (scale * first[1] + running[1] - scale * seed[1]) * horizon
+    if self.acceleration:
+      ax, ay = self.accel[slot].tolist()
+      x += 0.5 * ax * horizon ** 2
+      y += 0.5 * ay * horizon ** 2
+    return x, y
+
+  def predict(self, slots, horizon: float) -> np.ndarray:
+    """
+    (N, 2) positions `horizon` seconds after each track's last sample
+    """
+    slots = np.asarray(slots)
+    predicted = self.position[slots] + self.velocity(slots) * horizon
+    if self.acceleration:
+      predicted += 0.5 * self.accel[slots] * horizon ** 2
+    return predicted
@@ -25,6 +25,7 @@ pub enum DecodeError {
     InvalidAxis,
     InvalidInteger,
     InvalidArgument, // generic
+    InvalidChecksum,
 }
 
 impl From<ParseIntError> for DecodeError {
@@ -40,6 +41,7 @@ impl Format for DecodeError {
             DecodeError::InvalidAxis => defmt::write!(fmt, "Invalid axis"),
             DecodeError::InvalidInteger => defmt::write!(fmt, "Invalid integer"),
             DecodeError::InvalidArgument => defmt::write!(fmt, "Invalid argument"),
+            DecodeError::InvalidChecksum => defmt::write!(fmt, "Invalid checksum"),
         }
     }
 }
@@ -85,3 +87,78 @@ pub fn decode(message: &str) -> Result<Message, DecodeError> {
         _ => Err(DecodeError::InvalidCommand),
     }
 }
+
+/// First byte of a binary frame. Never the start of a valid UTF-8 sequence,
+/// so it cannot be confused with a text command.
+pub const FRAME_SYNC: u8 = 0xA5;
+pub const FRAME_SIZE: usize = 13;
+
+const FLAG_PAN: u8 = 1 << 0;
+const FLAG_TILT: u8 = 1 << 1;
+const FLAG_TRIGGER: u8 = 1 << 2;
+const FLAG_TRIGGER_ACTIVE: u8 = 1 << 3;
+
+#[derive(Debug, Format)]
+pub struct Frame {
+    pub seq: u16,
+    pub pan: Option<i32>,
+    pub tilt: Option<i32>,
+    pub trigger: Option<bool>,
+}
+
+/// Index of the first sync byte in `buf` at or after `from`, or `buf.len()` if there is none.
+pub fn next_sync(buf: &[u8], from: usize) -> usize {
+    buf[from..]
+        .iter()
+        .position(|&byte| byte == FRAME_SYNC)
+        .map_or(buf.len(), |i| from + i)
+}
+
+/// CRC-8/SMBUS (poly 0x07, init 0x00).
+fn crc8(data: &[u8]) -> u8 {
+    let mut crc = 0u8;
+    for byte in data {
+        crc ^= byte;
+        for _ in 0..8 {
+            crc = if crc & 0x80 != 0 {
+                (crc << 1) ^ 0x07
+            } else {
+                crc << 1
+            };
+        }
+    }
+    crc
+}
+
+/**
+ * Decode a binary frame sent by sentinel (see sentinel/src/protocol.py).
+ *
+ * Layout (little-endian):
+ *   - u8 sync (0xA5)
+ *   - u8 flags (bit0 pan, bit1 tilt, bit2 trigger present, bit3 trigger active)
+ *   - u16 sequence number
+ *   - i32 pan velocity
+ *   - i32 tilt velocity
+ *   - u8 CRC-8 over the preceding 12 bytes
+ */
+pub fn decode_frame(frame: &[u8]) -> Result<Frame, DecodeError> {
+    if frame.len() != FRAME_SIZE || frame[0] != FRAME_SYNC {
+        return Err(DecodeError::InvalidCommand);
+    }
+
+    if crc8(&frame[..FRAME_SIZE - 1]) != frame[FRAME_SIZE - 1] {
+        return Err(DecodeError::InvalidChecksum);
+    }
+
+    let flags = frame[1];
+    let seq = u16::from_le_bytes([frame[2], frame[3]]);
+    let pan = i32::from_le_bytes([frame[4], frame[5], frame[6], frame[7]]);
+    let tilt = i32::from_le_bytes([frame[8], frame[9], frame[10], frame[11]]);
+
+    Ok(Frame {
+        seq,
+        pan: (flags & FLAG_PAN != 0).then_some(pan),
+        tilt: (flags & FLAG_TILT != 0).then_some(tilt),
+        trigger: (flags & FLAG_TRIGGER != 0).then_some(flags & FLAG_TRIGGER_ACTIVE != 0),
+    })
+}
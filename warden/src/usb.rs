@@ -102,6 +102,9 @@ impl USBController {
         let mut buf = [0u8; 64];
         let mut utf8_buf = [0u8; 128]; // Buffer for partial UTF-8 sequences
         let mut buf_len = 0;
+        // Set by the first sync byte. From then on the connection only carries binary
+        // frames, so the leftovers of a corrupted frame are never run as text.
+        let mut binary = false;
 
         loop {
             let n = class.read_packet(&mut buf).await?;
@@ -116,6 +119,45 @@ impl USBController {
             utf8_buf[buf_len..buf_len + data.len()].copy_from_slice(data);
             buf_len += data.len();
 
+            // Binary frames start with a sync byte that can never begin a text command.
+            if buf_len > 0 && utf8_buf[0] == decoder::FRAME_SYNC {
+                binary = true;
+            }
+
+            let mut consumed = 0;
+            while binary && consumed < buf_len {
+                if utf8_buf[consumed] != decoder::FRAME_SYNC {
+                    // not a frame, drop everything up to the next sync byte
+                    consumed = decoder::next_sync(&utf8_buf[..buf_len], consumed);
+                    continue;
+                }
+
+                if buf_len - consumed < decoder::FRAME_SIZE {
+                    break; // wait for the rest of the frame
+                }
+
+                match decoder::decode_frame(&utf8_buf[consumed..consumed + decoder::FRAME_SIZE]) {
+                    Ok(frame) => {
+                        USBController::execute_frame(frame, controller).await;
+                        consumed += decoder::FRAME_SIZE;
+                    }
+                    Err(e) => {
+                        defmt::warn!("Error decoding frame: {:?}", e);
+                        // resync on the next sync byte after this one
+                        consumed = decoder::next_sync(&utf8_buf[..buf_len], consumed + 1);
+                    }
+                }
+            }
+
+            if consumed > 0 {
+                utf8_buf.copy_within(consumed..buf_len, 0);
+                buf_len -= consumed;
+            }
+
+            if binary || buf_len == 0 {
+                continue;
+            }
+
             // Attempt to decode as much as possible.
             let (_valid, remaining) = match core::str::from_utf8(&utf8_buf[..buf_len]) {
                 Ok(s) => {
@@ -153,9 +195,34 @@ impl USBController {
             return;
         }
 
-        let ok = async || -> Result<(), embassy_stm32::usart::Error> {
-            match decoder::decode(message) {
-                Ok(decoder::Message::Speed(speed)) => match speed.axis {
+        match decoder::decode(message) {
+            Ok(message) => USBController::apply(message, controller).await,
+            Err(e) => defmt::warn!("Error decoding message: {:?}", e),
+        }
+    }
+
+    pub async fn execute_frame(frame: decoder::Frame, controller: &ControllerMutex) {
+        if let Some(velocity) = frame.pan {
+            let axis = decoder::MotorAxis::Pan;
+            let speed = decoder::MotorSpeed { axis, velocity };
+            USBController::apply(decoder::Message::Speed(speed), controller).await;
+        }
+
+        if let Some(velocity) = frame.tilt {
+            let axis = decoder::MotorAxis::Tilt;
+            let speed = decoder::MotorSpeed { axis, velocity };
+            USBController::apply(decoder::Message::Speed(speed), controller).await;
+        }
+
+        if let Some(status) = frame.trigger {
+            USBController::apply(decoder::Message::Trigger(status), controller).await;
+        }
+    }
+
+    async fn apply(message: decoder::Message, controller: &ControllerMutex) {
+        let result = async {
+            match message {
+                decoder::Message::Speed(speed) => match speed.axis {
                     decoder::MotorAxis::Pan => {
                         controller
                             .lock()
@@ -170,10 +237,10 @@ impl USBController {
                         controller.motor_z.set_velocity(-1 * speed.velocity).await?;
                     }
                 },
-                Ok(decoder::Message::Stop(axis)) => {
+                decoder::Message::Stop(axis) => {
                     info!("Stop: {:?}", axis);
                 }
-                Ok(decoder::Message::Trigger(status)) => {
+                decoder::Message::Trigger(status) => {
                     info!("Trigger: {:?}", status);
                     controller
                         .lock()
@@ -181,15 +248,12 @@ impl USBController {
                         .trigger_servo
                         .set_position(if status { 180 } else { 0 });
                 }
-                Err(e) => {
-                    defmt::warn!("Error decoding message: {:?}", e);
-                }
             };
 
-            Ok(())
+            Ok::<(), embassy_stm32::usart::Error>(())
         };
 
-        if let Err(e) = ok().await {
+        if let Err(e) = result.await {
             defmt::warn!("Error executing command: {:?}", e);
         }
     }